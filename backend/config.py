@@ -11,9 +11,55 @@ load_dotenv(BASE_DIR / ".env")
 LLM_API_KEY = os.getenv("LLM_API_KEY", "ollama")
 LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://localhost:11434/v1")
 LLM_MODEL = os.getenv("LLM_MODEL", "qwen3:14b")
+# Requests in flight at once, across all personas and threads. Match the
+# server's parallel slots (Ollama: OLLAMA_NUM_PARALLEL).
+LLM_MAX_PARALLEL = max(1, int(os.getenv(
+    "LLM_MAX_PARALLEL", os.getenv("OLLAMA_NUM_PARALLEL", "4"))))
+
+# LLM response cache
+#   always   — cache every chat_completion call
+#   low_temp — cache only calls with temperature <= LLM_CACHE_MAX_TEMP
+#   off      — never cache
+LLM_CACHE_POLICY = os.getenv("LLM_CACHE_POLICY", "low_temp").lower()
+LLM_CACHE_MAX_TEMP = float(os.getenv("LLM_CACHE_MAX_TEMP", "0.5"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200000"))
+LLM_CACHE_PATH = Path(os.getenv(
+    "LLM_CACHE_PATH",
+    str(Path(__file__).resolve().parent / "data" / "cache" / "llm_cache.sqlite3")))
+
+# Poignancy scores memoized by model, event type and description across runs
+POIGNANCY_MEMO = os.getenv("POIGNANCY_MEMO", "true").lower() == "true"
+POIGNANCY_MEMO_PATH = Path(os.getenv(
+    "POIGNANCY_MEMO_PATH",
+    str(Path(__file__).resolve().parent / "data" / "cache" / "poignancy.sqlite3")))
+
+# Plan: ask for a new action's place, emojis, event and object state in one
+# structured prompt instead of ~7, falling back per field
+FUSED_ACTION = os.getenv("FUSED_ACTION", "false").lower() == "true"
+
+# Plan: decompose the block the next action change will split on a
+# background pool, once that change is within this many minutes, so the
+# step rarely waits for the subtask prompt
+DECOMP_PREFETCH = os.getenv("DECOMP_PREFETCH", "true").lower() == "true"
+DECOMP_PREFETCH_MINUTES = int(os.getenv("DECOMP_PREFETCH_MINUTES", "120"))
 
 # Embedding
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "8192"))
+
+# Maze: per-address BFS distance fields kept in memory, and whether to
+# compute all of them when the map loads
+DISTANCE_FIELD_CACHE_SIZE = int(os.getenv("DISTANCE_FIELD_CACHE_SIZE", "512"))
+WARM_DISTANCE_FIELDS = os.getenv("WARM_DISTANCE_FIELDS", "false").lower() == "true"
+# Maze: (start, goal) paths kept in memory
+PATH_CACHE_SIZE = int(os.getenv("PATH_CACHE_SIZE", "4096"))
+# Maze: single-goal search — astar, jps (Jump Point Search), or hierarchical
+# (region graph, for maps much larger than Smallville)
+PATH_MODE = os.getenv("PATH_MODE", "astar").lower()
+
+# Seed for the personas' random choices (reaction focus, <random> tiles);
+# unset draws a fresh seed each run
+SIM_SEED = int(os.environ["SIM_SEED"]) if os.getenv("SIM_SEED") else None
 
 # Paths
 DATA_DIR = Path(__file__).resolve().parent / "data"
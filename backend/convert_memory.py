@@ -0,0 +1,65 @@
+"""
+Persona Memory Converter
+
+Rewrites legacy associative memory folders (nodes.json / embeddings.json)
+into the binary format (see memory_structures/storage.py).
+
+Usage:
+    python -m backend.convert_memory backend/data/saves/my_run
+    python -m backend.convert_memory backend/data/the_ville --remove-json
+"""
+
+from __future__ import annotations
+
+import time
+import argparse
+from pathlib import Path
+
+from backend.persona.memory_structures.associative_memory import AssociativeMemory
+from backend.persona.memory_structures.storage import (
+    LEGACY_EMBEDDINGS_FILE, LEGACY_NODES_FILE, detect_format)
+
+
+def find_memory_dirs(root: Path) -> list[Path]:
+    """All associative_memory folders under ``root`` (or root itself)."""
+    if root.name == "associative_memory" or detect_format(str(root)):
+        return [root]
+    return sorted(p for p in root.rglob("associative_memory") if p.is_dir())
+
+
+def convert(folder: Path, remove_json: bool = False) -> bool:
+    """Convert one folder in place. Returns False if it was not legacy."""
+    if detect_format(str(folder)) != 1:
+        return False
+    mem = AssociativeMemory(str(folder))
+    mem.save(str(folder))
+    if remove_json:
+        (folder / LEGACY_NODES_FILE).unlink(missing_ok=True)
+        (folder / LEGACY_EMBEDDINGS_FILE).unlink(missing_ok=True)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert legacy persona memory JSON to the binary format")
+    parser.add_argument("paths", nargs="+",
+                        help="Simulation, persona or associative_memory dirs")
+    parser.add_argument("--remove-json", action="store_true",
+                        help="Delete nodes.json/embeddings.json afterwards")
+    args = parser.parse_args()
+
+    converted = skipped = 0
+    start = time.time()
+    for root in args.paths:
+        for folder in find_memory_dirs(Path(root)):
+            if convert(folder, args.remove_json):
+                converted += 1
+                print(f"  converted {folder}")
+            else:
+                skipped += 1
+    print(f"  {converted} converted, {skipped} already current "
+          f"({time.time() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
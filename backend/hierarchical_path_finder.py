@@ -0,0 +1,309 @@
+"""
+Hierarchical (region graph) pathfinding for large maps.
+
+Walkable tiles are grouped into regions: connected tiles that share an
+arena (or, outside arenas, a sector) and a chunk_size x chunk_size block
+of the map, so open streets are split into bounded pieces. Where two
+regions touch, each contiguous stretch of border contributes one doorway
+(two for long stretches). The abstract graph joins doorways across
+borders (cost 1) and within a region (their BFS distance inside it).
+
+A long trip is planned on that graph and each leg refined into tiles by a
+BFS confined to one region; refined legs are cached. Trips that stay in
+one region, or that the graph cannot serve, fall back to plain A*. Paths
+are near-optimal rather than strictly shortest, as with other HPA*
+variants.
+
+HierarchicalPathFinder(maze) is called like path_finder().
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import threading
+import time
+from array import array
+from collections import deque
+
+import numpy as np
+
+from backend.path_finder import MazeLike, nearest_walkable, path_finder
+
+log = logging.getLogger(__name__)
+
+# Border stretches at least this long get a doorway at each end as well
+LONG_BORDER = 8
+
+
+class HierarchicalPathFinder:
+    def __init__(self, maze, chunk_size: int = 32):
+        self.maze = maze
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._version = None
+
+        self.region = array("i")
+        self.n_regions = 0
+        # Doorway tile -> [(other doorway, cost)]
+        self.graph: dict[int, list[tuple[int, int]]] = {}
+        self.doorways: dict[int, list[int]] = {}
+        self._legs: dict[tuple[int, int], list[int]] = {}
+
+    # ----- building -----
+
+    def _ensure_built(self):
+        with self._lock:
+            if self._version != self.maze.collision_version:
+                self._build()
+                self._version = self.maze.collision_version
+
+    def _build(self):
+        t0 = time.perf_counter()
+        grid = self.maze.collision_grid
+        w, h = grid.width, grid.height
+        blocked = grid.blocked
+        size = w * h
+        chunk = self.chunk_size
+
+        # Region label: arena code, else sector code, plus the chunk,
+        # packed into one int per tile
+        arena = np.asarray(self.maze.arena_layer, dtype=np.int64)
+        code = np.where(arena != 0, arena, self.maze.sector_layer)
+        ys, xs = np.indices((h, w))
+        chunks_x, chunks_y = -(-w // chunk), -(-h // chunk)
+        label = ((code * chunks_y + ys // chunk) * chunks_x
+                 + xs // chunk).ravel().tolist()
+
+        region = array("i", [-1]) * size
+        n = 0
+        for seed in range(size):
+            if blocked[seed] or region[seed] >= 0:
+                continue
+            key = label[seed]
+            region[seed] = n
+            stack = [seed]
+            while stack:
+                i = stack.pop()
+                x = i % w
+                for ni, inside in ((i + w, i < size - w), (i - w, i >= w),
+                                   (i + 1, x < w - 1), (i - 1, x > 0)):
+                    if (inside and not blocked[ni] and region[ni] < 0
+                            and label[ni] == key):
+                        region[ni] = n
+                        stack.append(ni)
+            n += 1
+        self.region = region
+        self.n_regions = n
+
+        # Border crossings, grouped into contiguous stretches
+        stretches: dict[tuple, list[tuple[int, int]]] = {}
+        for i in range(size):
+            if blocked[i]:
+                continue
+            x, y = i % w, i // w
+            if x < w - 1 and not blocked[i + 1] and region[i + 1] != region[i]:
+                key = (region[i], region[i + 1], "v", x)
+                stretches.setdefault(key, []).append((y, i, i + 1))
+            if y < h - 1 and not blocked[i + w] and region[i + w] != region[i]:
+                key = (region[i], region[i + w], "h", y)
+                stretches.setdefault(key, []).append((x, i, i + w))
+
+        graph: dict[int, list[tuple[int, int]]] = {}
+        doorways: dict[int, set[int]] = {}
+
+        def add_crossing(a, b):
+            graph.setdefault(a, []).append((b, 1))
+            graph.setdefault(b, []).append((a, 1))
+            doorways.setdefault(region[a], set()).add(a)
+            doorways.setdefault(region[b], set()).add(b)
+
+        for crossings in stretches.values():
+            crossings.sort()
+            run = [crossings[0]]
+            for c in crossings[1:] + [None]:
+                if c is not None and c[0] == run[-1][0] + 1:
+                    run.append(c)
+                    continue
+                picks = {len(run) // 2}
+                if len(run) >= LONG_BORDER:
+                    picks |= {0, len(run) - 1}
+                for k in picks:
+                    add_crossing(run[k][1], run[k][2])
+                run = [c]
+
+        # Doorways of the same region, joined by their distance inside it
+        for r, doors in doorways.items():
+            doors = sorted(doors)
+            for k, a in enumerate(doors[:-1]):
+                others = doors[k + 1:]
+                dist = self._doorway_distances(a, r, others)
+                for b in others:
+                    if b in dist:
+                        graph[a].append((b, dist[b]))
+                        graph[b].append((a, dist[b]))
+
+        self.graph = graph
+        self.doorways = {r: sorted(d) for r, d in doorways.items()}
+        self._legs = {}
+        log.info("Region graph: %d regions, %d doorways (%.0f ms)",
+                 n, len(graph), (time.perf_counter() - t0) * 1000)
+
+    def _doorway_distances(self, src: int, r: int,
+                           targets: list[int]) -> dict[int, int]:
+        """BFS from ``src`` inside region ``r``, stopping once every target
+        is reached. Returns {target: distance}."""
+        grid = self.maze.collision_grid
+        w, size = grid.width, grid.width * grid.height
+        region = self.region
+        _, _, seen, token = grid.buffers()
+        wanted = set(targets)
+        found = {}
+        seen[src] = token
+        frontier = [src]
+        d = 0
+        while frontier and wanted:
+            d += 1
+            next_frontier = []
+            for i in frontier:
+                x = i % w
+                for ni, inside in ((i + w, i < size - w), (i - w, i >= w),
+                                   (i + 1, x < w - 1), (i - 1, x > 0)):
+                    if inside and seen[ni] != token and region[ni] == r:
+                        seen[ni] = token
+                        next_frontier.append(ni)
+                        if ni in wanted:
+                            wanted.discard(ni)
+                            found[ni] = d
+            frontier = next_frontier
+        return found
+
+    def _region_bfs(self, src: int, r: int) -> tuple[dict, dict]:
+        """BFS distances and parents from ``src`` over region ``r``."""
+        grid = self.maze.collision_grid
+        w, size = grid.width, grid.width * grid.height
+        region = self.region
+        dist = {src: 0}
+        parent = {src: -1}
+        queue = deque([src])
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            x = i % w
+            for ni, inside in ((i + w, i < size - w), (i - w, i >= w),
+                               (i + 1, x < w - 1), (i - 1, x > 0)):
+                if inside and region[ni] == r and ni not in dist:
+                    dist[ni] = d
+                    parent[ni] = i
+                    queue.append(ni)
+        return dist, parent
+
+    # ----- queries -----
+
+    def __call__(self, collision_maze: MazeLike,
+                 start: tuple[int, int],
+                 end: tuple[int, int],
+                 collision_block_id: int = 32001) -> list[tuple[int, int]]:
+        """Same contract as path_finder(); the maze must be self.maze's."""
+        grid = self.maze.collision_grid
+        if collision_maze is not grid and \
+                collision_maze is not self.maze.collision_maze:
+            return path_finder(collision_maze, start, end, collision_block_id)
+        if start == end:
+            return [start]
+
+        start = tuple(start)
+        end = nearest_walkable(grid, end)
+        w = grid.width
+        if (start == end or not grid.is_walkable(*start)
+                or not grid.is_walkable(*end)):
+            # Trivial, or a blocked start/goal: plain A* handles these
+            return path_finder(grid, start, end, collision_block_id)
+        labels = grid.components()
+        si = start[1] * w + start[0]
+        ti = end[1] * w + end[0]
+        if labels[si] != labels[ti]:
+            return []
+
+        self._ensure_built()
+        rs, rt = self.region[si], self.region[ti]
+        if rs == rt:
+            return path_finder(grid, start, end, collision_block_id)
+
+        nodes = self._plan(si, ti, rs, rt)
+        if nodes is None:
+            return path_finder(grid, start, end, collision_block_id)
+        return [(i % w, i // w) for i in nodes]
+
+    def _plan(self, si: int, ti: int, rs: int, rt: int):
+        """A* over the doorway graph, then refine legs into tiles."""
+        w = self.maze.collision_grid.width
+        start_dist, start_parent = self._region_bfs(si, rs)
+        goal_dist, goal_parent = self._region_bfs(ti, rt)
+        tx, ty = ti % w, ti // w
+
+        def heuristic(i):
+            return abs(i % w - tx) + abs(i // w - ty)
+
+        def neighbours(i):
+            if i == si:
+                for d in self.doorways.get(rs, ()):
+                    if d in start_dist:
+                        yield d, start_dist[d]
+            for edge in self.graph.get(i, ()):
+                yield edge
+            if self.region[i] == rt and i in goal_dist:
+                yield ti, goal_dist[i]
+
+        g = {si: 0}
+        came_from = {}
+        open_set = [(heuristic(si), si)]
+        while open_set:
+            f, i = heapq.heappop(open_set)
+            if i == ti:
+                break
+            if f - heuristic(i) > g[i]:
+                continue
+            for j, cost in neighbours(i):
+                tentative = g[i] + cost
+                if tentative < g.get(j, float("inf")):
+                    g[j] = tentative
+                    came_from[j] = i
+                    heapq.heappush(open_set, (tentative + heuristic(j), j))
+        else:
+            return None
+
+        abstract = [ti]
+        while abstract[-1] != si:
+            abstract.append(came_from[abstract[-1]])
+        abstract.reverse()
+
+        tiles = [si]
+        for a, b in zip(abstract, abstract[1:]):
+            if a == si and self.region[b] == rs:
+                leg = [b]
+                while start_parent[leg[-1]] != -1:
+                    leg.append(start_parent[leg[-1]])
+                leg.reverse()
+            elif b == ti and self.region[a] == rt:
+                leg = [a]
+                while goal_parent[leg[-1]] != -1:
+                    leg.append(goal_parent[leg[-1]])
+            elif self.region[a] != self.region[b]:
+                leg = [a, b]
+            else:
+                leg = self._leg(a, b)
+            tiles.extend(leg[1:])
+        return tiles
+
+    def _leg(self, a: int, b: int) -> list[int]:
+        """Tiles from doorway a to doorway b inside their region (cached)."""
+        leg = self._legs.get((a, b))
+        if leg is None:
+            _, parent = self._region_bfs(a, self.region[a])
+            leg = [b]
+            while parent[leg[-1]] != -1:
+                leg.append(parent[leg[-1]])
+            leg.reverse()
+            self._legs[(a, b)] = leg
+        return leg
@@ -3,28 +3,84 @@
 from __future__ import annotations
 
 import logging
+import threading
+from collections import OrderedDict
 from typing import Optional
 
 import numpy as np
 
+from backend.config import EMBEDDING_CACHE_SIZE
+
 log = logging.getLogger(__name__)
 
 _model = None
+_model_lock = threading.Lock()
+
+# text -> embedding, most recently used last
+_cache: OrderedDict[str, list[float]] = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_hits = 0
+_cache_misses = 0
 
 
 def _get_model():
     global _model
     if _model is None:
-        from sentence_transformers import SentenceTransformer
-        from backend.config import EMBEDDING_MODEL_NAME
-        _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
-        log.info("Loaded embedding model: %s", EMBEDDING_MODEL_NAME)
+        # Personas may think on several threads; load the model only once.
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                from backend.config import EMBEDDING_MODEL_NAME
+                _model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+                log.info("Loaded embedding model: %s", EMBEDDING_MODEL_NAME)
     return _model
 
 
+def _cache_get(text: str) -> Optional[list[float]]:
+    global _cache_hits, _cache_misses
+    with _cache_lock:
+        emb = _cache.get(text)
+        if emb is None:
+            _cache_misses += 1
+            return None
+        _cache.move_to_end(text)
+        _cache_hits += 1
+        return list(emb)
+
+
+def _cache_put(text: str, emb: list[float]):
+    with _cache_lock:
+        _cache[text] = emb
+        _cache.move_to_end(text)
+        while len(_cache) > EMBEDDING_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
 def get_embedding(text: str) -> list[float]:
-    model = _get_model()
-    return model.encode(text).tolist()
+    return get_embeddings([text])[0]
+
+
+def get_embeddings(texts: list[str]) -> list[list[float]]:
+    """Embed many strings, encoding every cache miss in one forward pass."""
+    result: list[Optional[list[float]]] = [_cache_get(t) for t in texts]
+
+    # Deduplicate misses while keeping first-seen order
+    missing = list(dict.fromkeys(
+        t for t, emb in zip(texts, result) if emb is None))
+    if missing:
+        encoded = _get_model().encode(missing)
+        fresh = {t: vec.tolist() for t, vec in zip(missing, encoded)}
+        for t, emb in fresh.items():
+            _cache_put(t, emb)
+        result = [emb if emb is not None else list(fresh[t])
+                  for t, emb in zip(texts, result)]
+    return result
+
+
+def embedding_cache_stats() -> dict:
+    with _cache_lock:
+        return {"hits": _cache_hits, "misses": _cache_misses,
+                "entries": len(_cache)}
 
 
 def cos_sim(a, b) -> float:
@@ -1,18 +1,39 @@
-"""LLM API client — Ollama (or any OpenAI-compatible endpoint)."""
+"""LLM API client — Ollama (or any OpenAI-compatible endpoint).
+
+Requests go through one AsyncOpenAI client that runs on a background
+event loop, sharing a single HTTP connection pool. A global semaphore
+caps in-flight requests at LLM_MAX_PARALLEL (the model server's parallel
+slots, e.g. Ollama's OLLAMA_NUM_PARALLEL), so threads calling
+chat_completion() and coroutines awaiting achat_completion() together
+never oversubscribe the server.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
 import time
-from typing import Optional
+from typing import Any, Awaitable, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
-from backend.config import LLM_API_KEY, LLM_BASE_URL, LLM_MODEL
+from backend.config import (LLM_API_KEY, LLM_BASE_URL, LLM_MODEL,
+                            LLM_CACHE_POLICY, LLM_CACHE_MAX_TEMP,
+                            LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH,
+                            LLM_MAX_PARALLEL)
+from backend.llm.response_cache import ResponseCache, make_key
 
 log = logging.getLogger(__name__)
 
-_client: Optional[OpenAI] = None
+_cache: Optional[ResponseCache] = None
+
+# Background event loop owning the async client and the limiter
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_client: Optional[AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
 
 
 def _strip_think_tags(text: str) -> str:
@@ -21,48 +42,153 @@ def _strip_think_tags(text: str) -> str:
     return re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
 
 
-def _get_client() -> OpenAI:
-    global _client
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-loop",
+                                 daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _get_client() -> AsyncOpenAI:
+    """The shared client; only used on the background loop."""
+    global _client, _semaphore
     if _client is None:
-        _client = OpenAI(api_key=LLM_API_KEY, base_url=LLM_BASE_URL)
-        log.info("LLM client: model=%s base_url=%s", LLM_MODEL, LLM_BASE_URL)
+        limits = httpx.Limits(max_connections=LLM_MAX_PARALLEL,
+                              max_keepalive_connections=LLM_MAX_PARALLEL)
+        _client = AsyncOpenAI(
+            api_key=LLM_API_KEY, base_url=LLM_BASE_URL,
+            http_client=DefaultAsyncHttpxClient(limits=limits))
+        _semaphore = asyncio.Semaphore(LLM_MAX_PARALLEL)
+        log.info("LLM client: model=%s base_url=%s max_parallel=%d",
+                 LLM_MODEL, LLM_BASE_URL, LLM_MAX_PARALLEL)
     return _client
 
 
+def _on_llm_loop(coro: Awaitable) -> Awaitable:
+    """Run ``coro`` on the background loop; awaitable from any loop."""
+    loop = _get_loop()
+    try:
+        if asyncio.get_running_loop() is loop:
+            return coro
+    except RuntimeError:
+        pass
+    return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+def run_async(coro: Awaitable) -> Any:
+    """Run a coroutine on the LLM loop from synchronous code and wait for
+    its result. Cognitive modules use this to await several prompts at
+    once, e.g. run_async(agather(...))."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
+async def agather(*coros: Awaitable) -> list:
+    """asyncio.gather() that keeps exceptions in the result list."""
+    return await asyncio.gather(*coros, return_exceptions=True)
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache(LLM_CACHE_PATH, LLM_CACHE_POLICY,
+                               LLM_CACHE_MAX_TEMP, LLM_CACHE_MAX_ENTRIES)
+    return _cache
+
+
 def ChatGPT_single_request(prompt: str) -> str:
     """Simple single-prompt request (used by plan's revise_identity etc)."""
     return chat_completion([{"role": "user", "content": prompt}])
 
 
+def _cache_key(messages: list[dict[str, str]], model: str,
+               temperature: float, max_tokens: int) -> Optional[str]:
+    """Response cache key, or None if this call is not cached."""
+    if not get_response_cache().enabled_for(temperature):
+        return None
+    return make_key(model, messages, temperature, max_tokens)
+
+
 def chat_completion(
     messages: list[dict[str, str]],
     model: str = LLM_MODEL,
     temperature: float = 0.7,
     max_tokens: int = 1024,
     retries: int = 2,
+    use_cache: bool = True,
 ) -> str:
+    """Blocking form of achat_completion(), for threaded callers. The
+    cache is read and written on the calling thread; only the request
+    itself runs on the LLM loop."""
+    key = _cache_key(messages, model, temperature, max_tokens) \
+        if use_cache else None
+    if key is not None:
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            return cached
+
+    content = run_async(_request(messages, model, temperature, max_tokens,
+                                 retries))
+    if key is not None:
+        get_response_cache().put(key, content)
+    return content
+
+
+async def achat_completion(
+    messages: list[dict[str, str]],
+    model: str = LLM_MODEL,
+    temperature: float = 0.7,
+    max_tokens: int = 1024,
+    retries: int = 2,
+    use_cache: bool = True,
+) -> str:
+    """Chat completion; with use_cache, answered from and stored in the
+    response cache (callers that validate answers pass use_cache=False
+    and store only what passes, see safe_generate_response). SQLite
+    work runs off the event loop."""
+    key = _cache_key(messages, model, temperature, max_tokens) \
+        if use_cache else None
+    if key is not None:
+        cached = await asyncio.to_thread(get_response_cache().get, key)
+        if cached is not None:
+            return cached
+
+    content = await _on_llm_loop(
+        _request(messages, model, temperature, max_tokens, retries))
+    if key is not None:
+        await asyncio.to_thread(get_response_cache().put, key, content)
+    return content
+
+
+async def _request(messages, model, temperature, max_tokens, retries) -> str:
     client = _get_client()
     effective_tokens = max(max_tokens, 512)
     last_err = None
     for attempt in range(retries + 1):
         try:
-            response = client.chat.completions.create(
-                model=model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=effective_tokens,
-            )
+            # Hold a slot only while the request is in flight, not while
+            # backing off
+            async with _semaphore:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=effective_tokens,
+                )
             content = response.choices[0].message.content
             if content is None:
                 raise ValueError("LLM returned None content")
             # Strip thinking model tags (Qwen3 wraps output in <think>...</think>)
-            content = _strip_think_tags(content)
-            return content.strip()
+            return _strip_think_tags(content).strip()
         except Exception as e:
             last_err = e
             log.warning("LLM attempt %d failed: %s", attempt + 1, e)
             if attempt < retries:
-                time.sleep(1 * (attempt + 1))
+                await asyncio.sleep(1 * (attempt + 1))
     raise last_err
 
 
@@ -86,18 +212,59 @@ def safe_generate_response(prompt, gpt_param, retries, fail_safe,
                             validate_fn, cleanup_fn):
     """Generate LLM response with validation, cleanup, and fail-safe.
 
-    Matches the original paper's safe_generate_response pattern.
+    Matches the original paper's safe_generate_response pattern. Only a
+    response that passes validate_fn is cached, and retries go back to
+    the model instead of the cache.
     """
+    messages = [{"role": "user", "content": prompt}]
+    temperature = gpt_param.get("temperature", 0.7)
+    max_tokens = gpt_param.get("max_tokens", 1024)
+    key = _cache_key(messages, LLM_MODEL, temperature, max_tokens)
     for attempt in range(retries):
         try:
-            response = chat_completion(
-                [{"role": "user", "content": prompt}],
-                temperature=gpt_param.get("temperature", 0.7),
-                max_tokens=gpt_param.get("max_tokens", 1024),
-            )
+            response = None
+            if key is not None and attempt == 0:
+                response = get_response_cache().get(key)
+            from_cache = response is not None
+            if not from_cache:
+                response = chat_completion(
+                    messages, temperature=temperature,
+                    max_tokens=max_tokens, use_cache=False)
             if validate_fn(response, prompt):
+                if key is not None and not from_cache:
+                    get_response_cache().put(key, response)
                 return cleanup_fn(response, prompt)
         except Exception as e:
             log.warning("safe_generate attempt %d: %s", attempt + 1, e)
             time.sleep(1)
     return fail_safe
+
+
+async def asafe_generate_response(prompt, gpt_param, retries, fail_safe,
+                                  validate_fn, cleanup_fn):
+    """Async safe_generate_response(); independent prompts can be awaited
+    together (see agather) and still share the global request limit."""
+    messages = [{"role": "user", "content": prompt}]
+    temperature = gpt_param.get("temperature", 0.7)
+    max_tokens = gpt_param.get("max_tokens", 1024)
+    key = _cache_key(messages, LLM_MODEL, temperature, max_tokens)
+    for attempt in range(retries):
+        try:
+            response = None
+            if key is not None and attempt == 0:
+                response = await asyncio.to_thread(
+                    get_response_cache().get, key)
+            from_cache = response is not None
+            if not from_cache:
+                response = await achat_completion(
+                    messages, temperature=temperature,
+                    max_tokens=max_tokens, use_cache=False)
+            if validate_fn(response, prompt):
+                if key is not None and not from_cache:
+                    await asyncio.to_thread(
+                        get_response_cache().put, key, response)
+                return cleanup_fn(response, prompt)
+        except Exception as e:
+            log.warning("safe_generate attempt %d: %s", attempt + 1, e)
+            await asyncio.sleep(1)
+    return fail_safe
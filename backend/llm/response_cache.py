@@ -0,0 +1,157 @@
+"""Persistent, content-addressed cache for LLM chat completions.
+
+Responses are stored in a small SQLite file keyed by a SHA-256 of
+(model, messages, temperature, max_tokens), so re-running or forking a
+simulation from a checkpoint replays identical prompts from disk instead
+of going back to the model server. Least-recently-used entries are evicted
+once the cache grows past ``max_entries``. A hit is a plain read: its
+last_used time is buffered and written with the next put() (or every
+TOUCH_BATCH hits), not committed per lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+log = logging.getLogger(__name__)
+
+POLICIES = ("always", "low_temp", "off")
+
+# Buffered last_used updates written in one transaction
+TOUCH_BATCH = 256
+
+
+def make_key(model: str, messages: list[dict[str, str]],
+             temperature: float, max_tokens: int) -> str:
+    payload = json.dumps(
+        {"model": model, "messages": messages,
+         "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path: Path, policy: str = "low_temp",
+                 max_temp: float = 0.5, max_entries: int = 200000):
+        if policy not in POLICIES:
+            log.warning("Unknown LLM cache policy %r, using 'off'", policy)
+            policy = "off"
+        self.path = Path(path)
+        self.policy = policy
+        self.max_temp = max_temp
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # key -> last_used not yet written
+        self._touched: dict[str, float] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " last_used REAL NOT NULL)")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS responses_last_used"
+                " ON responses(last_used)")
+            conn.commit()
+            self._conn = conn
+            log.info("LLM response cache: %s (policy=%s)",
+                     self.path, self.policy)
+        return self._conn
+
+    def enabled_for(self, temperature: float) -> bool:
+        if self.policy == "always":
+            return True
+        if self.policy == "low_temp":
+            return temperature <= self.max_temp
+        return False
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response FROM responses WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH:
+                self._write_touches(conn)
+                conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def _write_touches(self, conn: sqlite3.Connection):
+        if self._touched:
+            conn.executemany(
+                "UPDATE responses SET last_used = ? WHERE key = ?",
+                [(t, k) for k, t in self._touched.items()])
+            self._touched = {}
+
+    def flush(self):
+        """Write buffered last_used times."""
+        with self._lock:
+            if self._conn is not None and self._touched:
+                self._write_touches(self._conn)
+                self._conn.commit()
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            conn = self._connect()
+            self._touched.pop(key, None)
+            self._write_touches(conn)
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, last_used)"
+                " VALUES (?, ?, ?)", (key, response, time.time()))
+            count = conn.execute(
+                "SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                # Evict the least recently used overflow in one statement
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses"
+                    " ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,))
+            conn.commit()
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._touched = {}
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = 0
+            if self._conn is not None:
+                entries = self._conn.execute(
+                    "SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "policy": self.policy,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
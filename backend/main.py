@@ -12,9 +12,10 @@ import json
 import logging
 import traceback
 import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Query, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -22,6 +23,10 @@ from pydantic import BaseModel
 
 from backend.world_engine import WorldEngine
 from backend.config import DATA_DIR
+from backend.persona.cognitive_modules.decomp_prefetch import (
+    shutdown_decomp_prefetcher)
+from backend.recorder import (
+    INDEX_FILE, LEGACY_FILE, LOG_FILE, ReplayReader, load_movements)
 
 # Setup logging to both console and file
 _log_dir = Path(__file__).resolve().parent.parent / "logs"
@@ -39,7 +44,16 @@ logging.basicConfig(
 log = logging.getLogger(__name__)
 log.info("Log file: %s", _log_file)
 
-app = FastAPI(title="Generative Agents Simulation", version="0.2.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Decomposition prefetch threads would otherwise hold up the exit
+    shutdown_decomp_prefetcher()
+
+
+app = FastAPI(title="Generative Agents Simulation", version="0.2.0",
+              lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -234,10 +248,55 @@ async def get_replay_meta(name: str):
 @app.get("/api/replay/{name}/movements")
 async def get_replay_movements(name: str):
     """Get all movement data for replay."""
-    path = DATA_DIR / "saves" / name / "master_movement.json"
-    if not path.exists():
+    movements = load_movements(DATA_DIR / "saves" / name)
+    if not movements:
         return {"error": f"Replay '{name}' movements not found"}
-    return json.load(open(path, encoding="utf-8"))
+    return movements
+
+
+# Longest span one /range request may cover
+MAX_RANGE_STEPS = 1000
+
+_readers: dict[str, tuple[tuple, ReplayReader]] = {}
+
+
+def _replay_reader(name: str) -> ReplayReader | None:
+    """Cached reader for a save, reopened when its files change."""
+    save_dir = DATA_DIR / "saves" / name
+    stamp = tuple(
+        (p.stat().st_size, p.stat().st_mtime_ns) if p.exists() else None
+        for p in (save_dir / INDEX_FILE, save_dir / LOG_FILE,
+                  save_dir / LEGACY_FILE))
+    if not any(stamp):
+        return None
+    cached = _readers.get(name)
+    if cached is None or cached[0] != stamp:
+        cached = (stamp, ReplayReader(save_dir))
+        _readers[name] = cached
+    return cached[1]
+
+
+@app.get("/api/replay/{name}/state")
+async def get_replay_state(name: str, step: int):
+    """Full persona state at one step, rebuilt from the nearest keyframe,
+    and how many steps are recorded (meta.json only has that as of the
+    last checkpoint)."""
+    reader = _replay_reader(name)
+    if reader is None:
+        return {"error": f"Replay '{name}' movements not found"}
+    return {"step": step, "movements": reader.state(step) or {},
+            "total_steps": len(reader)}
+
+
+@app.get("/api/replay/{name}/range")
+async def get_replay_range(name: str, start: int = Query(alias="from"),
+                           to: int = Query()):
+    """Full movements for steps from..to (inclusive), like /movements."""
+    reader = _replay_reader(name)
+    if reader is None:
+        return {"error": f"Replay '{name}' movements not found"}
+    to = min(to, start + MAX_RANGE_STEPS - 1)
+    return reader.range(start, to)
 
 
 # ---------- WebSocket ----------
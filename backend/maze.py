@@ -8,15 +8,38 @@ CSV matrix format (collision, sector, arena, game_object, spawning layers).
 from __future__ import annotations
 
 import csv
+import hashlib
 import json
 import logging
+import os
+import threading
+import warnings
+import zipfile
+from collections import OrderedDict, deque
+from functools import cached_property, partial
 from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from backend.hierarchical_path_finder import HierarchicalPathFinder
+from backend.path_finder import (
+    CollisionGrid, nearest_walkable, path_finder, path_finder_multi)
 
 log = logging.getLogger(__name__)
 
+# Layer CSVs under matrix/maze/, in the order they are stored in the cache
+MAZE_LAYERS = ("collision", "sector", "arena", "game_object",
+               "spawning_location")
+# Bump when the cache layout changes, so stale files are not reused
+CACHE_FORMAT = 2
+
 
 class Maze:
-    def __init__(self, maze_name: str, data_dir: Path):
+    def __init__(self, maze_name: str, data_dir: Path,
+                 field_cache_size: int = 512, warm_fields: bool = False,
+                 path_cache_size: int = 4096, path_mode: str = "astar",
+                 use_cache: bool = True):
         self.maze_name = maze_name
 
         matrix_dir = data_dir / "the_ville" / "matrix"
@@ -30,37 +53,89 @@ class Maze:
 
         # Load special blocks mappings (color_code -> address path)
         sb_dir = matrix_dir / "special_blocks"
-        self.sector_blocks = self._load_special_blocks(
-            sb_dir / "sector_blocks.csv")
-        self.arena_blocks = self._load_special_blocks(
-            sb_dir / "arena_blocks.csv")
-        self.game_object_blocks = self._load_special_blocks(
-            sb_dir / "game_object_blocks.csv")
-        self.spawning_blocks = self._load_special_blocks(
-            sb_dir / "spawning_location_blocks.csv")
-        self.world_blocks = self._load_special_blocks(
-            sb_dir / "world_blocks.csv")
-
-        # Load maze layers (flattened CSV -> 2D arrays)
+        sb_paths = [sb_dir / f"{name}_blocks.csv" for name in
+                    ("sector", "arena", "game_object", "spawning_location",
+                     "world")]
+        (self.sector_blocks, self.arena_blocks, self.game_object_blocks,
+         self.spawning_blocks, self.world_blocks) = [
+            self._load_special_blocks(path) for path in sb_paths]
+
+        # Parsed layers and resolved tile names come from a binary cache
+        # keyed by the source files' hash; a miss parses the CSVs and
+        # writes the cache for the next load.
         maze_dir = matrix_dir / "maze"
-        self.collision_maze = self._load_maze_csv(
-            maze_dir / "collision_maze.csv")
-        self.sector_maze = self._load_maze_csv(
-            maze_dir / "sector_maze.csv")
-        self.arena_maze = self._load_maze_csv(
-            maze_dir / "arena_maze.csv")
-        self.game_object_maze = self._load_maze_csv(
-            maze_dir / "game_object_maze.csv")
-        self.spawning_maze = self._load_maze_csv(
-            maze_dir / "spawning_location_maze.csv")
-
-        # Build tile info cache and address_tiles mapping
-        self.tiles: list[list[dict]] = []
+        layer_paths = [maze_dir / f"{name}_maze.csv" for name in MAZE_LAYERS]
+        cache_path = None
+        if use_cache:
+            cache_path = self._cache_path(
+                data_dir, [meta_path, *sb_paths, *layer_paths])
+        parsed = self._load_cache(cache_path)
+        if parsed is None:
+            parsed = self._parse(layer_paths)
+            self._save_cache(cache_path, parsed)
+
+        # Raw layer codes as [y][x] int32 arrays (the nested-list *_maze
+        # attributes are built from them only when something asks)
+        (self.collision_layer, self.sector_layer, self.arena_layer,
+         self.game_object_layer, self.spawning_layer) = parsed["layers"]
+
+        # Flat bytearray view of the collision layer for path finding.
+        # collision_version is bumped on every change so cached paths and
+        # distance fields computed against an older grid are dropped.
+        self.collision_grid = CollisionGrid(
+            bytearray((self.collision_layer != 0).astype(np.uint8).tobytes()),
+            self.maze_width, self.maze_height)
+        self.collision_version = 0
+        # Single-goal search behind find_path: "astar", "jps" (Jump Point
+        # Search) or "hierarchical" (region graph, for large maps; built on
+        # first use)
+        if path_mode == "hierarchical":
+            self._path_finder = HierarchicalPathFinder(self)
+        elif path_mode == "jps":
+            self._path_finder = partial(path_finder, method="jps")
+        else:
+            self._path_finder = path_finder
+
+        # Interned addresses: [y][x] int32 id grids into lookup tables
+        self.arena_grid: np.ndarray = parsed["arena_ids"]
+        self.sector_grid: np.ndarray = parsed["sector_ids"]
+        self.object_grid: np.ndarray = parsed["object_ids"]
+        self.arena_names: list[tuple[str, str, str]] = []
+        self.arena_paths: list[str] = []
+        self.sector_paths: list[str] = []
+        self.object_names: list[str] = []
         self.address_tiles: dict[str, set[tuple[int, int]]] = {}
-        self._build_tile_info()
+        self._build_tile_info(parsed)
+
+        # Events only for tiles that hold any: (x, y) -> {(s, p, o, desc)},
+        # and arena id -> those tiles, so perceive visits only them
+        self.events: dict[tuple[int, int], set[tuple]] = {}
+        self.arena_event_tiles: dict[int, set[tuple[int, int]]] = {}
+        # Personas standing on each tile, kept by WorldEngine's placement
+        self.occupancy = np.zeros((self.maze_height, self.maze_width),
+                                  dtype=np.int16)
+
+        # BFS distance fields per address, least recently used evicted first
+        self.field_cache_size = field_cache_size
+        self._fields: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._fields_lock = threading.Lock()
+        self._fields_version = 0
+
+        # (start, goal) -> path, least recently used evicted first
+        self.path_cache_size = path_cache_size
+        self._paths: OrderedDict[tuple, tuple] = OrderedDict()
+        # goal -> keys of cached paths ending there, for suffix reuse
+        self._paths_by_goal: dict[tuple, list[tuple]] = {}
+        self._paths_lock = threading.Lock()
+        self._paths_version = 0
+        self.path_hits = 0
+        self.path_suffix_hits = 0
+        self.path_misses = 0
 
         log.info("Loaded maze '%s' (%dx%d)", maze_name,
                  self.maze_width, self.maze_height)
+        if warm_fields:
+            self.warm_distance_fields()
 
     def _load_special_blocks(self, csv_path: Path) -> dict[int, list[str]]:
         """Load special blocks CSV: color_code, world, [sector], [arena], ..."""
@@ -80,15 +155,23 @@ class Maze:
                     continue
         return mapping
 
-    def _load_maze_csv(self, csv_path: Path) -> list[list[int]]:
-        """Load a maze CSV (single row of width*height values) into 2D array."""
+    def _load_maze_csv(self, csv_path: Path) -> np.ndarray:
+        """Load a maze CSV (single row of width*height values) into a
+        [y][x] int32 array. Missing rows are zero-filled."""
+        w, h = self.maze_width, self.maze_height
+        grid = np.zeros(w * h, dtype=np.int32)
         if not csv_path.exists():
-            return [[0] * self.maze_width for _ in range(self.maze_height)]
+            return grid.reshape(h, w)
 
-        with open(csv_path, "r") as f:
-            reader = csv.reader(f)
+        text = csv_path.read_text()
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                flat = np.fromstring(text, dtype=np.int64, sep=",")
+        except (DeprecationWarning, ValueError):
+            # Odd formatting or non-numeric values: parse value by value
             flat = []
-            for row in reader:
+            for row in csv.reader(text.splitlines()):
                 for val in row:
                     val = val.strip()
                     if val:
@@ -96,92 +179,209 @@ class Maze:
                             flat.append(int(val))
                         except ValueError:
                             flat.append(0)
+            flat = np.array(flat, dtype=np.int64)
+
+        n = min(len(flat) // w * w, w * h)
+        grid[:n] = flat[:n]
+        return grid.reshape(h, w)
+
+    def _parse(self, layer_paths: list[Path]) -> dict:
+        """Parse the layer CSVs and resolve every tile's address names.
+
+        Names are stored once in a table and tiles refer to them by index
+        (0 is ""), so the result is plain arrays that fit in the cache.
+        """
+        layers = np.stack([self._load_maze_csv(p) for p in layer_paths])
+        names = [""]
+        index = {"": 0}
+
+        def name_id(name):
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+            return index[name]
+
+        def lookup(codes, blocks, part):
+            """Per-tile name ids for one part of each code's block row."""
+            uniq, inverse = np.unique(codes, return_inverse=True)
+            ids = np.zeros(len(uniq), dtype=np.int32)
+            for k, code in enumerate(uniq.tolist()):
+                parts = blocks.get(code)
+                if parts and -len(parts) <= part < len(parts):
+                    ids[k] = name_id(parts[part])
+            return ids[inverse].reshape(codes.shape)
+
+        _, sector_codes, arena_codes, object_codes, _ = layers
+        # World and sector come from the sector layer, else the arena layer
+        world = lookup(sector_codes, self.sector_blocks, 0)
+        world = np.where(world != 0, world,
+                         lookup(arena_codes, self.arena_blocks, 0))
+        sector = lookup(sector_codes, self.sector_blocks, 1)
+        sector = np.where(sector != 0, sector,
+                          lookup(arena_codes, self.arena_blocks, 1))
+        arena = lookup(arena_codes, self.arena_blocks, 2)
+        game_object = lookup(object_codes, self.game_object_blocks, -1)
 
-        # Reshape to 2D: [y][x]
-        grid = []
-        for y in range(self.maze_height):
-            row_start = y * self.maze_width
-            row_end = row_start + self.maze_width
-            if row_end <= len(flat):
-                grid.append(flat[row_start:row_end])
-            else:
-                grid.append([0] * self.maze_width)
-        return grid
-
-    def _build_tile_info(self):
-        """Build per-tile info and address_tiles mapping."""
-        self.tiles = []
-        for y in range(self.maze_height):
-            row = []
-            for x in range(self.maze_width):
-                world = ""
-                sector = ""
-                arena = ""
-                game_object = ""
-
-                # Resolve world
-                s_code = self.sector_maze[y][x]
-                if s_code in self.sector_blocks:
-                    parts = self.sector_blocks[s_code]
-                    world = parts[0] if len(parts) > 0 else ""
-                    sector = parts[1] if len(parts) > 1 else ""
-
-                # Resolve arena
-                a_code = self.arena_maze[y][x]
-                if a_code in self.arena_blocks:
-                    parts = self.arena_blocks[a_code]
-                    if not world and len(parts) > 0:
-                        world = parts[0]
-                    if not sector and len(parts) > 1:
-                        sector = parts[1]
-                    arena = parts[2] if len(parts) > 2 else ""
-
-                # Resolve game object
-                go_code = self.game_object_maze[y][x]
-                if go_code in self.game_object_blocks:
-                    parts = self.game_object_blocks[go_code]
-                    game_object = parts[-1] if parts else ""
-
-                tile = {
-                    "world": world,
-                    "sector": sector,
-                    "arena": arena,
-                    "game_object": game_object,
-                    "events": set(),
-                    "x": x,
-                    "y": y,
-                }
-                row.append(tile)
-
-                # Build address_tiles
-                if world and sector and arena:
-                    if game_object:
-                        addr = f"{world}:{sector}:{arena}:{game_object}"
-                        self.address_tiles.setdefault(addr, set()).add((x, y))
-                    addr3 = f"{world}:{sector}:{arena}"
-                    self.address_tiles.setdefault(addr3, set()).add((x, y))
-
-            self.tiles.append(row)
+        # Intern (world, sector, arena) and (world, sector) per tile.
+        # Object ids index a table whose entry 0 is "".
+        shape = world.shape
+        arena_parts, arena_ids = np.unique(
+            np.stack([world, sector, arena], axis=-1).reshape(-1, 3),
+            axis=0, return_inverse=True)
+        sector_parts, sector_ids = np.unique(
+            np.stack([world, sector], axis=-1).reshape(-1, 2),
+            axis=0, return_inverse=True)
+        object_parts, object_ids = np.unique(
+            np.concatenate([[0], game_object.ravel()]), return_inverse=True)
+
+        # Address -> tiles, in the order the tiles are scanned
+        address_tiles: dict[str, list[tuple[int, int]]] = {}
+        ys, xs = np.nonzero((world != 0) & (sector != 0) & (arena != 0))
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            addr3 = (f"{names[world[y, x]]}:{names[sector[y, x]]}:"
+                     f"{names[arena[y, x]]}")
+            if game_object[y, x]:
+                address_tiles.setdefault(
+                    f"{addr3}:{names[game_object[y, x]]}", []).append((x, y))
+            address_tiles.setdefault(addr3, []).append((x, y))
+
+        offsets = np.cumsum([0] + [len(t) for t in address_tiles.values()])
+        xy = [t for tiles in address_tiles.values() for t in tiles]
+        return {
+            "layers": layers,
+            "names": np.array(names, dtype=str),
+            "arena_parts": arena_parts.astype(np.int32),
+            "arena_ids": arena_ids.reshape(shape).astype(np.int32),
+            "sector_parts": sector_parts.astype(np.int32),
+            "sector_ids": sector_ids.reshape(shape).astype(np.int32),
+            "object_parts": object_parts.astype(np.int32),
+            "object_ids": object_ids[1:].reshape(shape).astype(np.int32),
+            "addresses": np.array(list(address_tiles), dtype=str),
+            "address_offsets": offsets.astype(np.int64),
+            "address_xy": np.array(xy, dtype=np.int32).reshape(-1, 2),
+        }
+
+    # ----- binary cache -----
+
+    def _cache_path(self, data_dir: Path, sources: list[Path]) -> Path:
+        digest = hashlib.sha1(str(CACHE_FORMAT).encode())
+        for path in sources:
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes() if path.exists() else b"-")
+        return (data_dir / "cache" /
+                f"maze_{self.maze_name}_{digest.hexdigest()[:16]}.npz")
+
+    def _load_cache(self, cache_path: Optional[Path]) -> Optional[dict]:
+        if cache_path is None or not cache_path.exists():
+            return None
+        try:
+            with np.load(cache_path, allow_pickle=False) as data:
+                return {key: data[key] for key in data.files}
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            log.warning("Ignoring unreadable maze cache %s: %s",
+                        cache_path, e)
+            return None
+
+    def _save_cache(self, cache_path: Optional[Path], parsed: dict):
+        if cache_path is None:
+            return
+        tmp = cache_path.with_suffix(".tmp.npz")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(tmp, **parsed)
+            os.replace(tmp, cache_path)
+        except OSError as e:
+            log.warning("Could not write maze cache %s: %s", cache_path, e)
+
+    def _build_tile_info(self, parsed: dict):
+        """Build the id lookup tables and address_tiles mapping."""
+        names = parsed["names"].tolist()
+        self.arena_names = [(names[w], names[s], names[a])
+                            for w, s, a in parsed["arena_parts"].tolist()]
+        self.arena_paths = [":".join(parts) for parts in self.arena_names]
+        self.sector_paths = [f"{names[w]}:{names[s]}"
+                             for w, s in parsed["sector_parts"].tolist()]
+        self.object_names = [names[o]
+                             for o in parsed["object_parts"].tolist()]
+
+        offsets = parsed["address_offsets"].tolist()
+        xy = parsed["address_xy"].tolist()
+        self.address_tiles = {
+            addr: set(map(tuple, xy[offsets[k]:offsets[k + 1]]))
+            for k, addr in enumerate(parsed["addresses"].tolist())}
 
     def access_tile(self, tile: tuple[int, int]) -> dict:
-        """Get tile info at (x, y)."""
+        """Get tile info at (x, y).
+
+        Compatibility view built from the id grids; "events" is a copy, so
+        change events through the *_event_from_tile methods.
+        """
         x, y = tile
         if 0 <= y < self.maze_height and 0 <= x < self.maze_width:
-            return self.tiles[y][x]
+            world, sector, arena = self.arena_names[self.arena_grid[y, x]]
+            return {"world": world, "sector": sector, "arena": arena,
+                    "game_object": self.object_names[self.object_grid[y, x]],
+                    "events": set(self.events.get((x, y), ())),
+                    "x": x, "y": y}
         return {"world": "", "sector": "", "arena": "",
                 "game_object": "", "events": set()}
 
+    def arena_id(self, tile: tuple[int, int]) -> int:
+        """Interned world:sector:arena id of a tile (-1 off the map).
+        Tiles in the same arena have equal ids."""
+        x, y = tile
+        if 0 <= y < self.maze_height and 0 <= x < self.maze_width:
+            return int(self.arena_grid[y, x])
+        return -1
+
+    def tile_events(self, tile: tuple[int, int]):
+        """Events on a tile (read-only; empty for most tiles)."""
+        return self.events.get(tuple(tile), ())
+
+    def events_in_view(self, center: tuple[int, int], radius: int
+                       ) -> list[tuple[tuple[int, int], set[tuple]]]:
+        """(tile, events) for the event-bearing tiles of center's arena
+        within the get_nearby_tiles() square, in row-major order.
+
+        Only the arena's indexed tiles are visited, so the cost follows
+        the number of events there rather than the vision area.
+        """
+        tiles = self.arena_event_tiles.get(self.arena_id(center))
+        if not tiles:
+            return []
+        cx, cy = center
+        near = [t for t in tiles
+                if abs(t[0] - cx) <= radius and abs(t[1] - cy) <= radius]
+        near.sort(key=lambda t: (t[1], t[0]))
+        return [(t, self.events[t]) for t in near]
+
     def get_tile_path(self, tile: tuple[int, int], level: str) -> str:
         """Get the address path at a given level (world/sector/arena)."""
-        info = self.access_tile(tile)
+        x, y = tile
+        if not (0 <= y < self.maze_height and 0 <= x < self.maze_width):
+            return {"world": "", "sector": ":", "arena": "::"}.get(level, "")
         if level == "world":
-            return info["world"]
+            return self.arena_names[self.arena_grid[y, x]][0]
         elif level == "sector":
-            return f"{info['world']}:{info['sector']}"
+            return self.sector_paths[self.sector_grid[y, x]]
         elif level == "arena":
-            return f"{info['world']}:{info['sector']}:{info['arena']}"
+            return self.arena_paths[self.arena_grid[y, x]]
         return ""
 
+    def nearby_addresses(self, center: tuple[int, int], radius: int
+                         ) -> list[tuple[str, str, str, str]]:
+        """Distinct (world, sector, arena, game_object) names of the tiles
+        get_nearby_tiles() would return, in the order first seen."""
+        cx, cy = center
+        x0, x1 = max(cx - radius, 0), min(cx + radius + 1, self.maze_width)
+        y0, y1 = max(cy - radius, 0), min(cy + radius + 1, self.maze_height)
+        if x0 >= x1 or y0 >= y1:
+            return []
+        pairs = zip(self.arena_grid[y0:y1, x0:x1].ravel().tolist(),
+                    self.object_grid[y0:y1, x0:x1].ravel().tolist())
+        return [(*self.arena_names[a], self.object_names[o])
+                for a, o in dict.fromkeys(pairs)]
+
     def get_nearby_tiles(self, center: tuple[int, int],
                          radius: int) -> list[tuple[int, int]]:
         """Get all tiles within Manhattan distance radius."""
@@ -196,24 +396,296 @@ class Maze:
 
     def add_event_from_tile(self, event: tuple, tile: tuple[int, int]):
         """Add an event to a tile. Event format: (s, p, o, desc)."""
-        info = self.access_tile(tile)
-        info["events"].add(event)
+        x, y = tile
+        if 0 <= y < self.maze_height and 0 <= x < self.maze_width:
+            events = self.events.get((x, y))
+            if events is None:
+                events = self.events[(x, y)] = set()
+                self.arena_event_tiles.setdefault(
+                    int(self.arena_grid[y, x]), set()).add((x, y))
+            events.add(event)
+
+    def _drop_if_empty(self, tile: tuple[int, int]):
+        if self.events.get(tile) == set():
+            del self.events[tile]
+            arena = int(self.arena_grid[tile[1], tile[0]])
+            tiles = self.arena_event_tiles[arena]
+            tiles.discard(tile)
+            if not tiles:
+                del self.arena_event_tiles[arena]
 
     def remove_event_from_tile(self, event: tuple, tile: tuple[int, int]):
         """Remove an event from a tile."""
-        info = self.access_tile(tile)
-        info["events"].discard(event)
+        tile = tuple(tile)
+        events = self.events.get(tile)
+        if events is not None:
+            events.discard(event)
+            self._drop_if_empty(tile)
 
     def remove_subject_events_from_tile(self, subject: str,
                                          tile: tuple[int, int]):
         """Remove all events with the given subject from a tile."""
-        info = self.access_tile(tile)
-        to_remove = {ev for ev in info["events"] if ev[0] == subject}
-        info["events"] -= to_remove
+        tile = tuple(tile)
+        events = self.events.get(tile)
+        if events is not None:
+            events -= {ev for ev in events if ev[0] == subject}
+            self._drop_if_empty(tile)
 
     def turn_event_from_tile_idle(self, event: tuple, tile: tuple[int, int]):
         """Reset an object event to idle (None predicates)."""
-        info = self.access_tile(tile)
-        info["events"].discard(event)
+        self.remove_event_from_tile(event, tile)
         blank = (event[0], None, None, None)
-        info["events"].add(blank)
+        self.add_event_from_tile(blank, tile)
+
+    # ----- legacy nested-list layers -----
+    # [y][x] lists as the original Maze exposed them, built on first access
+    # and kept in step by set_collision(). New code reads the *_layer arrays.
+
+    @cached_property
+    def collision_maze(self) -> list[list[int]]:
+        return self.collision_layer.tolist()
+
+    @cached_property
+    def sector_maze(self) -> list[list[int]]:
+        return self.sector_layer.tolist()
+
+    @cached_property
+    def arena_maze(self) -> list[list[int]]:
+        return self.arena_layer.tolist()
+
+    @cached_property
+    def game_object_maze(self) -> list[list[int]]:
+        return self.game_object_layer.tolist()
+
+    @cached_property
+    def spawning_maze(self) -> list[list[int]]:
+        return self.spawning_layer.tolist()
+
+    # ----- occupancy -----
+
+    def move_occupant(self, old: Optional[tuple[int, int]],
+                      new: Optional[tuple[int, int]]):
+        """Move one persona between tiles (None for off the map)."""
+        for tile, delta in ((old, -1), (new, 1)):
+            if tile is not None:
+                x, y = tile
+                if 0 <= y < self.maze_height and 0 <= x < self.maze_width:
+                    self.occupancy[y, x] += delta
+
+    def is_occupied(self, tile: tuple[int, int]) -> bool:
+        x, y = tile
+        if 0 <= y < self.maze_height and 0 <= x < self.maze_width:
+            return self.occupancy[y, x] > 0
+        return False
+
+    # ----- collision changes -----
+
+    def set_collision(self, tile: tuple[int, int], blocked: bool,
+                      collision_block_id: int = 32001):
+        """Block or clear a tile. Bumps collision_version, which drops every
+        cached path and distance field on their next use."""
+        x, y = tile
+        if not (0 <= y < self.maze_height and 0 <= x < self.maze_width):
+            return
+        if bool(self.collision_layer[y, x]) == blocked:
+            return
+        code = collision_block_id if blocked else 0
+        self.collision_layer[y, x] = code
+        if "collision_maze" in self.__dict__:
+            self.collision_maze[y][x] = code
+        self.collision_grid.set_blocked(x, y, blocked)
+        self.collision_version += 1
+
+    # ----- path cache -----
+
+    def find_path(self, start: tuple[int, int],
+                  end: tuple[int, int]) -> list[tuple[int, int]]:
+        """path_finder() (or the hierarchical finder) through the
+        (start, goal) path cache."""
+        start, end = tuple(start), tuple(end)
+        return self._cached_path(
+            (start, end), end,
+            lambda: self._path_finder(self.collision_grid, start, end))
+
+    def find_path_multi(self, start: tuple[int, int],
+                        targets) -> list[tuple[int, int]]:
+        """path_finder_multi() through the path cache, keyed by the target
+        set. Suffix reuse does not apply (the goal depends on the start)."""
+        start = tuple(start)
+        goal = frozenset(tuple(t) for t in targets)
+        return self._cached_path(
+            (start, goal), None,
+            lambda: path_finder_multi(self.collision_grid, start, targets))
+
+    def _cached_path(self, key: tuple, goal, search) -> list[tuple[int, int]]:
+        start = key[0]
+        with self._paths_lock:
+            if self._paths_version != self.collision_version:
+                self._paths.clear()
+                self._paths_by_goal.clear()
+                self._paths_version = self.collision_version
+            path = self._paths.get(key)
+            if path is not None:
+                self._paths.move_to_end(key)
+                self.path_hits += 1
+                return list(path)
+            # Any suffix of a shortest path is itself a shortest path
+            for other in self._paths_by_goal.get(goal, ()) if goal else ():
+                cached = self._paths.get(other)
+                if cached and start in cached:
+                    self.path_suffix_hits += 1
+                    path = cached[cached.index(start):]
+                    self._store_path(key, goal, path)
+                    return list(path)
+            self.path_misses += 1
+            version = self.collision_version
+
+        path = tuple(search())
+        with self._paths_lock:
+            if version == self.collision_version:
+                self._store_path(key, goal, path)
+        return list(path)
+
+    def _store_path(self, key: tuple, goal, path: tuple):
+        self._paths[key] = path
+        self._paths.move_to_end(key)
+        if goal:
+            keys = self._paths_by_goal.setdefault(goal, [])
+            if key not in keys:
+                keys.append(key)
+                # Only the most recent few trips to a goal are scanned
+                del keys[:-8]
+        while len(self._paths) > self.path_cache_size:
+            old_key, _ = self._paths.popitem(last=False)
+            keys = self._paths_by_goal.get(old_key[1])
+            if keys and old_key in keys:
+                keys.remove(old_key)
+                if not keys:
+                    del self._paths_by_goal[old_key[1]]
+
+    def path_cache_stats(self) -> dict:
+        lookups = self.path_hits + self.path_suffix_hits + self.path_misses
+        return {
+            "hits": self.path_hits,
+            "suffix_hits": self.path_suffix_hits,
+            "misses": self.path_misses,
+            "hit_rate": ((self.path_hits + self.path_suffix_hits) / lookups
+                         if lookups else 0.0),
+            "entries": len(self._paths),
+        }
+
+    # ----- distance fields -----
+
+    def _bfs(self, sources) -> np.ndarray:
+        """Multi-source BFS over walkable tiles; -1 where unreachable."""
+        w, h = self.maze_width, self.maze_height
+        blocked = self.collision_grid.blocked
+        dist = [-1] * (w * h)
+        queue = deque()
+        for x, y in sources:
+            i = y * w + x
+            if 0 <= x < w and 0 <= y < h and dist[i] < 0:
+                dist[i] = 0
+                queue.append(i)
+        last_row = w * (h - 1)
+        while queue:
+            i = queue.popleft()
+            d = dist[i] + 1
+            x = i % w
+            if x > 0 and not blocked[i - 1] and dist[i - 1] < 0:
+                dist[i - 1] = d
+                queue.append(i - 1)
+            if x < w - 1 and not blocked[i + 1] and dist[i + 1] < 0:
+                dist[i + 1] = d
+                queue.append(i + 1)
+            if i >= w and not blocked[i - w] and dist[i - w] < 0:
+                dist[i - w] = d
+                queue.append(i - w)
+            if i < last_row and not blocked[i + w] and dist[i + w] < 0:
+                dist[i + w] = d
+                queue.append(i + w)
+        return np.array(dist, dtype=np.int32).reshape(h, w)
+
+    def distance_field(self, address: str) -> Optional[np.ndarray]:
+        """Steps from every tile to the nearest tile of ``address``.
+
+        A (height, width) int32 array with -1 for unreachable tiles, computed
+        on first use and kept in an LRU cache. Blocked address tiles are
+        replaced by a nearby walkable tile, as path_finder does.
+        """
+        with self._fields_lock:
+            if self._fields_version != self.collision_version:
+                self._fields.clear()
+                self._fields_version = self.collision_version
+            field = self._fields.get(address)
+            if field is not None:
+                self._fields.move_to_end(address)
+                return field
+        tiles = self.address_tiles.get(address)
+        if not tiles:
+            return None
+        sources = {nearest_walkable(self.collision_grid, t) for t in tiles}
+        field = self._bfs(sources)
+        with self._fields_lock:
+            self._fields[address] = field
+            while len(self._fields) > self.field_cache_size:
+                self._fields.popitem(last=False)
+        return field
+
+    def warm_distance_fields(self):
+        """Compute fields for every address up front (up to the cache size)."""
+        for address in list(self.address_tiles)[:self.field_cache_size]:
+            self.distance_field(address)
+        log.info("Warmed %d distance fields", len(self._fields))
+
+    def next_tile_toward(self, address: str,
+                         tile: tuple[int, int]) -> Optional[tuple[int, int]]:
+        """Neighbouring tile one step closer to ``address`` (None if there is
+        none, i.e. already there or unreachable)."""
+        field = self.distance_field(address)
+        if field is None:
+            return None
+        return self._downhill(field, tile)
+
+    def path_to_address(self, address: str,
+                        start: tuple[int, int]) -> list[tuple[int, int]]:
+        """Shortest path from start to the nearest tile of ``address``.
+
+        Same format as path_finder: start to goal inclusive, [] if no path.
+        """
+        field = self.distance_field(address)
+        if field is None:
+            return []
+        current = tuple(start)
+        path = [current]
+        while self._tile_distance(field, current) != 0:
+            current = self._downhill(field, current)
+            if current is None:
+                return []
+            path.append(current)
+        return path
+
+    def _tile_distance(self, field: np.ndarray, tile) -> int:
+        x, y = tile
+        if 0 <= y < self.maze_height and 0 <= x < self.maze_width:
+            return int(field[y, x])
+        return -1
+
+    def _downhill(self, field: np.ndarray, tile) -> Optional[tuple[int, int]]:
+        """Walkable neighbour with the smallest distance below the tile's.
+
+        Neighbours are tried in path_finder's order so ties break the same
+        way. A blocked start tile (distance -1) takes its best neighbour.
+        """
+        x, y = tile
+        here = self._tile_distance(field, tile)
+        if here == 0:
+            return None
+        best = None
+        best_d = here if here > 0 else None
+        for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+            n = (x + dx, y + dy)
+            d = self._tile_distance(field, n)
+            if d >= 0 and (best_d is None or d < best_d):
+                best, best_d = n, d
+        return best
@@ -2,24 +2,466 @@
 A* Pathfinding on 2D grid.
 
 Faithful reimplementation of the original Generative Agents path_finder.py.
+
+The search runs on a CollisionGrid: the collision layer as a flat bytearray
+(1 = blocked) indexed by y * width + x, with g-score and parent buffers
+allocated once per grid and reused by every search. Plain list[list[int]]
+mazes are still accepted and converted on the fly. Paths come back in the
+original format, a list of (x, y) tuples from start to end inclusive.
 """
 
 from __future__ import annotations
 
 import heapq
+import threading
+from array import array
+from typing import Union
+
+# Up to this many goals, _astar's heuristic is the distance to the closest
+SMALL_GOAL_SET = 8
+
+
+class CollisionGrid:
+    def __init__(self, blocked: bytearray, width: int, height: int):
+        self.blocked = blocked
+        self.width = width
+        self.height = height
+        self._local = threading.local()
+        self._components: array | None = None
+        self._jumps: tuple | None = None
+
+    @classmethod
+    def from_rows(cls, collision_maze: list[list[int]]) -> CollisionGrid:
+        """Build from a [y][x] grid where non-zero values are obstacles."""
+        height = len(collision_maze)
+        width = len(collision_maze[0]) if height > 0 else 0
+        blocked = bytearray(1 if v else 0
+                            for row in collision_maze for v in row)
+        return cls(blocked, width, height)
+
+    def set_blocked(self, x: int, y: int, blocked: bool):
+        self.blocked[y * self.width + x] = 1 if blocked else 0
+        self._components = None
+        self._jumps = None
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        if 0 <= y < self.height and 0 <= x < self.width:
+            return not self.blocked[y * self.width + x]
+        return False
+
+    def components(self) -> array:
+        """Connected-component label per tile (-1 for blocked tiles).
+
+        Computed on first use. A goal in another component than the start
+        is unreachable, which would otherwise cost a search of the whole
+        component to find out.
+        """
+        if self._components is None:
+            w, h = self.width, self.height
+            size = w * h
+            blocked = self.blocked
+            labels = array("i", [-1]) * size
+            label = 0
+            for seed in range(size):
+                if blocked[seed] or labels[seed] >= 0:
+                    continue
+                labels[seed] = label
+                stack = [seed]
+                while stack:
+                    i = stack.pop()
+                    x = i % w
+                    for ni, inside in ((i + w, i < size - w), (i - w, i >= w),
+                                       (i + 1, x < w - 1), (i - 1, x > 0)):
+                        if inside and not blocked[ni] and labels[ni] < 0:
+                            labels[ni] = label
+                            stack.append(ni)
+                label += 1
+            self._components = labels
+        return self._components
+
+    def jump_tables(self) -> tuple:
+        """Precomputed jumps for _jps, built on first use.
+
+        Returns (right, left, down, up, row_run, col_run). right/left give,
+        per tile, the next tile along the row with a forced neighbour
+        before a wall (-1 if none); down/up the next tile along the column
+        that is forced or has such a row jump point. row_run/col_run number
+        the wall-free runs of each row/column, so a query can tell whether
+        its goal lies on a scan line.
+        """
+        if self._jumps is None:
+            w, h = self.width, self.height
+            size = w * h
+            blocked = self.blocked
+            right = array("i", [-1]) * size
+            left = array("i", [-1]) * size
+            down = array("i", [-1]) * size
+            up = array("i", [-1]) * size
+            row_run = array("i", [-1]) * size
+            col_run = array("i", [-1]) * size
+
+            def forced_h(i, dx):
+                return (i >= w and not blocked[i - w]
+                        and blocked[i - w - dx]) or (
+                    i < size - w and not blocked[i + w]
+                    and blocked[i + w - dx])
+
+            def forced_v(i, x, step):
+                return (x > 0 and not blocked[i - 1]
+                        and blocked[i - 1 - step]) or (
+                    x < w - 1 and not blocked[i + 1]
+                    and blocked[i + 1 - step])
+
+            run = 0
+            for y in range(h):
+                row = y * w
+                for x in range(w):
+                    i = row + x
+                    if blocked[i]:
+                        continue
+                    if x == 0 or blocked[i - 1]:
+                        run += 1
+                    row_run[i] = run
+                for x in range(w - 2, -1, -1):
+                    i = row + x
+                    if not blocked[i] and not blocked[i + 1]:
+                        right[i] = i + 1 if forced_h(i + 1, 1) else right[i + 1]
+                for x in range(1, w):
+                    i = row + x
+                    if not blocked[i] and not blocked[i - 1]:
+                        left[i] = i - 1 if forced_h(i - 1, -1) else left[i - 1]
+
+            def stops(i, x, step):
+                return forced_v(i, x, step) or right[i] >= 0 or left[i] >= 0
+
+            for x in range(w):
+                for y in range(h):
+                    i = y * w + x
+                    if blocked[i]:
+                        continue
+                    if y == 0 or blocked[i - w]:
+                        run += 1
+                    col_run[i] = run
+                for y in range(h - 2, -1, -1):
+                    i = y * w + x
+                    if not blocked[i] and not blocked[i + w]:
+                        down[i] = i + w if stops(i + w, x, w) else down[i + w]
+                for y in range(1, h):
+                    i = y * w + x
+                    if not blocked[i] and not blocked[i - w]:
+                        up[i] = i - w if stops(i - w, x, -w) else up[i - w]
+            self._jumps = (right, left, down, up, row_run, col_run)
+        return self._jumps
+
+    def reachable_components(self, tile: tuple[int, int]) -> set[int]:
+        """Components a search from ``tile`` can reach (a blocked start
+        tile can still step onto its walkable neighbours)."""
+        x, y = tile
+        labels = self.components()
+        if self.is_walkable(x, y):
+            return {labels[y * self.width + x]}
+        return {labels[ny * self.width + nx]
+                for nx, ny in ((x, y + 1), (x, y - 1), (x + 1, y), (x - 1, y))
+                if self.is_walkable(nx, ny)}
+
+    def buffers(self) -> tuple[array, array, array, int]:
+        """Per-thread (g, parent, stamp, token) search buffers.
+
+        An entry of g/parent is only valid where stamp equals the token, so
+        a new search bumps the token instead of clearing the arrays.
+        """
+        local = self._local
+        size = self.width * self.height
+        if getattr(local, "size", None) != size:
+            local.g = array("i", bytes(4 * size))
+            local.parent = array("i", bytes(4 * size))
+            local.stamp = array("I", bytes(4 * size))
+            local.token = 0
+            local.size = size
+        local.token += 1
+        if local.token >= 0xFFFFFFFF:
+            local.stamp = array("I", bytes(4 * size))
+            local.token = 1
+        return local.g, local.parent, local.stamp, local.token
+
+
+MazeLike = Union[CollisionGrid, list[list[int]]]
+
+
+def as_grid(collision_maze: MazeLike) -> CollisionGrid:
+    if isinstance(collision_maze, CollisionGrid):
+        return collision_maze
+    return CollisionGrid.from_rows(collision_maze)
+
+
+def nearest_walkable(collision_maze: MazeLike,
+                     tile: tuple[int, int]) -> tuple[int, int]:
+    """The tile itself if walkable, else the closest walkable tile within
+    3 steps (the substitution path_finder makes for a blocked end tile).
+    Returns the tile unchanged if nothing nearby is walkable."""
+    grid = as_grid(collision_maze)
+    tile = tuple(tile)
+    if grid.is_walkable(tile[0], tile[1]):
+        return tile
+    best = tile
+    best_dist = float('inf')
+    for dy in range(-3, 4):
+        for dx in range(-3, 4):
+            nx, ny = tile[0] + dx, tile[1] + dy
+            if grid.is_walkable(nx, ny):
+                d = abs(dx) + abs(dy)
+                if d < best_dist:
+                    best_dist = d
+                    best = (nx, ny)
+    return best
+
+
+def _astar(grid: CollisionGrid, start: tuple[int, int],
+           goals: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """A* from start to the nearest goal on flat indices.
+
+    The heuristic is the Manhattan distance to the closest goal for up to
+    SMALL_GOAL_SET goals, and to the goals' bounding box for more, where a
+    minimum per tile would cost more than the nodes it saves; both never
+    overestimate. Heap entries are single ints ordered by (f, -g, x, y): among
+    equal f the deepest tile is expanded first, which keeps open areas from
+    being flooded, and entries made stale by a cheaper route are skipped.
+    """
+    w, h = grid.width, grid.height
+    size = w * h
+    span = size + 1
+    blocked = grid.blocked
+    g, parent, stamp, token = grid.buffers()
+
+    goal_set = {gy * w + gx for gx, gy in goals}
+    few = (list({tuple(goal) for goal in goals})
+           if 1 < len(goal_set) <= SMALL_GOAL_SET else None)
+    min_x = min(gx for gx, _ in goals)
+    max_x = max(gx for gx, _ in goals)
+    min_y = min(gy for _, gy in goals)
+    max_y = max(gy for _, gy in goals)
+
+    sx, sy = start
+    si = sy * w + sx
+    g[si] = 0
+    parent[si] = -1
+    stamp[si] = token
+    open_set = [sx * h + sy]
+    last_row = size - w
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+
+    while open_set:
+        key, pos = divmod(heappop(open_set), size)
+        x, y = divmod(pos, h)
+        i = y * w + x
+        t = g[i]
+        if size - key % span != t and i != si:
+            continue  # stale entry: the tile was reached cheaper since
+
+        if i in goal_set:
+            path = []
+            while i != si:
+                path.append((i % w, i // w))
+                i = parent[i]
+            path.append(start)
+            path.reverse()
+            return path
+
+        t += 1
+        tie = size - t
+        # Heuristic after a step down, up, right and left
+        if few is not None:
+            h_down = h_up = h_right = h_left = size
+            for gx, gy in few:
+                dx = abs(x - gx)
+                dy = abs(y - gy)
+                dx_right = abs(x + 1 - gx)
+                dx_left = abs(x - 1 - gx)
+                dy_down = abs(y + 1 - gy)
+                dy_up = abs(y - 1 - gy)
+                if dx + dy_down < h_down:
+                    h_down = dx + dy_down
+                if dx + dy_up < h_up:
+                    h_up = dx + dy_up
+                if dx_right + dy < h_right:
+                    h_right = dx_right + dy
+                if dx_left + dy < h_left:
+                    h_left = dx_left + dy
+        else:
+            hx = min_x - x if x < min_x else (x - max_x if x > max_x else 0)
+            hy = min_y - y if y < min_y else (y - max_y if y > max_y else 0)
+            h_down = hx + (hy - 1 if y < min_y else hy + 1 if y >= max_y
+                           else 0)
+            h_up = hx + (hy + 1 if y <= min_y else hy - 1 if y > max_y
+                         else 0)
+            h_right = hy + (hx - 1 if x < min_x else hx + 1 if x >= max_x
+                            else 0)
+            h_left = hy + (hx + 1 if x <= min_x else hx - 1 if x > max_x
+                           else 0)
+        # Same neighbour order as the original: (0,1) (0,-1) (1,0) (-1,0)
+        ni = i + w
+        if i < last_row and not blocked[ni] and (
+                stamp[ni] != token or t < g[ni]):
+            stamp[ni] = token
+            g[ni] = t
+            parent[ni] = i
+            heappush(open_set, ((t + h_down) * span + tie)
+                     * size + pos + 1)
+        ni = i - w
+        if i >= w and not blocked[ni] and (
+                stamp[ni] != token or t < g[ni]):
+            stamp[ni] = token
+            g[ni] = t
+            parent[ni] = i
+            heappush(open_set, ((t + h_up) * span + tie)
+                     * size + pos - 1)
+        ni = i + 1
+        if x < w - 1 and not blocked[ni] and (
+                stamp[ni] != token or t < g[ni]):
+            stamp[ni] = token
+            g[ni] = t
+            parent[ni] = i
+            heappush(open_set, ((t + h_right) * span + tie)
+                     * size + pos + h)
+        ni = i - 1
+        if x > 0 and not blocked[ni] and (
+                stamp[ni] != token or t < g[ni]):
+            stamp[ni] = token
+            g[ni] = t
+            parent[ni] = i
+            heappush(open_set, ((t + h_left) * span + tie)
+                     * size + pos - h)
+
+    return []
+
+
+def _jps(grid: CollisionGrid, start: tuple[int, int],
+         goal: tuple[int, int]) -> list[tuple[int, int]]:
+    """Jump Point Search from start to goal, for 4-connected movement.
 
+    Canonical paths move vertically first: a vertical jump stops where a
+    wall ends beside it (a forced neighbour) or where a horizontal scan
+    from the tile would find a jump point or the goal; a horizontal jump
+    stops only at a forced neighbour or the goal. The scans themselves are
+    read from CollisionGrid.jump_tables(), so a jump costs a lookup, and
+    only jump points enter the heap. Paths are as short as _astar's,
+    though on ties they may take a different route.
+    """
+    w, h = grid.width, grid.height
+    size = w * h
+    span = size + 1
+    blocked = grid.blocked
+    g, parent, stamp, token = grid.buffers()
+    gx, gy = goal
+    goal_i = gy * w + gx
+
+    right, left, down, up, row_run, col_run = grid.jump_tables()
+    goal_row_run = row_run[goal_i]
+    goal_row = gy * w
+
+    def jump_h(i, x, dx):
+        """Next jump point along the row from tile i, or -1."""
+        j = right[i] if dx > 0 else left[i]
+        if row_run[i] == goal_row_run and (gx - x) * dx > 0 and (
+                j < 0 or abs(goal_i - i) < abs(j - i)):
+            return goal_i
+        return j
+
+    def jump_v(i, x, y, dy):
+        """Next jump point along the column from tile i, or -1. Crossing
+        the goal's row inside the goal's run is a jump point too."""
+        j = down[i] if dy > 0 else up[i]
+        if (gy - y) * dy > 0:
+            c = goal_row + x
+            if col_run[c] == col_run[i] and row_run[c] == goal_row_run and (
+                    j < 0 or abs(c - i) < abs(j - i)):
+                return c
+        return j
+
+    sx, sy = start
+    si = sy * w + sx
+    g[si] = 0
+    parent[si] = -1
+    stamp[si] = token
+    open_set = [si]
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    if blocked[si]:
+        # The tables only cover walkable tiles: step off a blocked start
+        # onto its walkable neighbours, which then act as jump points
+        open_set = []
+        for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+            if grid.is_walkable(sx + dx, sy + dy):
+                j = si + dy * w + dx
+                stamp[j] = token
+                g[j] = 1
+                parent[j] = si
+                f = 1 + abs(sx + dx - gx) + abs(sy + dy - gy)
+                heappush(open_set, (f * span + size - 1) * size + j)
+
+    while open_set:
+        key, i = divmod(heappop(open_set), size)
+        t = g[i]
+        if size - key % span != t and i != si:
+            continue  # stale entry
+
+        if i == goal_i:
+            path = [goal]
+            x, y = gx, gy
+            while i != si:
+                i = parent[i]
+                px, py = i % w, i // w
+                dx = (px > x) - (px < x)
+                dy = (py > y) - (py < y)
+                while (x, y) != (px, py):
+                    x += dx
+                    y += dy
+                    path.append((x, y))
+            path.reverse()
+            return path
+
+        x, y = i % w, i // w
+        # Every direction but back towards the parent
+        p = parent[i]
+        px, py = (x, y) if p < 0 else (p % w, p // w)
+        for dx, dy in ((0, 1), (0, -1), (1, 0), (-1, 0)):
+            if (dx and (px - x) * dx > 0) or (dy and (py - y) * dy > 0):
+                continue
+            if dx:
+                j = jump_h(i, x, dx)
+                cost = abs(j - i)
+            else:
+                j = jump_v(i, x, y, dy)
+                cost = abs(j - i) // w
+            if j < 0:
+                continue
+            tj = t + cost
+            if stamp[j] != token or tj < g[j]:
+                stamp[j] = token
+                g[j] = tj
+                parent[j] = i
+                f = tj + abs(j % w - gx) + abs(j // w - gy)
+                heappush(open_set, (f * span + size - tj) * size + j)
+
+    return []
 
-def path_finder(collision_maze: list[list[int]],
+
+def path_finder(collision_maze: MazeLike,
                 start: tuple[int, int],
                 end: tuple[int, int],
-                collision_block_id: int = 32001) -> list[tuple[int, int]]:
+                collision_block_id: int = 32001,
+                method: str = "astar") -> list[tuple[int, int]]:
     """Find shortest path from start to end using A* on a tile grid.
 
     Args:
-        collision_maze: 2D grid where non-zero values are obstacles.
+        collision_maze: CollisionGrid, or 2D grid where non-zero values are
+            obstacles.
         start: (x, y) start tile.
         end: (x, y) end tile.
         collision_block_id: Not used directly; any non-zero tile is blocked.
+        method: "astar", or "jps" for Jump Point Search (same path
+            lengths, faster on open maps).
 
     Returns:
         List of (x, y) tiles from start to end inclusive.
@@ -28,6 +470,79 @@ def path_finder(collision_maze: list[list[int]],
     if start == end:
         return [start]
 
+    grid = as_grid(collision_maze)
+    start = tuple(start)
+    if not (0 <= start[0] < grid.width and 0 <= start[1] < grid.height):
+        return []
+
+    end = nearest_walkable(grid, end)
+    if start == end:
+        return [start]
+    if not grid.is_walkable(end[0], end[1]):
+        return []
+    labels = grid.components()
+    if labels[end[1] * grid.width + end[0]] not in \
+            grid.reachable_components(start):
+        return []
+    if method == "jps":
+        return _jps(grid, start, end)
+    return _astar(grid, start, [end])
+
+
+def path_finder_multi(collision_maze: MazeLike,
+                      start: tuple[int, int],
+                      targets: list[tuple[int, int]],
+                      collision_block_id: int = 32001
+                      ) -> list[tuple[int, int]]:
+    """Find the shortest path from start to the nearest of several targets.
+
+    One A* search replaces a path_finder() call per target. The heuristic is
+    the Manhattan distance to the closest target (or, for many targets, to
+    their bounding box), which never overestimates, so the path returned is
+    as short as the best of the per-target searches.
+
+    Args:
+        collision_maze: CollisionGrid, or 2D grid where non-zero values are
+            obstacles.
+        start: (x, y) start tile.
+        targets: Candidate (x, y) end tiles.
+        collision_block_id: Not used directly; any non-zero tile is blocked.
+
+    Returns:
+        List of (x, y) tiles from start to the reached target inclusive.
+        Empty list if no target is reachable.
+    """
+    if not targets:
+        return []
+    start = tuple(start)
+    if start in targets:
+        return [start]
+
+    grid = as_grid(collision_maze)
+    if not (0 <= start[0] < grid.width and 0 <= start[1] < grid.height):
+        return []
+
+    goals = {nearest_walkable(grid, t) for t in targets}
+    if start in goals:
+        return [start]
+    labels = grid.components()
+    reachable = grid.reachable_components(start)
+    goals = sorted(g for g in goals if grid.is_walkable(g[0], g[1])
+                   and labels[g[1] * grid.width + g[0]] in reachable)
+    if not goals:
+        return []
+    return _astar(grid, start, goals)
+
+
+def path_finder_dict(collision_maze: list[list[int]],
+                     start: tuple[int, int],
+                     end: tuple[int, int],
+                     collision_block_id: int = 32001
+                     ) -> list[tuple[int, int]]:
+    """Reference A* on tuples and dicts, kept for parity tests/benchmarks."""
+    if start == end:
+        return [start]
+
     if not collision_maze:
         return []
 
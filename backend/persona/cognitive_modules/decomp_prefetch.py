@@ -0,0 +1,153 @@
+"""
+Task Decomposition Prefetch
+
+_determine_action splits an hourly block into 5-15 minute subtasks once
+it is about to start, and the persona's step waits on that prompt. The
+prefetcher decomposes the blocks coming up in f_daily_schedule ahead of
+time on a shared worker pool, so the answer is usually ready by then.
+
+Workers never touch the persona: the caller reads the prompt inputs
+(identity, date, name) on its own thread and submits plain values.
+Results are keyed by persona, those inputs, the block's start minute,
+task and duration, and only handed out for that exact block and prompt,
+so a prefetched result is what the inline call would have asked for.
+When a replan, a reaction or a new identity has changed either first,
+the stale result is cancelled or dropped at the next prefetch() and the
+caller decomposes inline as before. The swap itself is the caller's
+slice assignment on its own schedule, so it is never half applied.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Hashable, Iterable, Optional
+
+from backend.config import LLM_MAX_PARALLEL
+
+if TYPE_CHECKING:
+    from backend.persona.persona import Persona
+
+log = logging.getLogger(__name__)
+
+# (start minute, task, duration) of a schedule block
+Block = tuple[int, str, int]
+
+_prefetcher: Optional[DecompPrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_decomp_prefetcher() -> DecompPrefetcher:
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = DecompPrefetcher(LLM_MAX_PARALLEL)
+    return _prefetcher
+
+
+def shutdown_decomp_prefetcher():
+    """Cancel queued prefetches and stop the worker pool (at exit)."""
+    global _prefetcher
+    with _prefetcher_lock:
+        prefetcher, _prefetcher = _prefetcher, None
+    if prefetcher is not None:
+        prefetcher.shutdown()
+
+
+def schedule_blocks(schedule: list) -> list[Block]:
+    """(start minute, task, duration) for every block of a schedule."""
+    blocks = []
+    start = 0
+    for task, duration in schedule:
+        blocks.append((start, task, duration))
+        start += duration
+    return blocks
+
+
+class DecompPrefetcher:
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # persona name -> {(inputs, start, task, duration): Future}
+        self._pending: dict[str, dict[tuple, Future]] = {}
+        self.hits = 0
+        self.waits = 0
+        self.misses = 0
+        self.discarded = 0
+
+    def _submit(self, fn, *args) -> Future:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix="decomp")
+        return self._pool.submit(fn, *args)
+
+    def prefetch(self, persona: Persona, inputs: Hashable,
+                 blocks: Iterable[Block],
+                 decompose: Callable[[Hashable, str, int], list]):
+        """Start ``decompose(inputs, task, duration)`` for ``blocks`` not
+        already in flight, and drop results whose block or inputs have
+        changed or whose block has passed. ``inputs`` are the prompt's
+        plain values, read by the caller from the persona."""
+        scratch = persona.scratch
+        now = scratch.curr_time.hour * 60 + scratch.curr_time.minute
+        current = {(inputs,) + block
+                   for block in schedule_blocks(scratch.f_daily_schedule)
+                   if block[0] + block[2] > now}
+        with self._lock:
+            pending = self._pending.setdefault(persona.name, {})
+            for key in [k for k in pending if k not in current]:
+                pending.pop(key).cancel()
+                self.discarded += 1
+            for block in blocks:
+                key = (inputs,) + tuple(block)
+                if key in current and key not in pending:
+                    pending[key] = self._submit(
+                        decompose, inputs, block[1], block[2])
+
+    def take(self, persona: Persona, inputs: Hashable, start: int, task: str,
+             duration: int) -> Optional[list]:
+        """The prefetched decomposition of this block and prompt, waiting
+        for it if it is still running, or None if it was never
+        prefetched."""
+        key = (inputs, start, task, duration)
+        with self._lock:
+            future = self._pending.get(persona.name, {}).pop(key, None)
+            if future is None:
+                self.misses += 1
+                return None
+            if future.done():
+                self.hits += 1
+            else:
+                self.waits += 1
+        try:
+            return future.result()
+        except Exception as e:
+            log.warning("  %s: prefetched decomposition of %r failed: %s",
+                        persona.name, task, e)
+            return None
+
+    def shutdown(self):
+        """Cancel everything queued and wait for running prompts."""
+        with self._lock:
+            for pending in self._pending.values():
+                for future in pending.values():
+                    future.cancel()
+            self._pending.clear()
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.waits + self.misses
+        with self._lock:
+            in_flight = sum(len(p) for p in self._pending.values())
+        return {
+            "hits": self.hits,
+            "waits": self.waits,
+            "misses": self.misses,
+            "discarded": self.discarded,
+            "in_flight": in_flight,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
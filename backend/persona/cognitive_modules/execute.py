@@ -7,12 +7,9 @@ Handles normal navigation, persona-persona interaction, waiting, and random targ
 
 from __future__ import annotations
 
-import random
 import logging
 from typing import TYPE_CHECKING
 
-from backend.path_finder import path_finder
-
 if TYPE_CHECKING:
     from backend.persona.persona import Persona
 
@@ -34,14 +31,16 @@ def execute(persona: Persona, maze, personas: dict, plan_address: str):
 
     if not scratch.act_path_set:
         target_tiles = None
+        # Set when the targets are a whole address, whose cached distance
+        # field can replace the search
+        field_address = None
 
         if plan_address and "<persona>" in plan_address:
             target_name = plan_address.split("<persona>")[-1].strip()
             if target_name in personas:
                 target_p_tile = personas[target_name].scratch.curr_tile
-                potential_path = path_finder(
-                    maze.collision_maze, scratch.curr_tile,
-                    target_p_tile, COLLISION_BLOCK_ID)
+                potential_path = maze.find_path(scratch.curr_tile,
+                                                target_p_tile)
                 if len(potential_path) <= 2:
                     target_tiles = [potential_path[0]]
                 else:
@@ -58,40 +57,33 @@ def execute(persona: Persona, maze, personas: dict, plan_address: str):
             clean_addr = ":".join(plan_address.split(":")[:-1])
             if clean_addr in maze.address_tiles:
                 tiles = list(maze.address_tiles[clean_addr])
-                target_tiles = random.sample(tiles, min(1, len(tiles)))
+                target_tiles = persona.rng.sample(tiles, min(1, len(tiles)))
 
         elif plan_address and plan_address in maze.address_tiles:
             target_tiles = list(maze.address_tiles[plan_address])
+            field_address = plan_address
 
         if target_tiles is None:
             # Fallback: stay in place
             scratch.act_path_set = True
             scratch.planned_path = []
         else:
-            # Sample a few target tiles
-            if len(target_tiles) > 4:
-                target_tiles = random.sample(target_tiles, 4)
-
             # Prefer unoccupied tiles
-            persona_names = set(personas.keys())
-            new_targets = []
-            for t in target_tiles:
-                tile_events = maze.access_tile(t)["events"]
-                occupied = any(ev[0] in persona_names for ev in tile_events)
-                if not occupied:
-                    new_targets.append(t)
+            new_targets = [t for t in target_tiles
+                           if not maze.is_occupied(t)]
             if not new_targets:
                 new_targets = target_tiles
+            if len(new_targets) < len(target_tiles):
+                field_address = None
             target_tiles = new_targets
 
-            # Find shortest path to closest target
-            curr_tile = scratch.curr_tile
-            best_path = None
-            for t in target_tiles:
-                p = path_finder(maze.collision_maze, curr_tile,
-                                t, COLLISION_BLOCK_ID)
-                if p and (best_path is None or len(p) < len(best_path)):
-                    best_path = p
+            if field_address:
+                best_path = maze.path_to_address(field_address,
+                                                 scratch.curr_tile)
+            else:
+                # One search to whichever target tile is closest
+                best_path = maze.find_path_multi(scratch.curr_tile,
+                                                 target_tiles)
 
             if best_path:
                 scratch.planned_path = best_path[1:]  # exclude current tile
@@ -11,10 +11,10 @@ from __future__ import annotations
 import math
 import logging
 from operator import itemgetter
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from backend.llm.embedding import get_embedding
-from backend.llm.llm_client import safe_generate_response
+from backend.llm.embedding import get_embeddings
+from backend.persona.cognitive_modules.poignancy import score_poignancy
 
 if TYPE_CHECKING:
     from backend.persona.persona import Persona
@@ -22,12 +22,10 @@ if TYPE_CHECKING:
 log = logging.getLogger(__name__)
 
 
-def generate_poig_score(persona: Persona, event_type: str,
-                        description: str) -> int:
-    """Ask LLM to rate event importance 1-10."""
-    if "is idle" in description:
-        return 1
-
+def poig_score_request(description: str,
+                       fail_safe: Optional[int] = 5) -> tuple:
+    """safe_generate_response() arguments asking the LLM to rate event
+    importance 1-10 (``fail_safe`` if it never gives a number)."""
     prompt = (
         f"On the scale of 1 to 10, where 1 is purely mundane (e.g., brushing "
         f"teeth, making bed) and 10 is extremely poignant (e.g., a break up, "
@@ -45,22 +43,20 @@ def generate_poig_score(persona: Persona, event_type: str,
             return False
 
     def cleanup(resp, _):
-        return int(resp.strip().split()[0])
+        return min(max(int(resp.strip().split()[0]), 1), 10)
 
     gpt_param = {"temperature": 0.3, "max_tokens": 8}
-    score = safe_generate_response(prompt, gpt_param, 3, 5, validate, cleanup)
-    return min(max(score, 1), 10)
+    return prompt, gpt_param, 3, fail_safe, validate, cleanup
 
 
 def perceive(persona: Persona, maze) -> list:
     """
     Perceive events around the persona.
-    1. Get nearby tiles within vision radius
-    2. Update spatial memory from nearby tiles
-    3. Filter events to same arena only
-    4. Sort by distance, keep top att_bandwidth
-    5. Check retention to avoid re-perceiving
-    6. Store new events in associative memory
+    1. Update spatial memory from tiles within vision radius
+    2. Collect events on nearby tiles of the same arena
+    3. Sort by distance, keep top att_bandwidth
+    4. Check retention to avoid re-perceiving
+    5. Store new events in associative memory
 
     Returns list of ConceptNode for newly perceived events.
     """
@@ -69,17 +65,8 @@ def perceive(persona: Persona, maze) -> list:
     if not curr_tile:
         return []
 
-    # Get nearby tiles
-    nearby_tiles = maze.get_nearby_tiles(curr_tile, scratch.vision_r)
-
-    # Update spatial memory
-    for tile_coord in nearby_tiles:
-        tile_info = maze.access_tile(tile_coord)
-        w = tile_info["world"]
-        s = tile_info["sector"]
-        a = tile_info["arena"]
-        go = tile_info["game_object"]
-
+    # Update spatial memory (each distinct address in view once)
+    for w, s, a, go in maze.nearby_addresses(curr_tile, scratch.vision_r):
         if w and w not in persona.s_mem.tree:
             persona.s_mem.tree[w] = {}
         if s and w and s not in persona.s_mem.tree.get(w, {}):
@@ -90,30 +77,30 @@ def perceive(persona: Persona, maze) -> list:
                 go not in persona.s_mem.tree.get(w, {}).get(s, {}).get(a, [])):
             persona.s_mem.tree[w][s][a].append(go)
 
-    # Perceive events — only from same arena
-    curr_arena_path = maze.get_tile_path(curr_tile, "arena")
+    # Perceive events — only from same arena, via the arena's event index
     percept_events_set = set()
     percept_events_list = []
 
-    for tile_coord in nearby_tiles:
-        tile_info = maze.access_tile(tile_coord)
-        if tile_info["events"]:
-            if maze.get_tile_path(tile_coord, "arena") == curr_arena_path:
-                dist = math.dist(
-                    [tile_coord[0], tile_coord[1]],
-                    [curr_tile[0], curr_tile[1]])
-                for event in tile_info["events"]:
-                    if event not in percept_events_set:
-                        percept_events_list.append([dist, event])
-                        percept_events_set.add(event)
+    for tile_coord, events in maze.events_in_view(curr_tile,
+                                                  scratch.vision_r):
+        dist = math.dist(
+            [tile_coord[0], tile_coord[1]],
+            [curr_tile[0], curr_tile[1]])
+        for event in events:
+            if event not in percept_events_set:
+                percept_events_list.append([dist, event])
+                percept_events_set.add(event)
 
     # Sort by distance, keep top att_bandwidth
     percept_events_list.sort(key=itemgetter(0))
     perceived_events = [ev for _, ev in
                         percept_events_list[:scratch.att_bandwidth]]
 
-    # Store new events
-    ret_events = []
+    # Filter out events still inside the retention window. Accepted events
+    # enter the window themselves, exactly as if they were added one by one.
+    window = [e.spo_summary() for e in
+              persona.a_mem.seq_event[:scratch.retention]]
+    new_events = []
     for p_event in perceived_events:
         s, p, o, desc = p_event
         if not p:
@@ -123,9 +110,43 @@ def perceive(persona: Persona, maze) -> list:
         desc = f"{s.split(':')[-1]} is {desc}"
         p_event_tuple = (s, p, o)
 
-        latest = persona.a_mem.get_summarized_latest_events(scratch.retention)
-        if p_event_tuple in latest:
+        if p_event_tuple in window:
             continue
+        window = ([p_event_tuple] + window)[:scratch.retention]
+
+        desc_for_emb = desc
+        if "(" in desc:
+            desc_for_emb = desc.split("(")[1].split(")")[0].strip()
+        new_events.append((s, p, o, desc, desc_for_emb))
+
+    if not new_events:
+        return []
+
+    # Embed everything this step needs in one batched call
+    self_chat = any(s == persona.name and p == "chat with"
+                    for s, p, _, _, _ in new_events)
+    to_embed = [ev[4] for ev in new_events]
+    if self_chat:
+        to_embed.append(scratch.act_description)
+    to_embed = [t for t in dict.fromkeys(to_embed)
+                if t not in persona.a_mem.embeddings]
+    fresh = dict(zip(to_embed, get_embeddings(to_embed)))
+
+    def embedding_for(text):
+        if text in persona.a_mem.embeddings:
+            return persona.a_mem.embeddings[text]
+        return fresh[text]
+
+    # Rate every new event in one prompt
+    poignancies = score_poignancy(persona, "event",
+                                  [ev[4] for ev in new_events],
+                                  poig_score_request)
+
+    # Store new events
+    ret_events = []
+    for (s, p, o, desc, desc_for_emb), poignancy in zip(new_events,
+                                                         poignancies):
+        p_event_tuple = (s, p, o)
 
         # Keywords
         keywords = set()
@@ -134,17 +155,7 @@ def perceive(persona: Persona, maze) -> list:
         keywords.update([sub, obj])
 
         # Embedding
-        desc_for_emb = desc
-        if "(" in desc:
-            desc_for_emb = desc.split("(")[1].split(")")[0].strip()
-        if desc_for_emb in persona.a_mem.embeddings:
-            event_embedding = persona.a_mem.embeddings[desc_for_emb]
-        else:
-            event_embedding = get_embedding(desc_for_emb)
-        embedding_pair = (desc_for_emb, event_embedding)
-
-        # Poignancy
-        poignancy = generate_poig_score(persona, "event", desc_for_emb)
+        embedding_pair = (desc_for_emb, embedding_for(desc_for_emb))
 
         # Handle self-chat perception
         chat_node_ids = []
@@ -152,11 +163,9 @@ def perceive(persona: Persona, maze) -> list:
                 p_event_tuple[1] == "chat with"):
             curr_event = scratch.act_event
             chat_desc = scratch.act_description
-            if chat_desc in persona.a_mem.embeddings:
-                chat_emb = persona.a_mem.embeddings[chat_desc]
-            else:
-                chat_emb = get_embedding(chat_desc)
-            chat_poignancy = generate_poig_score(persona, "chat", chat_desc)
+            chat_emb = embedding_for(chat_desc)
+            chat_poignancy, = score_poignancy(persona, "chat", [chat_desc],
+                                              poig_score_request)
             chat_node = persona.a_mem.add_chat(
                 scratch.curr_time, None,
                 curr_event[0], curr_event[1], curr_event[2],
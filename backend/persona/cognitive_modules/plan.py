@@ -9,15 +9,19 @@ Faithful reimplementation of the original Generative Agents plan.py.
 from __future__ import annotations
 
 import datetime
+import json
 import math
-import random
 import logging
 from typing import TYPE_CHECKING
 
+from backend.config import (DECOMP_PREFETCH, DECOMP_PREFETCH_MINUTES,
+                            FUSED_ACTION)
 from backend.llm.llm_client import (safe_generate_response,
                                      ChatGPT_single_request)
 from backend.llm.embedding import get_embedding
 from backend.persona.cognitive_modules.retrieve import new_retrieve
+from backend.persona.cognitive_modules.decomp_prefetch import (
+    get_decomp_prefetcher, schedule_blocks)
 from backend.persona.cognitive_modules.converse import (
     generate_convo, generate_convo_summary, agent_chat_v2)
 
@@ -177,13 +181,22 @@ def generate_hourly_schedule(persona: Persona,
     return compressed
 
 
-def generate_task_decomp(persona: Persona, task: str,
+def task_decomp_inputs(persona: Persona) -> tuple[str, str, str]:
+    """The persona's part of the task decomposition prompt."""
+    return (persona.scratch.get_str_iss(),
+            persona.scratch.get_str_curr_date_str(),
+            persona.scratch.first_name)
+
+
+def generate_task_decomp(inputs: tuple[str, str, str], task: str,
                           duration: int) -> list[list]:
-    """Decompose a task into 5-15 minute subtasks."""
+    """Decompose a task into 5-15 minute subtasks. ``inputs`` come from
+    task_decomp_inputs(), so this can run off the persona's thread."""
+    iss, date_str, first_name = inputs
     prompt = (
-        f"{persona.scratch.get_str_iss()}\n"
-        f"Today is {persona.scratch.get_str_curr_date_str()}.\n\n"
-        f"{persona.scratch.first_name} needs to: {task}\n"
+        f"{iss}\n"
+        f"Today is {date_str}.\n\n"
+        f"{first_name} needs to: {task}\n"
         f"Total time: {duration} minutes.\n\n"
         f"Break this into subtasks (5-15 min each). Format each as:\n"
         f"subtask description (duration in minutes)\n"
@@ -388,17 +401,85 @@ def generate_act_obj_event_triple(act_game_object: str, act_obj_desc: str,
     return (act_game_object, "is", act_obj_desc)
 
 
+def generate_fused_action(act_desp: str, persona: Persona,
+                          act_world: str) -> dict:
+    """One structured call for the whole per-action chain: sector, arena,
+    object, emoji, event triple, object state and object emoji.
+
+    Returns the parsed JSON object ({} if none could be parsed). Fields are
+    not checked here; _action_details validates each one against the
+    persona's spatial memory and falls back to the single-purpose
+    generator for any that do not fit.
+    """
+    known = persona.s_mem.tree.get(act_world, {})
+    prompt = (
+        f"{persona.scratch.get_str_iss()}\n"
+        f"Currently at: {persona.scratch.act_address or 'unknown'}\n"
+        f"Next task: {act_desp}\n"
+        f"Places {persona.scratch.first_name} knows in {act_world}, as "
+        f"{{area: {{location: [objects]}}}}:\n"
+        f"{json.dumps(known, ensure_ascii=False)}\n\n"
+        f"Where should {persona.scratch.first_name} do this, and how does "
+        f"it look? Answer with ONLY a JSON object:\n"
+        f'{{"sector": "<area from the list>", '
+        f'"arena": "<location in that area>", '
+        f'"object": "<object in that location>", '
+        f'"emoji": "<1-2 emojis for the task>", '
+        f'"event": ["{persona.scratch.name}", "<predicate>", "<object>"], '
+        f'"object_state": "<what the object is doing, a few words>", '
+        f'"object_emoji": "<1-2 emojis for the object state>"}}'
+    )
+
+    def parse(r):
+        start, end = r.find("{"), r.rfind("}")
+        data = json.loads(r[start:end + 1])
+        if not isinstance(data, dict):
+            raise ValueError("not a JSON object")
+        return data
+
+    def validate(r, _):
+        try:
+            parse(r)
+            return True
+        except ValueError:
+            return False
+
+    def cleanup(r, _):
+        return parse(r)
+
+    gpt_param = {"temperature": 0.3, "max_tokens": 256}
+    return safe_generate_response(prompt, gpt_param, 2, {}, validate, cleanup)
+
+
+def _match_option(answer, accessible: str):
+    """The option from a ", "-joined list that answer names, else None."""
+    if not isinstance(answer, str) or not answer.strip():
+        return None
+    answer = answer.strip().lower()
+    options = [o.strip() for o in accessible.split(",") if o.strip()]
+    for o in options:
+        if o.lower() == answer:
+            return o
+    for o in options:
+        if o.lower() in answer or answer in o.lower():
+            return o
+    return None
+
+
+def _fused_text(fused: dict, field: str):
+    value = fused.get(field)
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
 def generate_decide_to_talk(init_persona: Persona,
                              target_persona: Persona,
                              retrieved: dict) -> bool:
-    context_strs = []
-    for _, rel_ctx in retrieved.items():
-        if "events" in rel_ctx:
-            for n in rel_ctx["events"][:3]:
-                context_strs.append(n.embedding_key)
-        if "thoughts" in rel_ctx:
-            for n in rel_ctx["thoughts"][:2]:
-                context_strs.append(n.embedding_key)
+    # ``retrieved`` is the focused event's context from _choose_retrieved()
+    context_strs = [n.embedding_key for n in retrieved.get("events", [])[:3]]
+    context_strs += [n.embedding_key
+                     for n in retrieved.get("thoughts", [])[:2]]
     context = "\n".join(context_strs) if context_strs else "no prior interactions"
 
     prompt = (
@@ -500,7 +581,7 @@ def revise_identity(persona: Persona):
     persona.scratch.daily_plan_req = new_daily_req
 
 
-def _long_term_planning(persona: Persona, new_day: str):
+def long_term_planning(persona: Persona, new_day: str):
     """Generate daily schedule at start of a new day."""
     wake_up_hour = generate_wake_up_hour(persona)
 
@@ -514,6 +595,7 @@ def _long_term_planning(persona: Persona, new_day: str):
         persona, wake_up_hour)
     persona.scratch.f_daily_schedule_hourly_org = (
         persona.scratch.f_daily_schedule[:])
+    _prefetch_decomps(persona)
 
     # Store plan in memory
     thought = (f"This is {persona.scratch.name}'s plan for "
@@ -532,39 +614,84 @@ def _long_term_planning(persona: Persona, new_day: str):
                                thought, keywords, 5, embedding_pair, None)
 
 
-def _determine_action(persona: Persona, maze):
-    """Select current action, decomposing hourly blocks into subtasks."""
-
-    def determine_decomp(act_desp, act_dura):
-        if "sleep" not in act_desp and "bed" not in act_desp:
-            return True
-        if "sleeping" in act_desp or "asleep" in act_desp or "in bed" in act_desp:
-            return False
-        if ("sleep" in act_desp or "bed" in act_desp) and act_dura > 60:
-            return False
+def _should_decompose(act_desp: str, act_dura: int) -> bool:
+    if act_dura < 60:
+        return False
+    if "sleep" not in act_desp and "bed" not in act_desp:
         return True
+    if "sleeping" in act_desp or "asleep" in act_desp or "in bed" in act_desp:
+        return False
+    if ("sleep" in act_desp or "bed" in act_desp) and act_dura > 60:
+        return False
+    return True
+
+
+def _prefetch_decomps(persona: Persona):
+    """Queue background decomposition of the block _determine_action will
+    split when the current action ends, once that is within
+    DECOMP_PREFETCH_MINUTES.
 
+    Only that block is certain to be asked for: later decision points
+    depend on how it is split, so guessing further ahead would spend
+    prompts the inline path never makes.
+    """
+    scratch = persona.scratch
+    if not DECOMP_PREFETCH or scratch.act_check_finished():
+        return
+    end = scratch.act_start_time + datetime.timedelta(
+        minutes=scratch.act_duration)
+    lead = int((end - scratch.curr_time).total_seconds() // 60)
+    upcoming = []
+    # As _determine_action will see it at ``end``: the block an hour on,
+    # unless the day's first block is still being split or it is 23:00
+    if (lead <= DECOMP_PREFETCH_MINUTES and end.hour < 23
+            and end.date() == scratch.curr_time.date()
+            and scratch.get_f_daily_schedule_index(advance=lead) != 0):
+        index = scratch.get_f_daily_schedule_index(advance=lead + 60)
+        start, task, dur = schedule_blocks(scratch.f_daily_schedule)[index]
+        if _should_decompose(task, dur):
+            upcoming.append((start, task, dur))
+    get_decomp_prefetcher().prefetch(persona, task_decomp_inputs(persona),
+                                     upcoming, generate_task_decomp)
+
+
+def _task_decomp(persona: Persona, index: int) -> list[list]:
+    """Subtasks for schedule block ``index``, prefetched when available."""
+    schedule = persona.scratch.f_daily_schedule
+    act_desp, act_dura = schedule[index]
+    inputs = task_decomp_inputs(persona)
+    if DECOMP_PREFETCH:
+        start = sum(dur for _, dur in schedule[:index])
+        decomp = get_decomp_prefetcher().take(persona, inputs, start,
+                                              act_desp, act_dura)
+        if decomp is not None:
+            return decomp
+    return generate_task_decomp(inputs, act_desp, act_dura)
+
+
+def _determine_action(persona: Persona, maze):
+    """Select current action, decomposing hourly blocks into subtasks."""
     curr_index = persona.scratch.get_f_daily_schedule_index()
     curr_index_60 = persona.scratch.get_f_daily_schedule_index(advance=60)
 
     # Decompose current and next hour's blocks
     if curr_index == 0:
         act_desp, act_dura = persona.scratch.f_daily_schedule[curr_index]
-        if act_dura >= 60 and determine_decomp(act_desp, act_dura):
+        if _should_decompose(act_desp, act_dura):
             persona.scratch.f_daily_schedule[curr_index:curr_index + 1] = (
-                generate_task_decomp(persona, act_desp, act_dura))
+                _task_decomp(persona, curr_index))
         if curr_index_60 + 1 < len(persona.scratch.f_daily_schedule):
             act_desp, act_dura = persona.scratch.f_daily_schedule[curr_index_60 + 1]
-            if act_dura >= 60 and determine_decomp(act_desp, act_dura):
+            if _should_decompose(act_desp, act_dura):
                 persona.scratch.f_daily_schedule[curr_index_60 + 1:curr_index_60 + 2] = (
-                    generate_task_decomp(persona, act_desp, act_dura))
+                    _task_decomp(persona, curr_index_60 + 1))
 
     if curr_index_60 < len(persona.scratch.f_daily_schedule):
         if persona.scratch.curr_time.hour < 23:
             act_desp, act_dura = persona.scratch.f_daily_schedule[curr_index_60]
-            if act_dura >= 60 and determine_decomp(act_desp, act_dura):
+            if _should_decompose(act_desp, act_dura):
                 persona.scratch.f_daily_schedule[curr_index_60:curr_index_60 + 1] = (
-                    generate_task_decomp(persona, act_desp, act_dura))
+                    _task_decomp(persona, curr_index_60))
 
     # Ensure schedule sums to 1440 minutes
     x_emergency = sum(dur for _, dur in persona.scratch.f_daily_schedule)
@@ -576,29 +703,80 @@ def _determine_action(persona: Persona, maze):
     curr_index = persona.scratch.get_f_daily_schedule_index()
     act_desp, act_dura = persona.scratch.f_daily_schedule[curr_index]
 
-    # Determine location
+    (new_address, act_pron, act_event, act_obj_desc, act_obj_pron,
+     act_obj_event) = _action_details(act_desp, persona, maze, FUSED_ACTION)
+
+    persona.scratch.add_new_action(
+        new_address, int(act_dura), act_desp, act_pron, act_event,
+        obj_description=act_obj_desc,
+        obj_pronunciatio=act_obj_pron,
+        obj_event=act_obj_event)
+
+
+def _action_details(act_desp: str, persona: Persona, maze,
+                    fused_mode: bool = False) -> tuple:
+    """Address, emoji, event and object state for a new action.
+
+    With fused_mode, one generate_fused_action() call proposes every field;
+    each one that fails validation (a place not in spatial memory, a
+    malformed triple, ...) is regenerated by its own prompt, along with
+    the fields that depend on it.
+    """
     act_world = maze.access_tile(persona.scratch.curr_tile)["world"]
-    act_sector = generate_action_sector(act_desp, persona, maze)
-    act_arena = generate_action_arena(act_desp, persona, maze,
-                                       act_world, act_sector)
+    fused = generate_fused_action(act_desp, persona, act_world) \
+        if fused_mode else {}
+    s_mem = persona.s_mem
+
+    # Determine location
+    act_sector = _match_option(
+        fused.get("sector"), s_mem.get_str_accessible_sectors(act_world))
+    if act_sector is None:
+        fused.pop("arena", None)
+        act_sector = generate_action_sector(act_desp, persona, maze)
+    act_arena = _match_option(
+        fused.get("arena"),
+        s_mem.get_str_accessible_sector_arenas(f"{act_world}:{act_sector}"))
+    if act_arena is None:
+        fused.pop("object", None)
+        act_arena = generate_action_arena(act_desp, persona, maze,
+                                          act_world, act_sector)
     act_address = f"{act_world}:{act_sector}:{act_arena}"
-    act_game_object = generate_action_game_object(
-        act_desp, act_address, persona, maze)
+    act_game_object = _match_option(
+        fused.get("object"),
+        s_mem.get_str_accessible_arena_game_objects(act_address))
+    if act_game_object is None:
+        fused.pop("object_state", None)
+        act_game_object = generate_action_game_object(
+            act_desp, act_address, persona, maze)
     new_address = f"{act_world}:{act_sector}:{act_arena}:{act_game_object}"
 
-    act_pron = generate_action_pronunciatio(act_desp, persona)
-    act_event = generate_action_event_triple(act_desp, persona)
+    act_pron = _fused_text(fused, "emoji")
+    act_pron = act_pron[:4] if act_pron else \
+        generate_action_pronunciatio(act_desp, persona)
+    act_event = fused.get("event")
+    if (isinstance(act_event, list) and len(act_event) == 3
+            and all(isinstance(e, str) and e.strip() for e in act_event)):
+        act_event = tuple(e.strip() for e in act_event)
+    else:
+        act_event = generate_action_event_triple(act_desp, persona)
 
-    act_obj_desc = generate_act_obj_desc(act_game_object, act_desp, persona)
-    act_obj_pron = generate_action_pronunciatio(act_obj_desc, persona)
+    act_obj_desc = _fused_text(fused, "object_state")
+    if act_obj_desc:
+        act_obj_desc = act_obj_desc[:80]
+        act_obj_pron = _fused_text(fused, "object_emoji")
+    else:
+        act_obj_desc = generate_act_obj_desc(
+            act_game_object, act_desp, persona)
+        act_obj_pron = None
+    act_obj_pron = act_obj_pron[:4] if act_obj_pron else \
+        generate_action_pronunciatio(act_obj_desc, persona)
     act_obj_event = generate_act_obj_event_triple(
         act_game_object, act_obj_desc, persona)
 
-    persona.scratch.add_new_action(
-        new_address, int(act_dura), act_desp, act_pron, act_event,
-        obj_description=act_obj_desc,
-        obj_pronunciatio=act_obj_pron,
-        obj_event=act_obj_event)
+    if fused_mode:
+        log.debug("  %s: fused action -> %s", persona.name, new_address)
+    return (new_address, act_pron, act_event, act_obj_desc, act_obj_pron,
+            act_obj_event)
 
 
 def _choose_retrieved(persona: Persona, retrieved: dict):
@@ -615,14 +793,14 @@ def _choose_retrieved(persona: Persona, retrieved: dict):
         if ":" not in curr.subject and curr.subject != persona.name:
             priority.append(rel_ctx)
     if priority:
-        return random.choice(priority)
+        return persona.rng.choice(priority)
 
     # Skip idle
     for event_desc, rel_ctx in retrieved.items():
         if "is idle" not in event_desc:
             priority.append(rel_ctx)
     if priority:
-        return random.choice(priority)
+        return persona.rng.choice(priority)
     return None
 
 
@@ -752,20 +930,44 @@ def _wait_react(persona: Persona, reaction_mode: str):
         act_event)
 
 
-def plan(persona: Persona, maze, personas: dict, new_day, retrieved: dict):
+def resolve_deferred_chat(maze, persona: Persona, focused_event,
+                          reaction_mode: str, personas: dict) -> bool:
+    """Start a chat that was deferred by a concurrent plan() call.
+
+    Either side may have been paired with someone else earlier in the
+    commit order, in which case the chat is dropped. Returns True if the
+    conversation was started.
+    """
+    target_persona = personas[reaction_mode[9:].strip()]
+    if persona.scratch.chatting_with or target_persona.scratch.chatting_with:
+        log.info("  %s: dropped deferred %s (already chatting)",
+                 persona.name, reaction_mode)
+        return False
+    _chat_react(maze, persona, focused_event, reaction_mode, personas)
+    return True
+
+
+def plan(persona: Persona, maze, personas: dict, new_day, retrieved: dict,
+         deferred_chats: list | None = None):
     """Main planning entry point.
 
     1. Long-term planning on new day
     2. Determine action when current one finishes
     3. React to perceived events (chat/wait)
+
+    If ``deferred_chats`` is a list, chat reactions are appended to it as
+    (focused_event, reaction_mode) instead of being run here, and the
+    chat bookkeeping is left to the caller; see resolve_deferred_chat()
+    and update_chat_state().
     """
     # PART 1: Long-term planning
     if new_day:
-        _long_term_planning(persona, new_day)
+        long_term_planning(persona, new_day)
 
     # PART 2: Short-term action selection
     if persona.scratch.act_check_finished():
         _determine_action(persona, maze)
+    _prefetch_decomps(persona)
 
     # PART 3: Reaction to perceived events
     focused_event = None
@@ -776,11 +978,29 @@ def plan(persona: Persona, maze, personas: dict, new_day, retrieved: dict):
         reaction_mode = _should_react(persona, focused_event, personas)
         if reaction_mode:
             if str(reaction_mode).startswith("chat with"):
-                _chat_react(maze, persona, focused_event,
-                            reaction_mode, personas)
+                if deferred_chats is not None:
+                    deferred_chats.append((focused_event, reaction_mode))
+                else:
+                    _chat_react(maze, persona, focused_event,
+                                reaction_mode, personas)
             elif str(reaction_mode).startswith("wait"):
                 _wait_react(persona, reaction_mode)
 
+    if deferred_chats is None:
+        update_chat_state(persona)
+
+    return persona.scratch.act_address
+
+
+def update_chat_state(persona: Persona):
+    """End-of-plan chat bookkeeping: clear a finished chat and count down
+    the buffers that stop a pair from chatting again straight away.
+
+    plan() runs this itself unless chats are deferred; then the caller
+    runs it once the persona's deferred chats are resolved, so a chat
+    started in the commit phase is counted in the same step as in a
+    serial run.
+    """
     # Chat state cleanup
     if persona.scratch.act_event[1] != "chat with":
         persona.scratch.chatting_with = None
@@ -793,5 +1013,3 @@ def plan(persona: Persona, maze, personas: dict, new_day, retrieved: dict):
             persona.scratch.chatting_with_buffer[pname] -= 1
             if persona.scratch.chatting_with_buffer[pname] <= 0:
                 del persona.scratch.chatting_with_buffer[pname]
-
-    return persona.scratch.act_address
@@ -0,0 +1,139 @@
+"""
+Poignancy Scoring
+
+Rates several memory descriptions in one LLM prompt that returns a
+numbered list. Entries missing from the answer (or out of range) fall
+back to the caller's one-at-a-time prompt, all awaited together on the
+LLM loop so they share the global request limit. Scores the model actually
+gave are memoized in a persistent store, since descriptions such as "bed
+is being used" recur constantly across personas and runs. The key is the
+model, the event type (perceive and reflect rate with different prompts),
+MEMO_VERSION and the description, so a new model or a reworded prompt
+(bump MEMO_VERSION) starts afresh. A fail-safe score is used for that
+call only and never memoized.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import TYPE_CHECKING, Callable, Optional
+
+from backend.config import LLM_MODEL, POIGNANCY_MEMO, POIGNANCY_MEMO_PATH
+from backend.llm.llm_client import (
+    agather, asafe_generate_response, run_async, safe_generate_response)
+from backend.llm.response_cache import ResponseCache
+
+if TYPE_CHECKING:
+    from backend.persona.persona import Persona
+
+log = logging.getLogger(__name__)
+
+# Score of a description the model could not rate
+FAIL_SAFE = 5
+
+# Part of every memo key; bump when a poignancy prompt changes
+MEMO_VERSION = 1
+
+_memo: Optional[ResponseCache] = None
+_LINE = re.compile(r"^\s*(\d+)\s*[.):\-]\s*(\d+)")
+
+
+def get_poignancy_memo() -> Optional[ResponseCache]:
+    global _memo
+    if _memo is None and POIGNANCY_MEMO:
+        _memo = ResponseCache(POIGNANCY_MEMO_PATH, "always")
+    return _memo
+
+
+def _memo_key(event_type: str, desc: str) -> str:
+    return f"{LLM_MODEL}:{event_type}:v{MEMO_VERSION}:{desc}"
+
+
+def generate_poig_scores(descriptions: list[str]) -> dict[int, int]:
+    """One prompt for several descriptions. Returns {index: score} for
+    the entries the answer rated 1-10."""
+    listing = "\n".join(f"{i + 1}. {d}" for i, d in enumerate(descriptions))
+    prompt = (
+        f"On the scale of 1 to 10, where 1 is purely mundane (e.g., brushing "
+        f"teeth, making bed) and 10 is extremely poignant (e.g., a break up, "
+        f"college acceptance), rate the likely poignancy of each of the "
+        f"following pieces of memory.\n"
+        f"{listing}\n"
+        f"Answer with one line per memory, \"<number>. <rating>\", and "
+        f"nothing else."
+    )
+
+    def parse(resp):
+        scores = {}
+        for line in resp.splitlines():
+            m = _LINE.match(line)
+            if m:
+                i, score = int(m.group(1)) - 1, int(m.group(2))
+                if 0 <= i < len(descriptions) and 1 <= score <= 10:
+                    scores.setdefault(i, score)
+        return scores
+
+    def validate(resp, _):
+        return bool(parse(resp))
+
+    def cleanup(resp, _):
+        return parse(resp)
+
+    gpt_param = {"temperature": 0.3, "max_tokens": 8 * len(descriptions) + 16}
+    return safe_generate_response(prompt, gpt_param, 2, {}, validate, cleanup)
+
+
+def score_poignancy(persona: Persona, event_type: str,
+                    descriptions: list[str],
+                    single: Callable[[str, Optional[int]], tuple]
+                    ) -> list[int]:
+    """Poignancy 1-10 for each description, in order.
+
+    ``single`` builds the caller's per-item prompt (poig_score_request of
+    perceive or reflect) as safe_generate_response() arguments, with a
+    fail-safe of None so that a failed rating is recognized. It rates a
+    lone description, keeping that case identical to before, and every
+    entry the batch answer missed.
+    """
+    memo = get_poignancy_memo()
+    scores: dict[str, int] = {}
+    todo = []
+    for desc in dict.fromkeys(descriptions):
+        if "is idle" in desc:
+            scores[desc] = 1
+            continue
+        cached = memo.get(_memo_key(event_type, desc)) if memo else None
+        if cached is not None:
+            scores[desc] = int(cached)
+        else:
+            todo.append(desc)
+
+    batch = generate_poig_scores(todo) if len(todo) > 1 else {}
+    missed = [desc for i, desc in enumerate(todo) if i not in batch]
+    if len(missed) > 1:
+        results = run_async(agather(*(
+            asafe_generate_response(*single(desc, None)) for desc in missed)))
+    else:
+        results = [safe_generate_response(*single(desc, None))
+                   for desc in missed]
+    singles = {}
+    for desc, result in zip(missed, results):
+        if isinstance(result, Exception):
+            log.warning("  %s: poignancy of %r failed: %s",
+                        persona.name, desc, result)
+            result = None
+        singles[desc] = result
+
+    for i, desc in enumerate(todo):
+        score = batch[i] if i in batch else singles[desc]
+        if score is None:
+            scores[desc] = FAIL_SAFE
+            continue
+        scores[desc] = score
+        if memo:
+            memo.put(_memo_key(event_type, desc), str(score))
+    if len(todo) > 1:
+        log.debug("  %s: scored %d %ss in one prompt (%d fell back)",
+                  persona.name, len(todo), event_type, len(todo) - len(batch))
+    return [scores[desc] for desc in descriptions]
@@ -4,16 +4,23 @@ Reflect Module
 When accumulated importance exceeds threshold, generates focal points,
 retrieves evidence, and produces higher-level insights stored as thoughts.
 Also handles post-conversation reflection.
+
+The prompts of one stage do not depend on each other (insights per focal
+point, a triple per insight), so each stage is awaited together on the LLM
+loop with agather() and shares the global request limit.
 """
 
 from __future__ import annotations
 
 import datetime
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from backend.llm.embedding import get_embedding
-from backend.llm.llm_client import safe_generate_response, ChatGPT_single_request
+from backend.llm.embedding import get_embeddings
+from backend.llm.llm_client import (
+    achat_completion, agather, asafe_generate_response, run_async,
+    safe_generate_response)
+from backend.persona.cognitive_modules.poignancy import score_poignancy
 from backend.persona.cognitive_modules.retrieve import new_retrieve
 
 if TYPE_CHECKING:
@@ -54,8 +61,8 @@ def generate_focal_points(persona: Persona, n: int = 3) -> list[str]:
     return safe_generate_response(prompt, gpt_param, 3, [], validate, cleanup)
 
 
-def generate_insights_and_evidence(persona: Persona, nodes: list,
-                                    n: int = 5) -> dict:
+async def generate_insights_and_evidence(persona: Persona, nodes: list,
+                                          n: int = 5) -> dict:
     statements = ""
     for count, node in enumerate(nodes):
         statements += f"{count}. {node.embedding_key}\n"
@@ -93,10 +100,12 @@ def generate_insights_and_evidence(persona: Persona, nodes: list,
         return ret
 
     gpt_param = {"temperature": 0.7, "max_tokens": 512}
-    return safe_generate_response(prompt, gpt_param, 3, {}, validate, cleanup)
+    return await asafe_generate_response(prompt, gpt_param, 3, {}, validate,
+                                         cleanup)
 
 
-def generate_action_event_triple(act_desp: str, persona: Persona) -> tuple:
+async def generate_action_event_triple(act_desp: str,
+                                       persona: Persona) -> tuple:
     prompt = (
         f"Convert the following action description into a "
         f"(subject, predicate, object) triple:\n"
@@ -115,16 +124,14 @@ def generate_action_event_triple(act_desp: str, persona: Persona) -> tuple:
         return (persona.scratch.name, "is", act_desp)
 
     gpt_param = {"temperature": 0.3, "max_tokens": 64}
-    return safe_generate_response(
+    return await asafe_generate_response(
         prompt, gpt_param, 3,
         (persona.scratch.name, "is", act_desp),
         validate, cleanup)
 
 
-def generate_poig_score(persona: Persona, event_type: str,
-                        description: str) -> int:
-    if "is idle" in description:
-        return 1
+def poig_score_request(description: str,
+                       fail_safe: Optional[int] = 5) -> tuple:
     prompt = (
         f"On the scale of 1 to 10, where 1 is purely mundane and 10 is "
         f"extremely poignant, rate the likely poignancy of:\n"
@@ -139,32 +146,31 @@ def generate_poig_score(persona: Persona, event_type: str,
             return False
 
     def cleanup(resp, _):
-        return int(resp.strip().split()[0])
+        return min(max(int(resp.strip().split()[0]), 1), 10)
 
     gpt_param = {"temperature": 0.3, "max_tokens": 8}
-    return min(max(safe_generate_response(
-        prompt, gpt_param, 3, 5, validate, cleanup), 1), 10)
+    return prompt, gpt_param, 3, fail_safe, validate, cleanup
 
 
-def generate_planning_thought_on_convo(persona: Persona,
-                                        all_utt: str) -> str:
+async def generate_planning_thought_on_convo(persona: Persona,
+                                              all_utt: str) -> str:
     prompt = (
         f"{persona.scratch.name} just had this conversation:\n"
         f"{all_utt}\n"
         f"What planning thought would {persona.scratch.name} have? "
         f"Respond in one sentence."
     )
-    return ChatGPT_single_request(prompt)
+    return await achat_completion([{"role": "user", "content": prompt}])
 
 
-def generate_memo_on_convo(persona: Persona, all_utt: str) -> str:
+async def generate_memo_on_convo(persona: Persona, all_utt: str) -> str:
     prompt = (
         f"{persona.scratch.name} just had this conversation:\n"
         f"{all_utt}\n"
         f"Summarize what {persona.scratch.name} would remember. "
         f"Respond in one sentence starting with a verb."
     )
-    return ChatGPT_single_request(prompt)
+    return await achat_completion([{"role": "user", "content": prompt}])
 
 
 def run_reflect(persona: Persona):
@@ -175,27 +181,49 @@ def run_reflect(persona: Persona):
 
     retrieved = new_retrieve(persona, focal_points)
 
-    for focal_pt, nodes in retrieved.items():
-        if not nodes:
-            continue
-        thoughts = generate_insights_and_evidence(persona, nodes, 5)
+    groups = [nodes for nodes in retrieved.values() if nodes]
+    insights = _gathered(agather(*(
+        generate_insights_and_evidence(persona, nodes, 5)
+        for nodes in groups)))
+    evidenced = []
+    for nodes, thoughts in zip(groups, insights):
         for thought, evi_raw in thoughts.items():
             evidence_ids = []
             for i in evi_raw:
                 if i < len(nodes):
                     evidence_ids.append(nodes[i].node_id)
-
-            created = persona.scratch.curr_time
-            expiration = created + datetime.timedelta(days=30)
-            s, p, o = generate_action_event_triple(thought, persona)
-            keywords = set([s, p, o])
-            thought_poignancy = generate_poig_score(persona, "thought", thought)
-            thought_embedding = (thought, get_embedding(thought))
-
-            persona.a_mem.add_thought(
-                created, expiration, s, p, o,
-                thought, keywords, thought_poignancy,
-                thought_embedding, evidence_ids)
+            evidenced.append((thought, evidence_ids))
+
+    triples = _gathered(agather(*(
+        generate_action_event_triple(thought, persona)
+        for thought, _ in evidenced)))
+    pending = [(thought, triple, evidence_ids)
+               for (thought, evidence_ids), triple in zip(evidenced, triples)]
+
+    # One batched poignancy prompt and embedding call for every insight
+    thoughts = [thought for thought, *_ in pending]
+    poignancies = score_poignancy(persona, "thought", thoughts,
+                                  poig_score_request)
+    embeddings = get_embeddings(thoughts)
+    created = persona.scratch.curr_time
+    expiration = created + datetime.timedelta(days=30)
+    for (thought, (s, p, o), evidence_ids), thought_poignancy, emb in zip(
+            pending, poignancies, embeddings):
+        keywords = set([s, p, o])
+        persona.a_mem.add_thought(
+            created, expiration, s, p, o,
+            thought, keywords, thought_poignancy,
+            (thought, emb), evidence_ids)
+
+
+def _gathered(gather) -> list:
+    """Results of an agather(), raising the first failure like the
+    sequential calls it replaces."""
+    results = run_async(gather)
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+    return results
 
 
 def reflection_trigger(persona: Persona) -> bool:
@@ -230,31 +258,29 @@ def reflect(persona: Persona):
             if last_chat:
                 evidence = [last_chat.node_id]
 
-            # Planning thought
-            planning_thought = generate_planning_thought_on_convo(
-                persona, all_utt)
+            # Planning and memo thoughts
+            planning_thought, memo = _gathered(agather(
+                generate_planning_thought_on_convo(persona, all_utt),
+                generate_memo_on_convo(persona, all_utt)))
             planning_thought = (
                 f"For {persona.scratch.name}'s planning: {planning_thought}")
+            memo = f"{persona.scratch.name} {memo}"
+
+            (s, p, o), (s2, p2, o2) = _gathered(agather(
+                generate_action_event_triple(planning_thought, persona),
+                generate_action_event_triple(memo, persona)))
+            poignancy, poignancy2 = score_poignancy(
+                persona, "thought", [planning_thought, memo],
+                poig_score_request)
 
+            plan_emb, memo_emb = get_embeddings([planning_thought, memo])
             created = persona.scratch.curr_time
             expiration = created + datetime.timedelta(days=30)
-            s, p, o = generate_action_event_triple(planning_thought, persona)
-            keywords = set([s, p, o])
-            poignancy = generate_poig_score(
-                persona, "thought", planning_thought)
-            emb = (planning_thought, get_embedding(planning_thought))
             persona.a_mem.add_thought(
                 created, expiration, s, p, o,
-                planning_thought, keywords, poignancy, emb, evidence)
-
-            # Memo thought
-            memo = generate_memo_on_convo(persona, all_utt)
-            memo = f"{persona.scratch.name} {memo}"
-
-            s2, p2, o2 = generate_action_event_triple(memo, persona)
-            keywords2 = set([s2, p2, o2])
-            poignancy2 = generate_poig_score(persona, "thought", memo)
-            emb2 = (memo, get_embedding(memo))
+                planning_thought, set([s, p, o]), poignancy,
+                (planning_thought, plan_emb), evidence)
             persona.a_mem.add_thought(
                 created, expiration, s2, p2, o2,
-                memo, keywords2, poignancy2, emb2, evidence)
+                memo, set([s2, p2, o2]), poignancy2,
+                (memo, memo_emb), evidence)
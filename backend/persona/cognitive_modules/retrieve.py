@@ -7,9 +7,12 @@ Includes both keyword-based retrieve() and three-factor new_retrieve().
 
 from __future__ import annotations
 
+import datetime
 from typing import TYPE_CHECKING
 
-from backend.llm.embedding import get_embedding, cos_sim
+import numpy as np
+
+from backend.llm.embedding import get_embedding, get_embeddings
 
 if TYPE_CHECKING:
     from backend.persona.persona import Persona
@@ -51,14 +54,9 @@ def extract_importance(persona: Persona, nodes: list[ConceptNode]) -> dict:
 def extract_relevance(persona: Persona, nodes: list[ConceptNode],
                       focal_pt: str) -> dict:
     focal_embedding = get_embedding(focal_pt)
-    result = {}
-    for node in nodes:
-        node_emb = persona.a_mem.embeddings.get(node.embedding_key)
-        if node_emb:
-            result[node.node_id] = cos_sim(node_emb, focal_embedding)
-        else:
-            result[node.node_id] = 0.0
-    return result
+    scores = persona.a_mem.relevance(nodes, focal_embedding)
+    return {node.node_id: float(score)
+            for node, score in zip(nodes, scores)}
 
 
 def retrieve(persona: Persona, perceived: list) -> dict:
@@ -79,10 +77,96 @@ def retrieve(persona: Persona, perceived: list) -> dict:
     return retrieved
 
 
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+# Global weights [recency, relevance, importance]
+_GW = [0.5, 3, 2]
+
+
+def _normalize(arr: np.ndarray) -> np.ndarray:
+    """Array version of normalize_dict_floats(d, 0, 1)."""
+    min_val = arr.min()
+    range_val = arr.max() - min_val
+    if range_val == 0:
+        return np.full(arr.shape, 0.5)
+    return (arr - min_val) * 1 / range_val + 0
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, highest first.
+
+    Ties keep their original order, matching a stable descending sort.
+    """
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    idx = np.concatenate([above, ties])
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
 def new_retrieve(persona: Persona, focal_points: list[str],
                  n_count: int = 30) -> dict:
     """Three-factor retrieval: recency + importance + relevance.
 
+    All three components are independently normalized to [0, 1],
+    then combined with global weights gw = [0.5, 3, 2] and
+    per-persona weights (recency_w, relevance_w, importance_w).
+
+    Vectorized: relevance for every focal point comes from one matrix
+    multiply, and each focal point only re-sorts a timestamp array (the
+    nodes retrieved for earlier focal points become most recent).
+    """
+    if not focal_points:
+        return {}
+
+    nodes = [i for i in persona.a_mem.seq_event + persona.a_mem.seq_thought
+             if "idle" not in i.embedding_key]
+    if not nodes:
+        return {focal_pt: [] for focal_pt in focal_points}
+
+    scratch = persona.scratch
+    accessed = np.array([(n.last_accessed - _EPOCH).total_seconds()
+                         for n in nodes])
+    importance = _normalize(
+        np.array([n.poignancy for n in nodes], dtype=np.float64))
+    relevance = persona.a_mem.relevance_matrix(
+        nodes, get_embeddings(focal_points)).astype(np.float64)
+    recency = _normalize(scratch.recency_decay
+                         ** np.arange(1, len(nodes) + 1, dtype=np.float64))
+    now = (scratch.curr_time - _EPOCH).total_seconds()
+
+    retrieved = {}
+    for col, focal_pt in enumerate(focal_points):
+        # Oldest access first; ties keep seq_event + seq_thought order
+        order = np.argsort(accessed, kind="stable")
+        master = (scratch.recency_w * recency * _GW[0]
+                  + scratch.relevance_w * _normalize(relevance[order, col])
+                  * _GW[1]
+                  + scratch.importance_w * importance[order] * _GW[2])
+
+        top = order[_top_k(master, n_count)]
+        master_nodes = [nodes[i] for i in top]
+
+        # Update last_accessed
+        for n in master_nodes:
+            n.last_accessed = scratch.curr_time
+        accessed[top] = now
+
+        retrieved[focal_pt] = master_nodes
+
+    return retrieved
+
+
+def new_retrieve_dict(persona: Persona, focal_points: list[str],
+                      n_count: int = 30) -> dict:
+    """Dict-based three-factor retrieval (the original implementation).
+
+    Kept as the reference that new_retrieve() is checked against.
+
     All three components are independently normalized to [0, 1],
     then combined with global weights gw = [0.5, 3, 2] and
     per-persona weights (recency_w, relevance_w, importance_w).
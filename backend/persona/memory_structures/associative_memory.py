@@ -12,6 +12,17 @@ import datetime
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
+
+from backend.persona.memory_structures.embedding_store import EmbeddingStore
+from backend.persona.memory_structures.storage import (
+    COMPACT_AFTER_SEGMENTS, FORMAT_VERSION, KW_STRENGTH_FILE,
+    LEGACY_EMBEDDINGS_FILE, LEGACY_NODES_FILE, base_dir, base_name,
+    detect_format, kw_strength_file, read_manifest, read_nodes,
+    read_segment_embeddings, remove_base, remove_segments, segment_name,
+    segments_on_disk, stale_bases, write_kw_strength, write_manifest,
+    write_nodes, write_segment)
+
 
 class ConceptNode:
     def __init__(self, node_id, node_count, type_count, node_type, depth,
@@ -56,92 +67,202 @@ class AssociativeMemory:
         self.kw_strength_event: dict[str, int] = {}
         self.kw_strength_thought: dict[str, int] = {}
 
-        self.embeddings: dict[str, list[float]] = {}
+        # embedding_key -> normalised float32 row; node_id -> row index
+        self.embeddings = EmbeddingStore()
+        self.id_to_row: dict[str, int] = {}
+
+        # Where this memory was last loaded from / saved to, and what is
+        # already there, so the next save there only appends a segment
+        self._saved_dir: Optional[str] = None
+        self._saved_nodes = 0
+        self._base = 0
+        self._segments: list[str] = []
 
         # Load from saved files
-        embeddings_path = f_saved + "/embeddings.json"
-        if Path(embeddings_path).exists():
-            self.embeddings = json.load(open(embeddings_path))
-
-        nodes_path = f_saved + "/nodes.json"
-        if Path(nodes_path).exists():
-            nodes_load = json.load(open(nodes_path))
-            for count in range(len(nodes_load.keys())):
-                node_id = f"node_{count + 1}"
-                if node_id not in nodes_load:
-                    continue
-                nd = nodes_load[node_id]
-
-                created = datetime.datetime.strptime(nd["created"],
-                                                     '%Y-%m-%d %H:%M:%S')
-                expiration = None
-                if nd["expiration"]:
-                    expiration = datetime.datetime.strptime(
-                        nd["expiration"], '%Y-%m-%d %H:%M:%S')
-
-                embedding_pair = (nd["embedding_key"],
-                                  self.embeddings.get(nd["embedding_key"], []))
-                keywords = set(nd["keywords"])
-
-                if nd["type"] == "event":
-                    self.add_event(created, expiration, nd["subject"],
-                                   nd["predicate"], nd["object"],
-                                   nd["description"], keywords,
-                                   nd["poignancy"], embedding_pair,
-                                   nd["filling"])
-                elif nd["type"] == "chat":
-                    self.add_chat(created, expiration, nd["subject"],
-                                  nd["predicate"], nd["object"],
-                                  nd["description"], keywords,
-                                  nd["poignancy"], embedding_pair,
-                                  nd["filling"])
-                elif nd["type"] == "thought":
-                    self.add_thought(created, expiration, nd["subject"],
-                                     nd["predicate"], nd["object"],
-                                     nd["description"], keywords,
-                                     nd["poignancy"], embedding_pair,
-                                     nd["filling"])
-
-        kw_path = f_saved + "/kw_strength.json"
-        if Path(kw_path).exists():
+        version = detect_format(f_saved)
+        kw_path = Path(f_saved) / KW_STRENGTH_FILE
+        if version in (2, 3, 4):
+            self._load_binary(f_saved)
+            kw_path = Path(f_saved) / kw_strength_file(read_manifest(f_saved))
+        elif version == 1:
+            self._load_legacy(f_saved)
+
+        if kw_path.exists():
             kw_load = json.load(open(kw_path))
             if kw_load.get("kw_strength_event"):
                 self.kw_strength_event = kw_load["kw_strength_event"]
             if kw_load.get("kw_strength_thought"):
                 self.kw_strength_thought = kw_load["kw_strength_thought"]
 
+    def _load_legacy(self, f_saved: str):
+        """Import the version 1 nodes.json / embeddings.json layout."""
+        embeddings_path = f_saved + "/" + LEGACY_EMBEDDINGS_FILE
+        if Path(embeddings_path).exists():
+            self.embeddings = EmbeddingStore.from_dict(
+                json.load(open(embeddings_path)))
+
+        nodes_load = json.load(open(f_saved + "/" + LEGACY_NODES_FILE))
+        self._add_loaded_nodes(
+            nodes_load[f"node_{count + 1}"]
+            for count in range(len(nodes_load.keys()))
+            if f"node_{count + 1}" in nodes_load)
+
+    def _load_binary(self, f_saved: str):
+        """Load a version 2-4 base (memory-mapped) plus any segments."""
+        manifest = read_manifest(f_saved)
+        base = manifest.get("base", 0)
+        self.embeddings = EmbeddingStore.load(base_dir(f_saved, base))
+        self._add_loaded_nodes(read_nodes(base_dir(f_saved, base)))
+
+        segments = manifest["segments"]
+        for name in segments:
+            keys, raw_rows = read_segment_embeddings(f_saved, name)
+            self.embeddings.update(keys, raw_rows)
+            self._add_loaded_nodes(read_nodes(f_saved, f"{name}.jsonl"))
+
+        self.embeddings.mark_clean()
+        self._saved_dir = str(Path(f_saved).resolve())
+        self._saved_nodes = len(self.id_to_node)
+        self._base = base
+        self._segments = list(segments)
+
+    def _add_loaded_nodes(self, records):
+        """Bulk equivalent of calling add_event/add_chat/add_thought in order.
+
+        The add_* methods insert at the front of every list, which is
+        quadratic over a long history; here nodes are appended and each
+        list is reversed once at the end.
+        """
+        seq = {"event": [], "thought": [], "chat": []}
+        kw_lists = {"event": {}, "thought": {}, "chat": {}}
+        kw_strength = {"event": self.kw_strength_event,
+                       "thought": self.kw_strength_thought}
+        existing = {"event": self.seq_event, "thought": self.seq_thought,
+                    "chat": self.seq_chat}
+
+        for nd in records:
+            node_type = nd["type"]
+            if node_type not in seq:
+                continue
+            node_count = len(self.id_to_node) + 1
+            type_count = len(existing[node_type]) + len(seq[node_type]) + 1
+            node_id = f"node_{node_count}"
+
+            description = nd["description"]
+            if node_type == "event" and "(" in description:
+                description = (" ".join(description.split()[:3]) + " "
+                               + description.split("(")[-1][:-1])
+
+            created = datetime.datetime.fromisoformat(nd["created"])
+            expiration = (datetime.datetime.fromisoformat(nd["expiration"])
+                          if nd["expiration"] else None)
+            keywords = set(nd["keywords"])
+            node = ConceptNode(node_id, node_count, type_count, node_type,
+                               1 if node_type == "thought" else 0,
+                               created, expiration, nd["subject"],
+                               nd["predicate"], nd["object"], description,
+                               nd["embedding_key"], nd["poignancy"],
+                               keywords, nd["filling"])
+
+            seq[node_type].append(node)
+            kw_lower = [i.lower() for i in keywords]
+            for kw in kw_lower:
+                kw_lists[node_type].setdefault(kw, []).append(node)
+            self.id_to_node[node_id] = node
+
+            if (node_type in kw_strength
+                    and f"{node.predicate} {node.object}" != "is idle"):
+                strength = kw_strength[node_type]
+                for kw in kw_lower:
+                    strength[kw] = strength.get(kw, 0) + 1
+
+            # Vector is already in the store; None leaves it untouched
+            self._index_embedding(node_id, (node.embedding_key, None))
+
+        self.seq_event = seq["event"][::-1] + self.seq_event
+        self.seq_thought = seq["thought"][::-1] + self.seq_thought
+        self.seq_chat = seq["chat"][::-1] + self.seq_chat
+        for node_type, kw_to in (("event", self.kw_to_event),
+                                 ("thought", self.kw_to_thought),
+                                 ("chat", self.kw_to_chat)):
+            for kw, added in kw_lists[node_type].items():
+                kw_to[kw] = added[::-1] + kw_to.get(kw, [])
+
     def save(self, out_json: str):
-        Path(out_json).mkdir(parents=True, exist_ok=True)
+        """Save in the current on-disk format.
 
-        r = {}
-        for count in range(len(self.id_to_node.keys()), 0, -1):
-            node_id = f"node_{count}"
-            node = self.id_to_node[node_id]
-            r[node_id] = {
-                "node_count": node.node_count,
-                "type_count": node.type_count,
-                "type": node.type,
-                "depth": node.depth,
-                "created": node.created.strftime('%Y-%m-%d %H:%M:%S'),
-                "expiration": (node.expiration.strftime('%Y-%m-%d %H:%M:%S')
-                               if node.expiration else None),
-                "subject": node.subject,
-                "predicate": node.predicate,
-                "object": node.object,
-                "description": node.description,
-                "embedding_key": node.embedding_key,
-                "poignancy": node.poignancy,
-                "keywords": list(node.keywords),
-                "filling": node.filling,
-            }
-
-        with open(out_json + "/nodes.json", "w") as f:
-            json.dump(r, f)
-        with open(out_json + "/kw_strength.json", "w") as f:
-            json.dump({"kw_strength_event": self.kw_strength_event,
-                        "kw_strength_thought": self.kw_strength_thought}, f)
-        with open(out_json + "/embeddings.json", "w") as f:
-            json.dump(self.embeddings, f)
+        Saving again to the folder last saved to (or loaded from) appends
+        one segment with just the new nodes and embeddings; otherwise, or
+        once COMPACT_AFTER_SEGMENTS have piled up, everything is compacted
+        into a fresh base.
+        """
+        Path(out_json).mkdir(parents=True, exist_ok=True)
+        manifest = read_manifest(out_json)
+        incremental = (
+            str(Path(out_json).resolve()) == self._saved_dir
+            and manifest is not None
+            and manifest["version"] == FORMAT_VERSION
+            and manifest.get("nodes") == self._saved_nodes
+            and manifest.get("base") == self._base
+            and manifest["segments"] == self._segments
+            and len(self._segments) < COMPACT_AFTER_SEGMENTS)
+        if incremental:
+            self._append_segment(out_json)
+        else:
+            self.compact(out_json)
+
+    def compact(self, out_json: str):
+        """Write every node and embedding into a new base generation,
+        dropping segments. The old generation is deleted only once the
+        manifest points at the new one."""
+        Path(out_json).mkdir(parents=True, exist_ok=True)
+        old = read_manifest(out_json)
+        old_base = old.get("base", 0) if old is not None else None
+        generation = (old_base or 0) + 1
+
+        new_dir = base_dir(out_json, generation)
+        new_dir.mkdir(exist_ok=True)
+        write_nodes(str(new_dir), self._nodes_from(1))
+        self.embeddings.save(str(new_dir))
+        write_kw_strength(new_dir / KW_STRENGTH_FILE, self._kw_strength())
+        write_manifest(out_json, len(self.id_to_node), generation, [],
+                       f"{base_name(generation)}/{KW_STRENGTH_FILE}")
+
+        remove_segments(out_json, segments_on_disk(out_json))
+        if old is not None:
+            remove_base(out_json, old_base)
+        for stale in stale_bases(out_json, generation):
+            remove_base(out_json, stale)
+
+        self.embeddings.mark_clean()
+        self._saved_dir = str(Path(out_json).resolve())
+        self._saved_nodes = len(self.id_to_node)
+        self._base = generation
+        self._segments = []
+
+    def _append_segment(self, out_json: str):
+        keys, raw_rows = self.embeddings.pending()
+        new_nodes = self._nodes_from(self._saved_nodes + 1)
+        if not new_nodes and not keys:
+            return
+        name = segment_name(len(self._segments) + 1)
+        write_segment(out_json, name, new_nodes, keys, raw_rows,
+                      self._kw_strength())
+        segments = self._segments + [name]
+        write_manifest(out_json, len(self.id_to_node), self._base, segments,
+                       f"{name}.kw.json")
+
+        self.embeddings.mark_clean()
+        self._saved_nodes = len(self.id_to_node)
+        self._segments = segments
+
+    def _nodes_from(self, first_count: int) -> list[ConceptNode]:
+        return [self.id_to_node[f"node_{count}"]
+                for count in range(first_count, len(self.id_to_node) + 1)]
+
+    def _kw_strength(self) -> dict:
+        return {"kw_strength_event": self.kw_strength_event,
+                "kw_strength_thought": self.kw_strength_thought}
 
     def add_event(self, created, expiration, s, p, o, description,
                   keywords, poignancy, embedding_pair, filling):
@@ -168,7 +289,7 @@ class AssociativeMemory:
                 self.kw_strength_event[kw] = \
                     self.kw_strength_event.get(kw, 0) + 1
 
-        self.embeddings[embedding_pair[0]] = embedding_pair[1]
+        self._index_embedding(node_id, embedding_pair)
         return node
 
     def add_thought(self, created, expiration, s, p, o, description,
@@ -193,7 +314,7 @@ class AssociativeMemory:
                 self.kw_strength_thought[kw] = \
                     self.kw_strength_thought.get(kw, 0) + 1
 
-        self.embeddings[embedding_pair[0]] = embedding_pair[1]
+        self._index_embedding(node_id, embedding_pair)
         return node
 
     def add_chat(self, created, expiration, s, p, o, description,
@@ -212,9 +333,38 @@ class AssociativeMemory:
             self.kw_to_chat.setdefault(kw, []).insert(0, node)
         self.id_to_node[node_id] = node
 
-        self.embeddings[embedding_pair[0]] = embedding_pair[1]
+        self._index_embedding(node_id, embedding_pair)
         return node
 
+    def _index_embedding(self, node_id: str, embedding_pair):
+        self.embeddings[embedding_pair[0]] = embedding_pair[1]
+        self.id_to_row[node_id] = self.embeddings.row(embedding_pair[0])
+
+    def node_rows(self, nodes: list[ConceptNode]) -> np.ndarray:
+        """Embedding-matrix row for each node (-1 if it has none)."""
+        rows = np.empty(len(nodes), dtype=np.int64)
+        for i, node in enumerate(nodes):
+            row = self.id_to_row.get(node.node_id, -1)
+            if row < 0:
+                # The key may have been embedded after this node was added
+                row = self.embeddings.row(node.embedding_key)
+                if row >= 0:
+                    self.id_to_row[node.node_id] = row
+            rows[i] = row
+        return rows
+
+    def relevance(self, nodes: list[ConceptNode], focal_embedding
+                  ) -> np.ndarray:
+        """Cosine similarity of each node's embedding to a focal point."""
+        return self.embeddings.similarities(focal_embedding,
+                                            self.node_rows(nodes))
+
+    def relevance_matrix(self, nodes: list[ConceptNode], focal_embeddings
+                         ) -> np.ndarray:
+        """(len(nodes), len(focal_embeddings)) cosine similarities."""
+        return self.embeddings.similarity_matrix(focal_embeddings,
+                                                 self.node_rows(nodes))
+
     def get_summarized_latest_events(self, retention):
         ret = set()
         for e in self.seq_event[:retention]:
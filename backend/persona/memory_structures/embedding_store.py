@@ -0,0 +1,248 @@
+"""
+Embedding Store
+
+Contiguous float32 matrix of memory embeddings with pre-normalised rows,
+so relevance scoring against a focal point is one matrix-vector product.
+Behaves like the old ``dict[str, list[float]]`` keyed by embedding_key for
+existing callers (``in``, ``[]``, ``get``, iteration).
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from backend.persona.memory_structures.storage import (
+    EMBEDDINGS_FILE, NORMS_FILE, KEYS_FILE, atomic_write)
+
+
+class EmbeddingStore:
+    def __init__(self, capacity: int = 256):
+        self.key_to_row: dict[str, int] = {}
+        self.keys: list[str] = []
+        self._capacity = capacity
+        self._dim: Optional[int] = None
+        # Unit-length rows and the original norms (to give back raw vectors)
+        self._matrix: Optional[np.ndarray] = None
+        self._norms: Optional[np.ndarray] = None
+        # Rows below _clean_rows are on disk unless listed in _dirty
+        self._clean_rows = 0
+        self._dirty: set[int] = set()
+
+    @classmethod
+    def from_dict(cls, embeddings: dict[str, list[float]]) -> EmbeddingStore:
+        """Build a store from the legacy embeddings.json mapping."""
+        store = cls(capacity=max(256, len(embeddings)))
+        items = [(k, v) for k, v in embeddings.items() if v]
+        if not items:
+            return store
+        raw = np.asarray([v for _, v in items], dtype=np.float32)
+        store._init_dim(raw.shape[1])
+        store._append_rows([k for k, _ in items], raw)
+        return store
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True) -> EmbeddingStore:
+        """Open a version 2 store; the row matrix is memory-mapped.
+
+        The map is copy-on-write: in-place updates stay in memory, and the
+        first append copies the rows into a growable in-memory buffer.
+        """
+        folder = Path(folder)
+        keys = json.load(open(folder / KEYS_FILE, encoding="utf-8"))
+        store = cls()
+        if not keys:
+            return store
+        matrix = np.load(folder / EMBEDDINGS_FILE,
+                         mmap_mode="c" if mmap else None)
+        store._dim = matrix.shape[1]
+        store._matrix = matrix
+        store._norms = np.array(np.load(folder / NORMS_FILE))
+        store._capacity = len(keys)
+        store.keys = keys
+        store.key_to_row = {k: i for i, k in enumerate(keys)}
+        store.mark_clean()
+        return store
+
+    def save(self, folder: str):
+        folder = Path(folder)
+        n = len(self.keys)
+        if self._matrix is None:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+            norms = np.zeros(0, dtype=np.float32)
+        else:
+            matrix, norms = self._matrix[:n], self._norms[:n]
+        with atomic_write(folder / EMBEDDINGS_FILE, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix))
+        with atomic_write(folder / NORMS_FILE, "wb") as f:
+            np.save(f, norms)
+        with atomic_write(folder / KEYS_FILE) as f:
+            json.dump(self.keys, f, ensure_ascii=False)
+
+    def pending(self) -> tuple[list[str], np.ndarray]:
+        """Keys and raw vectors added or changed since mark_clean()."""
+        rows = sorted(self._dirty) + list(range(self._clean_rows,
+                                                len(self.keys)))
+        if not rows or self._matrix is None:
+            return [], np.zeros((0, self._dim or 0), dtype=np.float32)
+        rows = np.array(rows)
+        raw = self._matrix[rows] * self._norms[rows][:, None]
+        return [self.keys[r] for r in rows], raw
+
+    def mark_clean(self):
+        self._clean_rows = len(self.keys)
+        self._dirty = set()
+
+    def update(self, keys: list[str], raw_rows: np.ndarray):
+        """Set many raw vectors at once (used when replaying segments)."""
+        for key, vec in zip(keys, raw_rows):
+            self[key] = vec
+
+    # ----- dict-like access -----
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self.key_to_row
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys)
+
+    def __getitem__(self, key: str) -> list[float]:
+        row = self.key_to_row[key]
+        return (self._matrix[row] * self._norms[row]).tolist()
+
+    def get(self, key: str, default=None):
+        if key not in self.key_to_row:
+            return default
+        return self[key]
+
+    def __setitem__(self, key: str, vector):
+        if vector is None or len(vector) == 0:
+            return
+        vec = np.asarray(vector, dtype=np.float32)
+        if self._dim is None:
+            self._init_dim(vec.shape[0])
+        row = self.key_to_row.get(key)
+        if row is None:
+            self._append_rows([key], vec[None, :])
+        elif not np.array_equal(vec, self._matrix[row] * self._norms[row]):
+            self._write_rows(np.array([row]), vec[None, :])
+            if row < self._clean_rows:
+                self._dirty.add(row)
+
+    def items(self):
+        for key in self.keys:
+            yield key, self[key]
+
+    def to_dict(self) -> dict[str, list[float]]:
+        return dict(self.items())
+
+    # ----- matrix access -----
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._dim
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the normalised rows currently in use."""
+        if self._matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._matrix[:len(self.keys)]
+
+    def row(self, key: str) -> int:
+        """Row index for an embedding key, or -1 if it has no embedding."""
+        return self.key_to_row.get(key, -1)
+
+    def similarities(self, query, rows: Optional[np.ndarray] = None
+                     ) -> np.ndarray:
+        """Cosine similarity of ``query`` against every row (or ``rows``).
+
+        Entries for row -1 (no embedding) and zero vectors score 0.0.
+        """
+        n = len(self.keys)
+        if rows is None:
+            rows = np.arange(n)
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.zeros(len(rows), dtype=np.float32)
+        q = np.asarray(query, dtype=np.float32)
+        q_norm = float(np.linalg.norm(q)) if q.size else 0.0
+        if n == 0 or q_norm == 0 or q.shape[0] != self._dim:
+            return out
+        q = q / q_norm
+        valid = rows >= 0
+        if not valid.any():
+            return out
+        if len(rows) * 4 >= n:
+            # Most rows are wanted: one product over the whole matrix and
+            # a scalar gather beats copying the selected rows out first.
+            out[valid] = (self.matrix @ q)[rows[valid]]
+        else:
+            out[valid] = self._matrix[rows[valid]] @ q
+        return out
+
+    def similarity_matrix(self, queries, rows: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row in ``rows`` to every query.
+
+        Returns a (len(rows), len(queries)) array from one matrix multiply;
+        row -1 and zero-norm queries score 0.0.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        out = np.zeros((len(rows), len(queries)), dtype=np.float32)
+        if not len(self.keys) or not len(queries):
+            return out
+        q = np.asarray(queries, dtype=np.float32)
+        if q.ndim != 2 or q.shape[1] != self._dim:
+            return out
+        q_norms = np.linalg.norm(q, axis=1)
+        q = q / np.where(q_norms == 0, 1.0, q_norms)[:, None]
+        valid = rows >= 0
+        if valid.any():
+            out[valid] = self._matrix[rows[valid]] @ q.T
+        out[:, q_norms == 0] = 0.0
+        return out
+
+    def nbytes(self) -> int:
+        if self._matrix is None:
+            return 0
+        return self._matrix.nbytes + self._norms.nbytes
+
+    # ----- internals -----
+
+    def _init_dim(self, dim: int):
+        self._dim = dim
+        self._matrix = np.zeros((self._capacity, dim), dtype=np.float32)
+        self._norms = np.zeros(self._capacity, dtype=np.float32)
+
+    def _grow(self, needed: int):
+        if needed <= self._capacity:
+            return
+        capacity = max(self._capacity, 1)
+        while capacity < needed:
+            capacity *= 2
+        matrix = np.zeros((capacity, self._dim), dtype=np.float32)
+        norms = np.zeros(capacity, dtype=np.float32)
+        n = len(self.keys)
+        matrix[:n] = self._matrix[:n]
+        norms[:n] = self._norms[:n]
+        self._matrix, self._norms, self._capacity = matrix, norms, capacity
+
+    def _append_rows(self, keys: list[str], raw: np.ndarray):
+        start = len(self.keys)
+        self._grow(start + len(keys))
+        rows = np.arange(start, start + len(keys))
+        for key, row in zip(keys, rows):
+            self.key_to_row[key] = int(row)
+            self.keys.append(key)
+        self._write_rows(rows, raw)
+
+    def _write_rows(self, rows: np.ndarray, raw: np.ndarray):
+        norms = np.linalg.norm(raw, axis=1)
+        safe = np.where(norms == 0, 1.0, norms)
+        self._matrix[rows] = raw / safe[:, None]
+        self._norms[rows] = norms
@@ -0,0 +1,229 @@
+"""
+Associative memory on-disk format.
+
+Version 1 (legacy, read-only here) is the original paper layout:
+nodes.json, kw_strength.json and embeddings.json with text floats.
+
+Version 2 keeps embeddings binary so they can be memory-mapped:
+  format.json           {"version": 2}
+  embeddings.npy        float32 (n, dim) unit-length rows
+  embedding_norms.npy   float32 (n,) original row norms
+  embedding_keys.json   embedding_key for each row, in row order
+  nodes.jsonl           one node per line, node_1 first
+  kw_strength.json      unchanged from version 1
+
+Version 3 adds append-only segments on top of a version 2 base, so a
+checkpoint only writes what changed since the previous one:
+  format.json           {"version": 3, "nodes": N, "segments": [...]}
+  seg_NNNNNN.jsonl      nodes added since the previous save
+  seg_NNNNNN.npy        float32 raw embeddings new or changed since then
+  seg_NNNNNN.keys.json  embedding_key for each segment row
+Segments are folded back into the base (compaction) every
+COMPACT_AFTER_SEGMENTS.
+
+Version 4 names every file a save writes after its generation, so that
+replacing format.json is the only step that switches checkpoints:
+  format.json           {"version": 4, "nodes": N, "base": G,
+                         "segments": [...], "kw_strength": <file>}
+  base_GGGGGG/          version 2 base files (nodes.jsonl, embeddings.npy,
+                        embedding_norms.npy, embedding_keys.json,
+                        kw_strength.json) written by compaction
+  seg_NNNNNN.kw.json    kw_strength as of that segment
+Only the base and segments listed in format.json are read, and files of
+the previous generation are deleted only after it is replaced, so a save
+interrupted at any point leaves the previous checkpoint intact. Base 0
+is the version 2/3 layout at the top of the folder.
+"""
+
+from __future__ import annotations
+
+import os
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+FORMAT_VERSION = 4
+COMPACT_AFTER_SEGMENTS = 16
+
+FORMAT_FILE = "format.json"
+NODES_FILE = "nodes.jsonl"
+EMBEDDINGS_FILE = "embeddings.npy"
+NORMS_FILE = "embedding_norms.npy"
+KEYS_FILE = "embedding_keys.json"
+KW_STRENGTH_FILE = "kw_strength.json"
+
+LEGACY_NODES_FILE = "nodes.json"
+LEGACY_EMBEDDINGS_FILE = "embeddings.json"
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def read_manifest(folder: str) -> Optional[dict]:
+    path = Path(folder) / FORMAT_FILE
+    if not path.exists():
+        return None
+    manifest = json.load(open(path))
+    manifest.setdefault("segments", [])
+    return manifest
+
+
+def detect_format(folder: str) -> Optional[int]:
+    """Return the format version stored in ``folder`` (None if empty)."""
+    manifest = read_manifest(folder)
+    if manifest is not None:
+        return manifest["version"]
+    if (Path(folder) / LEGACY_NODES_FILE).exists():
+        return 1
+    return None
+
+
+@contextmanager
+def atomic_write(path, mode: str = "w"):
+    """Write to a temp file and rename it over ``path`` on success.
+
+    Renaming keeps any existing memory map of the old file valid.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    encoding = None if "b" in mode else "utf-8"
+    with open(tmp, mode, encoding=encoding) as f:
+        yield f
+    os.replace(tmp, path)
+
+
+def write_manifest(folder: str, n_nodes: int, base: int,
+                   segments: list[str], kw_strength: str):
+    with atomic_write(Path(folder) / FORMAT_FILE) as f:
+        json.dump({"version": FORMAT_VERSION, "nodes": n_nodes,
+                   "base": base, "segments": segments,
+                   "kw_strength": kw_strength}, f)
+
+
+def base_name(generation: int) -> str:
+    return f"base_{generation:06d}"
+
+
+def base_dir(folder: str, generation: int) -> Path:
+    """Folder holding the base files of ``generation`` (0: top level)."""
+    folder = Path(folder)
+    return folder / base_name(generation) if generation else folder
+
+
+def kw_strength_file(manifest: Optional[dict]) -> str:
+    """kw_strength path, relative to the memory folder."""
+    if manifest is None or "kw_strength" not in manifest:
+        return KW_STRENGTH_FILE
+    return manifest["kw_strength"]
+
+
+def remove_base(folder: str, generation: int):
+    """Delete a base generation's files (version 2/3 names for base 0)."""
+    path = base_dir(folder, generation)
+    for name in (NODES_FILE, EMBEDDINGS_FILE, NORMS_FILE, KEYS_FILE,
+                 KW_STRENGTH_FILE):
+        try:
+            (path / name).unlink(missing_ok=True)
+        except OSError:
+            # Still memory-mapped on a platform that refuses; the
+            # manifest no longer lists it, so it is only disk space
+            pass
+    if generation:
+        try:
+            path.rmdir()
+        except OSError:
+            pass
+
+
+def stale_bases(folder: str, keep: int) -> list[int]:
+    """Generations left on disk besides ``keep`` (e.g. by a crash)."""
+    return [int(p.name[len("base_"):])
+            for p in Path(folder).glob("base_*")
+            if p.is_dir() and p.name != base_name(keep)
+            and p.name[len("base_"):].isdigit()]
+
+
+def segment_name(index: int) -> str:
+    return f"seg_{index:06d}"
+
+
+def segment_files(folder: str, name: str) -> list[Path]:
+    folder = Path(folder)
+    return [folder / f"{name}.jsonl", folder / f"{name}.npy",
+            folder / f"{name}.keys.json", folder / f"{name}.kw.json"]
+
+
+def write_segment(folder: str, name: str, nodes, keys: list[str],
+                  raw_rows: np.ndarray, kw_strength: dict):
+    nodes_path, rows_path, keys_path, kw_path = segment_files(folder, name)
+    write_nodes(folder, nodes, nodes_path.name)
+    with atomic_write(rows_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(raw_rows, dtype=np.float32))
+    with atomic_write(keys_path) as f:
+        json.dump(keys, f, ensure_ascii=False)
+    write_kw_strength(kw_path, kw_strength)
+
+
+def write_kw_strength(path, kw_strength: dict):
+    with atomic_write(path) as f:
+        json.dump(kw_strength, f)
+
+
+def read_segment_embeddings(folder: str, name: str
+                            ) -> tuple[list[str], np.ndarray]:
+    _, rows_path, keys_path, _ = segment_files(folder, name)
+    keys = json.load(open(keys_path, encoding="utf-8"))
+    return keys, np.load(rows_path)
+
+
+def segments_on_disk(folder: str) -> list[str]:
+    """Every segment name with files in ``folder``, listed or not (a save
+    interrupted before its manifest leaves an unlisted one)."""
+    return sorted({p.name.split(".", 1)[0]
+                   for p in Path(folder).glob("seg_*")})
+
+
+def remove_segments(folder: str, names: list[str]):
+    for name in names:
+        for path in segment_files(folder, name):
+            path.unlink(missing_ok=True)
+
+
+def node_to_record(node) -> dict:
+    return {
+        "node_id": node.node_id,
+        "node_count": node.node_count,
+        "type_count": node.type_count,
+        "type": node.type,
+        "depth": node.depth,
+        "created": node.created.strftime(TIME_FORMAT),
+        "expiration": (node.expiration.strftime(TIME_FORMAT)
+                       if node.expiration else None),
+        "subject": node.subject,
+        "predicate": node.predicate,
+        "object": node.object,
+        "description": node.description,
+        "embedding_key": node.embedding_key,
+        "poignancy": node.poignancy,
+        "keywords": list(node.keywords),
+        "filling": node.filling,
+    }
+
+
+def write_nodes(folder: str, nodes, filename: str = NODES_FILE) -> None:
+    with atomic_write(Path(folder) / filename) as f:
+        for node in nodes:
+            f.write(json.dumps(node_to_record(node), ensure_ascii=False))
+            f.write("\n")
+
+
+def read_nodes(folder: str, filename: str = NODES_FILE) -> Iterator[dict]:
+    path = Path(folder) / filename
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -9,7 +9,9 @@ Faithful reimplementation of the original Generative Agents persona.py.
 
 from __future__ import annotations
 
+import copy
 import logging
+import random
 
 from backend.persona.memory_structures.spatial_memory import MemoryTree
 from backend.persona.memory_structures.associative_memory import AssociativeMemory
@@ -17,7 +19,7 @@ from backend.persona.memory_structures.scratch import Scratch
 
 from backend.persona.cognitive_modules.perceive import perceive
 from backend.persona.cognitive_modules.retrieve import retrieve
-from backend.persona.cognitive_modules.plan import plan
+from backend.persona.cognitive_modules.plan import long_term_planning, plan
 from backend.persona.cognitive_modules.reflect import reflect
 from backend.persona.cognitive_modules.execute import execute
 
@@ -25,8 +27,12 @@ log = logging.getLogger(__name__)
 
 
 class Persona:
-    def __init__(self, name: str, folder_mem_saved: str):
+    def __init__(self, name: str, folder_mem_saved: str,
+                 seed: int | None = None):
         self.name = name
+        # Own generator, so choices don't depend on which thread ran first
+        self.rng = random.Random(
+            f"{seed}:{name}" if seed is not None else None)
 
         f_s_mem = f"{folder_mem_saved}/bootstrap_memory/spatial_memory.json"
         self.s_mem = MemoryTree(f_s_mem)
@@ -52,15 +58,21 @@ class Persona:
 
         Returns (next_tile, pronunciatio, description).
         """
+        self.think(maze, personas, curr_tile, curr_time)
+        return self.act(maze, personas)
+
+    def think(self, maze, personas: dict, curr_tile: tuple, curr_time,
+              deferred_chats: list | None = None):
+        """Run perceive -> retrieve -> plan -> reflect for this step.
+
+        When ``deferred_chats`` is given, chat reactions are appended to it
+        instead of being started, so a concurrent caller can pair
+        conversations afterwards in a fixed order.
+        """
         self.scratch.curr_tile = curr_tile
 
-        # Detect new day
-        new_day = False
-        if not self.scratch.curr_time:
-            new_day = "First day"
-        elif (self.scratch.curr_time.strftime('%A %B %d')
-              != curr_time.strftime('%A %B %d')):
-            new_day = "New day"
+        # Detect new day (already planned if the engine ran plan_new_day)
+        new_day = self.new_day(curr_time)
         self.scratch.curr_time = curr_time
 
         if new_day:
@@ -78,7 +90,8 @@ class Persona:
 
         # 3. Plan
         log.info("  %s: plan...", self.name)
-        act_address = plan(self, maze, personas, new_day, retrieved)
+        act_address = plan(self, maze, personas, new_day, retrieved,
+                           deferred_chats)
         log.info("  %s: plan -> %s | %s", self.name,
                  act_address, self.scratch.act_description)
 
@@ -86,8 +99,49 @@ class Persona:
         log.info("  %s: reflect...", self.name)
         reflect(self)
 
+    def new_day(self, curr_time):
+        """"First day", "New day" or False for a step at ``curr_time``."""
+        if not self.scratch.curr_time:
+            return "First day"
+        if (self.scratch.curr_time.strftime('%A %B %d')
+                != curr_time.strftime('%A %B %d')):
+            return "New day"
+        return False
+
+    def plan_new_day(self, curr_time):
+        """Run long-term planning ahead of think() at a day boundary.
+
+        Advances scratch.curr_time so the following think() sees the same
+        day and skips it. On failure the clock is restored, leaving the
+        planning to think() as before. Returns the new_day kind or False.
+        """
+        new_day = self.new_day(curr_time)
+        if not new_day:
+            return False
+        prev_time = self.scratch.curr_time
+        self.scratch.curr_time = curr_time
+        log.info("  %s: %s", self.name, new_day)
+        try:
+            long_term_planning(self, new_day)
+        except Exception:
+            self.scratch.curr_time = prev_time
+            raise
+        return new_day
+
+    def snapshot(self) -> Persona:
+        """This persona as others see it during a concurrent think phase:
+        a shallow copy whose scratch no longer follows its own plan()."""
+        view = copy.copy(self)
+        view.scratch = copy.copy(self.scratch)
+        return view
+
+    def act(self, maze, personas: dict):
+        """Execute the current action address and return the next tile.
+
+        Returns (next_tile, pronunciatio, description).
+        """
         # 5. Execute
         log.info("  %s: execute...", self.name)
-        result = execute(self, maze, personas, act_address)
+        result = execute(self, maze, personas, self.scratch.act_address)
         log.info("  %s: execute -> tile %s", self.name, result[0])
         return result
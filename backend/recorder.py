@@ -1,37 +1,372 @@
 """
 Simulation Recorder
 
-Records each step's movement data to master_movement.json
-for later replay in the frontend. Compatible with the original
-paper's compressed_storage format.
+Streams each step's movement data to an append-only log for later replay
+in the frontend. Nothing but the previous step is kept in memory:
+
+  movements.jsonl   one record per step, one JSON object per line
+  movements.idx     (step, byte offset, flags) int64 triples per record
+
+Records come in three shapes:
+
+  {"step": n, "movements": {persona: movement}}            full mode
+  {"step": n, "keyframe": true, "movements": {...}, "chats": {...}}
+  {"step": n, "delta": {persona: {changed fields}}, "chats": {...}}
+
+Like the paper's compress_sim_storage, delta mode only stores a persona's
+fields when they changed since the previous step. Chats are written once
+per keyframe interval under a content id and referenced by it; keyframes
+(every ``keyframe_every`` steps) carry the full state and every chat they
+use, so replay can start from any keyframe.
+
+A record is flushed as soon as it is written and the log is fsynced every
+``fsync_every`` steps, so a crash loses at most the step being written.
+``compact`` turns the log into the original paper's master_movement.json
+for older replay tools.
+
+Usage:
+    python -m backend.recorder compact backend/data/saves/my_run
 """
 
 from __future__ import annotations
 
+import os
 import json
+import hashlib
+import struct
 import logging
+import argparse
 import datetime
+from bisect import bisect_left, bisect_right
 from pathlib import Path
+from typing import Iterator, Optional
 
 log = logging.getLogger(__name__)
 
+LOG_FILE = "movements.jsonl"
+INDEX_FILE = "movements.idx"
+LEGACY_FILE = "master_movement.json"
+
+_INDEX_ENTRY = struct.Struct("<qqq")
+KEYFRAME = 1
+
+
+def chat_id(chat: list) -> str:
+    """Content id for a chat, so a repeated chat is only stored once."""
+    payload = json.dumps(chat, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def read_index(output_dir: Path) -> list[tuple[int, int, int]]:
+    """(step, byte offset, flags) for every complete record in the log."""
+    path = Path(output_dir) / INDEX_FILE
+    if not path.exists():
+        return []
+    data = path.read_bytes()
+    usable = len(data) - len(data) % _INDEX_ENTRY.size
+    return [_INDEX_ENTRY.unpack_from(data, i)
+            for i in range(0, usable, _INDEX_ENTRY.size)]
+
+
+def iter_records(output_dir: Path) -> Iterator[dict]:
+    """Yield complete step records in order, skipping a torn last line."""
+    path = Path(output_dir) / LOG_FILE
+    if not path.exists():
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            yield json.loads(line)
+
+
+class ReplayState:
+    """Rebuilds full per-step movements from a sequence of log records."""
+
+    def __init__(self):
+        self.state: dict[str, dict] = {}
+        self.chats: dict[str, list] = {}
+
+    def apply(self, rec: dict) -> dict[str, dict]:
+        """Fold one record in and return the full movements at its step."""
+        self.fold(rec)
+        return self.movements()
+
+    def fold(self, rec: dict):
+        self.chats.update(rec.get("chats", {}))
+        if "delta" in rec:
+            for name, fields in rec["delta"].items():
+                self.state.setdefault(name, {}).update(fields)
+        else:
+            self.state = {name: dict(mv)
+                          for name, mv in rec["movements"].items()}
+
+    def movements(self) -> dict[str, dict]:
+        out = {}
+        for name, mv in self.state.items():
+            mv = dict(mv)
+            chat = mv.get("chat")
+            if isinstance(chat, str):
+                mv["chat"] = self.chats.get(chat)
+            out[name] = mv
+        return out
+
+
+def iter_movements(output_dir: Path) -> Iterator[tuple[int, dict]]:
+    """Yield (step, full movements) for every record in the log."""
+    replay = ReplayState()
+    for rec in iter_records(output_dir):
+        yield rec["step"], replay.apply(rec)
+
+
+def load_movements(output_dir: Path) -> dict[str, dict]:
+    """All movements as {step: {persona: movement}}, from either format."""
+    output_dir = Path(output_dir)
+    if (output_dir / LOG_FILE).exists():
+        return {str(step): movements
+                for step, movements in iter_movements(output_dir)}
+    legacy = output_dir / LEGACY_FILE
+    if legacy.exists():
+        return json.load(open(legacy, encoding="utf-8"))
+    return {}
+
+
+class ReplayReader:
+    """Random access to a recording through its keyframe index.
+
+    A lookup starts at the nearest keyframe at or before the wanted step, so
+    it reads at most ``keyframe_every`` records however long the run was.
+    Legacy master_movement.json saves are loaded whole; every step in them
+    is a full frame.
+    """
 
-class SimulationRecorder:
     def __init__(self, output_dir: Path):
         self.output_dir = Path(output_dir)
+        self._legacy: Optional[dict[str, dict]] = None
+
+        entries = read_index(self.output_dir)
+        if not entries and (self.output_dir / LOG_FILE).exists():
+            entries = self._scan_log()
+        if not entries and (self.output_dir / LEGACY_FILE).exists():
+            self._legacy = load_movements(self.output_dir)
+            entries = sorted((int(step), 0, KEYFRAME)
+                             for step in self._legacy)
+
+        self.steps = [step for step, _, _ in entries]
+        self.offsets = [offset for _, offset, _ in entries]
+        self.keyframes = [i for i, (_, _, flags) in enumerate(entries)
+                          if flags & KEYFRAME]
+
+    def _scan_log(self) -> list[tuple[int, int, int]]:
+        """Rebuild the index from the log itself (e.g. if it was deleted)."""
+        entries = []
+        offset = 0
+        with open(self.output_dir / LOG_FILE, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                rec = json.loads(line)
+                flags = 0 if "delta" in rec else KEYFRAME
+                entries.append((rec["step"], offset, flags))
+                offset += len(line)
+        return entries
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def _replay(self, first: int, last: int
+                ) -> Iterator[tuple[int, ReplayState]]:
+        """Fold records first..last (index positions) from their keyframe."""
+        k = bisect_right(self.keyframes, first) - 1
+        start = self.keyframes[k] if k >= 0 else 0
+        replay = ReplayState()
+        if self._legacy is not None:
+            for i in range(first, last + 1):
+                replay.fold({"movements": self._legacy[str(self.steps[i])]})
+                yield i, replay
+            return
+        with open(self.output_dir / LOG_FILE, "rb") as f:
+            f.seek(self.offsets[start])
+            for i in range(start, last + 1):
+                replay.fold(json.loads(f.readline()))
+                if i >= first:
+                    yield i, replay
+
+    def state(self, step: int) -> Optional[dict[str, dict]]:
+        """Full movements as of ``step`` (the latest recorded step <= it)."""
+        i = bisect_right(self.steps, step) - 1
+        if i < 0:
+            return None
+        movements = None
+        for _, replay in self._replay(i, i):
+            movements = replay.movements()
+        return movements
+
+    def range(self, start: int, end: int) -> dict[str, dict]:
+        """Full movements for every recorded step in [start, end]."""
+        first = bisect_left(self.steps, start)
+        last = bisect_right(self.steps, end) - 1
+        if first > last:
+            return {}
+        return {str(self.steps[i]): replay.movements()
+                for i, replay in self._replay(first, last)}
+
+
+def compact(output_dir: Path) -> Path:
+    """Write the streamed log out as a legacy master_movement.json."""
+    output_dir = Path(output_dir)
+    path = output_dir / LEGACY_FILE
+    tmp = path.with_name(path.name + ".tmp")
+    n_steps = 0
+    with open(tmp, "w", encoding="utf-8") as f:
+        # Stream the dict out record by record instead of building it
+        f.write("{")
+        for step, movements in iter_movements(output_dir):
+            if n_steps:
+                f.write(", ")
+            f.write(json.dumps(str(step)))
+            f.write(": ")
+            f.write(json.dumps(movements, ensure_ascii=False))
+            n_steps += 1
+        f.write("}")
+    os.replace(tmp, path)
+    log.info("Compacted %d steps into %s", n_steps, path)
+    return path
+
+
+class SimulationRecorder:
+    def __init__(self, output_dir: Path, fsync_every: int = 10,
+                 resume: bool = False, delta: bool = False,
+                 keyframe_every: int = 100):
+        self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-        self.movements: dict[str, dict] = {}
+        self.fsync_every = max(1, fsync_every)
+        self.delta = delta
+        self.keyframe_every = max(1, keyframe_every)
+
+        # Delta state: last encoded movement per persona and chats written
+        # since the last keyframe. Empty after a resume, which forces a
+        # keyframe first.
+        self._prev: dict[str, dict] = {}
+        self._written_chats: set[str] = set()
+        self._since_keyframe = 0
+
+        if not resume:
+            (self.output_dir / LOG_FILE).unlink(missing_ok=True)
+            (self.output_dir / INDEX_FILE).unlink(missing_ok=True)
+        self.n_steps = self._repair()
+        self._unsynced = 0
+        self._log = open(self.output_dir / LOG_FILE, "ab")
+        self._index = open(self.output_dir / INDEX_FILE, "ab")
+
+    def _repair(self) -> int:
+        """Drop a torn tail left by a crash so resumed appends start clean.
+
+        Returns the number of complete records already in the log.
+        """
+        log_path = self.output_dir / LOG_FILE
+        index_path = self.output_dir / INDEX_FILE
+        if not log_path.exists():
+            index_path.unlink(missing_ok=True)
+            return 0
+
+        entries = read_index(self.output_dir)
+        good_end = 0
+        good = 0
+        with open(log_path, "rb") as f:
+            for step, offset, flags in entries:
+                f.seek(offset)
+                line = f.readline()
+                if not line.endswith(b"\n"):
+                    break
+                good_end = offset + len(line)
+                good += 1
+
+        if good < len(entries) or log_path.stat().st_size != good_end:
+            log.warning("Recorder: truncating %s to %d complete steps",
+                        log_path, good)
+        with open(log_path, "r+b") as f:
+            f.truncate(good_end)
+        with open(index_path, "ab") as f:
+            f.truncate(good * _INDEX_ENTRY.size)
+        return good
+
+    def _encode(self, movement: dict, chats: dict[str, list]) -> dict:
+        """Replace a movement's chat list with its id, collecting the chat."""
+        encoded = dict(movement)
+        chat = movement.get("chat")
+        if chat:
+            cid = chat_id(chat)
+            chats[cid] = chat
+            encoded["chat"] = cid
+        return encoded
+
+    def _delta_record(self, step: int, movements: dict) -> tuple[dict, int]:
+        chats: dict[str, list] = {}
+        encoded = {name: self._encode(mv, chats)
+                   for name, mv in movements.items()}
+
+        if not self._prev or self._since_keyframe >= self.keyframe_every:
+            rec = {"step": step, "keyframe": True, "movements": encoded,
+                   "chats": chats}
+            flags = KEYFRAME
+            self._since_keyframe = 0
+            # Chats are only shared within a keyframe interval so replay can
+            # start at any keyframe
+            self._written_chats = set()
+        else:
+            delta = {}
+            for name, mv in encoded.items():
+                prev = self._prev.get(name, {})
+                changed = {k: v for k, v in mv.items()
+                           if k not in prev or prev[k] != v}
+                if changed:
+                    delta[name] = changed
+            rec = {"step": step, "delta": delta,
+                   "chats": {cid: chat for cid, chat in chats.items()
+                             if cid not in self._written_chats}}
+            flags = 0
+
+        self._written_chats.update(chats)
+        self._prev = encoded
+        self._since_keyframe += 1
+        return rec, flags
 
     def record_step(self, step: int, movements: dict):
-        """Record one step's movement data."""
-        self.movements[str(step)] = movements
+        """Append one step's movement data to the log."""
+        if self.delta:
+            rec, flags = self._delta_record(step, movements)
+        else:
+            rec, flags = {"step": step, "movements": movements}, KEYFRAME
+        line = json.dumps(rec, ensure_ascii=False).encode("utf-8") + b"\n"
+        offset = self._log.tell()
+        self._log.write(line)
+        self._log.flush()
+        # The index entry goes in only after its record is complete
+        self._index.write(_INDEX_ENTRY.pack(step, offset, flags))
+        self._index.flush()
+        self.n_steps += 1
+
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self):
+        os.fsync(self._log.fileno())
+        os.fsync(self._index.fileno())
+        self._unsynced = 0
+
+    def close(self):
+        if not self._log.closed:
+            self.sync()
+            self._log.close()
+            self._index.close()
 
     def save_movements(self):
-        """Save all recorded movements to master_movement.json."""
-        path = self.output_dir / "master_movement.json"
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.movements, f, ensure_ascii=False)
-        log.info("Saved %d steps to %s", len(self.movements), path)
+        """Make every recorded step durable (the log is already written)."""
+        self.sync()
+        log.info("Synced %d steps to %s", self.n_steps,
+                 self.output_dir / LOG_FILE)
 
     def save_meta(self, sim_name: str, start_date: str, sec_per_step: int,
                   persona_names: list[str], total_steps: int):
@@ -42,6 +377,8 @@ class SimulationRecorder:
             "sec_per_step": sec_per_step,
             "persona_names": persona_names,
             "total_steps": total_steps,
+            "record_mode": "delta" if self.delta else "full",
+            "keyframe_every": self.keyframe_every if self.delta else 1,
             "created_at": datetime.datetime.now().isoformat(),
         }
         path = self.output_dir / "meta.json"
@@ -54,4 +391,22 @@ class SimulationRecorder:
         """Save both movements and metadata."""
         self.save_movements()
         self.save_meta(sim_name, start_date, sec_per_step,
-                       persona_names, len(self.movements))
+                       persona_names, self.n_steps)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Simulation recording tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_compact = sub.add_parser(
+        "compact", help="Write master_movement.json from movements.jsonl")
+    p_compact.add_argument("output_dir", help="Simulation save directory")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        path = compact(Path(args.output_dir))
+        print(f"  Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
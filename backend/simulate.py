@@ -2,12 +2,13 @@
 CLI Simulation Runner
 
 Runs the Generative Agents simulation without a frontend.
-Records all steps to master_movement.json for later replay.
+Streams all steps to movements.jsonl for later replay.
 
 Usage:
     python -m backend.simulate --steps 100
     python -m backend.simulate --steps 500 --output backend/data/saves/my_run
     python -m backend.simulate --steps 100 --sim the_ville --checkpoint-every 50
+    python -m backend.simulate --steps 100 --workers 8
 """
 
 from __future__ import annotations
@@ -28,7 +29,10 @@ logging.basicConfig(
 
 from backend.world_engine import WorldEngine
 from backend.recorder import SimulationRecorder
-from backend.config import DATA_DIR
+from backend.config import DATA_DIR, SIM_SEED
+from backend.llm.llm_client import get_response_cache
+from backend.persona.cognitive_modules.decomp_prefetch import (
+    get_decomp_prefetcher, shutdown_decomp_prefetcher)
 
 log = logging.getLogger(__name__)
 
@@ -81,6 +85,19 @@ def main():
                         help="Output directory for saves")
     parser.add_argument("--checkpoint-every", type=int, default=50,
                         help="Save checkpoint every N steps")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Personas that think concurrently per step "
+                             "(default: 1, fully serial)")
+    parser.add_argument("--seed", type=int, default=SIM_SEED,
+                        help="Seed for the personas' random choices, so "
+                             "runs repeat for any --workers (default: "
+                             "SIM_SEED, else unseeded)")
+    parser.add_argument("--record-mode", choices=["delta", "full"],
+                        default="delta",
+                        help="Store only changed fields per step (delta, "
+                             "default) or every persona every step (full)")
+    parser.add_argument("--keyframe-every", type=int, default=100,
+                        help="Full-state keyframe interval in delta mode")
     args = parser.parse_args()
 
     # Determine output directory
@@ -107,15 +124,18 @@ def main():
     print(f"║  World:      {args.sim:<43}║")
     print(f"║  Steps:      {args.steps:<43}║")
     print(f"║  Output:     {str(output_dir)[-43:]:<43}║")
+    print(f"║  Workers:    {args.workers:<43}║")
     print(f"║  Checkpoint: every {args.checkpoint_every} steps{' ' * (33 - len(str(args.checkpoint_every)))}║")
     print("╚══════════════════════════════════════════════════════════╝")
     print()
 
     # Load simulation
     print("  Loading simulation...", end="", flush=True)
-    engine = WorldEngine()
+    engine = WorldEngine(workers=args.workers, seed=args.seed)
     engine.load_simulation(args.sim)
-    recorder = SimulationRecorder(output_dir)
+    recorder = SimulationRecorder(output_dir,
+                                  delta=args.record_mode == "delta",
+                                  keyframe_every=args.keyframe_every)
     print(f" OK ({len(engine.personas)} personas loaded)")
     print(f"  World time: {engine.curr_time}")
     print(f"  Logs: {output_dir / 'simulation.log'}")
@@ -129,6 +149,9 @@ def main():
     start_time = time.time()
     last_persona = ""
     last_desc = ""
+    wall_total = 0.0
+    serial_total = 0.0
+    phase_totals: dict[str, float] = {}
 
     for i in range(args.steps):
         step_num = i + 1
@@ -139,6 +162,10 @@ def main():
         try:
             step_data = engine.run_step()
             recorder.record_step(step_data["step"], step_data["movements"])
+            wall_total += step_data["timings"]["wall_sec"]
+            serial_total += step_data["timings"]["serial_sec"]
+            for phase, sec in step_data["timings"]["phases"].items():
+                phase_totals[phase] = phase_totals.get(phase, 0.0) + sec
 
             # Extract last persona info for display
             for name, mv in step_data["movements"].items():
@@ -177,6 +204,29 @@ def main():
     print()
     print(f"  ✅ Simulation complete! ({args.steps} steps in {format_time(total_time)})")
     print(f"  Avg: {total_time / args.steps:.1f}s per step")
+    if wall_total > 0:
+        print(f"  Speedup: {serial_total / wall_total:.2f}x "
+              f"with {args.workers} worker(s)")
+        print("  Phases: " + ", ".join(
+            f"{phase} {format_time(sec)}"
+            for phase, sec in phase_totals.items()))
+    get_response_cache().flush()
+    cache_stats = get_response_cache().stats()
+    if cache_stats["policy"] != "off":
+        print(f"  LLM cache: {cache_stats['hits']} hits / "
+              f"{cache_stats['misses']} misses "
+              f"({cache_stats['hit_rate'] * 100:.1f}% hit rate)")
+    decomp_stats = get_decomp_prefetcher().stats()
+    if decomp_stats["hits"] + decomp_stats["waits"] + decomp_stats["misses"]:
+        print(f"  Decomposition prefetch: {decomp_stats['hits']} ready / "
+              f"{decomp_stats['waits']} waited / "
+              f"{decomp_stats['misses']} inline, "
+              f"{decomp_stats['discarded']} stale discarded")
+    path_stats = engine.maze.path_cache_stats()
+    print(f"  Path cache: {path_stats['hits']} hits + "
+          f"{path_stats['suffix_hits']} suffix / "
+          f"{path_stats['misses']} misses "
+          f"({path_stats['hit_rate'] * 100:.1f}% hit rate)")
     print("  Saving final state...", end="", flush=True)
 
     recorder.save_all(
@@ -192,7 +242,14 @@ def main():
     print()
 
     log.info("Simulation complete: %d steps in %.1fs", args.steps, total_time)
+    log.info("LLM cache: %s", cache_stats)
+    log.info("Path cache: %s", path_stats)
+    log.info("Decomposition prefetch: %s", decomp_stats)
+    log.info("Phase totals: %s", phase_totals)
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        shutdown_decomp_prefetcher()
@@ -0,0 +1,75 @@
+"""Benchmark: address trips via distance fields vs per-call A*.
+
+Replays random (tile, address) trips the way execute plans them:
+  - sampled: path_finder to 4 sampled target tiles (execute before multi-target)
+  - multi:   one path_finder_multi over every tile of the address
+  - field:   Maze.path_to_address, cold (first use) and warm
+
+Usage:
+    python backend/tests/bench_distance_fields.py [n_trips]
+"""
+import sys
+sys.path.insert(0, ".")
+
+import random
+import time
+
+from backend.config import DATA_DIR
+from backend.maze import Maze
+from backend.path_finder import path_finder, path_finder_multi
+
+n_trips = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+maze = Maze("the_ville", DATA_DIR)
+cm = maze.collision_maze
+free = [(x, y) for y in range(maze.maze_height)
+        for x in range(maze.maze_width) if cm[y][x] == 0]
+# Personas revisit a few hundred addresses, so draw trips from all of them
+addresses = list(maze.address_tiles)
+rng = random.Random(0)
+trips = [(rng.choice(free), rng.choice(addresses)) for _ in range(n_trips)]
+
+
+def sampled(start, address):
+    targets = list(maze.address_tiles[address])
+    if len(targets) > 4:
+        targets = random.Random(0).sample(targets, 4)
+    best = None
+    for t in targets:
+        p = path_finder(cm, start, t)
+        if p and (best is None or len(p) < len(best)):
+            best = p
+    return best or []
+
+
+def multi(start, address):
+    return path_finder_multi(cm, start, list(maze.address_tiles[address]))
+
+
+def field(start, address):
+    return maze.path_to_address(address, start)
+
+
+def bench(name, fn):
+    t0 = time.perf_counter()
+    total_len = sum(len(fn(start, address)) for start, address in trips)
+    elapsed = time.perf_counter() - t0
+    print(f"  {name:<12} {elapsed * 1000:9.1f} ms total  "
+          f"{elapsed / n_trips * 1e6:9.1f} us/trip  "
+          f"avg path {total_len / n_trips:.1f}")
+    return elapsed
+
+
+print(f"{n_trips} trips over {len(addresses)} addresses "
+      f"({maze.maze_width}x{maze.maze_height})")
+t_sampled = bench("sampled A*", sampled)
+t_multi = bench("multi A*", multi)
+t_cold = bench("field cold", field)
+t_warm = bench("field warm", field)
+print(f"  field warm is {t_sampled / t_warm:.0f}x faster than sampled A*, "
+      f"{t_multi / t_warm:.0f}x faster than multi A*")
+
+t0 = time.perf_counter()
+maze._fields.clear()
+maze.warm_distance_fields()
+print(f"  warm-up of all fields: {(time.perf_counter() - t0) * 1000:.1f} ms")
@@ -0,0 +1,68 @@
+"""Benchmark: EmbeddingStore vs the old dict[str, list[float]] embeddings.
+
+Fills both with random 384-d vectors (all-MiniLM-L6-v2's width) and
+reports memory and the latency of scoring one focal point against every
+row, and against a small gathered subset. The dict side is sized the way
+CPython holds it: the dict, one list per key and one float per value.
+
+Usage:
+    python backend/tests/bench_embedding_store.py [n_rows]
+"""
+import sys
+sys.path.insert(0, ".")
+
+import time
+
+import numpy as np
+
+from backend.persona.memory_structures.embedding_store import EmbeddingStore
+
+n_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+dim = 384
+repeats = 50
+
+
+def dict_nbytes(embeddings):
+    total = sys.getsizeof(embeddings)
+    for vec in embeddings.values():
+        total += sys.getsizeof(vec) + sum(sys.getsizeof(x) for x in vec)
+    return total
+
+
+def dict_similarities(embeddings, query, keys):
+    q_norm = np.linalg.norm(query)
+    out = []
+    for key in keys:
+        vec = np.asarray(embeddings[key])
+        out.append(float(vec @ query / (np.linalg.norm(vec) * q_norm)))
+    return out
+
+
+def timed(fn, n=repeats):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        result = fn()
+    return (time.perf_counter() - t0) / n, result
+
+
+rng = np.random.default_rng(0)
+raw = rng.standard_normal((n_rows, dim)).astype(np.float32)
+keys = [f"node_{i}" for i in range(n_rows)]
+embeddings = {k: v.tolist() for k, v in zip(keys, raw)}
+store = EmbeddingStore.from_dict(embeddings)
+query = rng.standard_normal(dim).astype(np.float32)
+
+old, new = dict_nbytes(embeddings), store.nbytes()
+print(f"{n_rows} rows x {dim}")
+print(f"  memory   dict {old / 2**20:8.1f} MiB  store "
+      f"{new / 2**20:8.1f} MiB  ({new / old:.2f}x)")
+
+t_all, got = timed(lambda: store.similarities(query))
+subset = rng.choice(n_rows, size=200, replace=False)
+t_sub, _ = timed(lambda: store.similarities(query, subset))
+t_dict, want = timed(lambda: dict_similarities(embeddings, query, keys), 1)
+print(f"  all rows dict {t_dict * 1000:8.1f} ms   store "
+      f"{t_all * 1000:8.3f} ms  ({t_dict / t_all:.0f}x, "
+      f"match: {np.allclose(got, want, atol=1e-4)})")
+print(f"  200 rows gathered            store {t_sub * 1000:8.3f} ms")
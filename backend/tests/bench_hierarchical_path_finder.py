@@ -0,0 +1,94 @@
+"""Benchmark: hierarchical (region graph) pathfinding vs flat A*.
+
+Builds synthetic towns of walled rooms (each room its own arena) on a
+street grid, at Smallville size and 25x / 100x larger, and times random
+reachable trips. "warm" repeats the trips once refined legs are cached.
+
+Usage:
+    python backend/tests/bench_hierarchical_path_finder.py [n_trips]
+"""
+import sys
+sys.path.insert(0, ".")
+
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from backend.hierarchical_path_finder import HierarchicalPathFinder
+from backend.path_finder import CollisionGrid, path_finder
+
+n_trips = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+
+def town(width, height, seed=0, room=12):
+    """Rooms with 10% clutter and doors on ~60% of walls; every 4th row and
+    column of rooms is left open as a street."""
+    rng = random.Random(seed)
+    collision = [[0] * width for _ in range(height)]
+    arena = [[0] * width for _ in range(height)]
+    code = 1
+    for by in range(0, height - room + 1, room):
+        for bx in range(0, width - room + 1, room):
+            if (bx // room) % 4 == 3 or (by // room) % 4 == 3:
+                continue
+            for k in range(room):
+                collision[by][bx + k] = collision[by + room - 1][bx + k] = 1
+                collision[by + k][bx] = collision[by + k][bx + room - 1] = 1
+            for y in range(by + 1, by + room - 1):
+                for x in range(bx + 1, bx + room - 1):
+                    arena[y][x] = code
+                    if rng.random() < 0.1:
+                        collision[y][x] = 1
+            for side in range(4):
+                if rng.random() < 0.6:
+                    k = rng.randrange(2, room - 2)
+                    x, y = [(bx + k, by), (bx + k, by + room - 1),
+                            (bx, by + k), (bx + room - 1, by + k)][side]
+                    collision[y][x] = 0
+            code += 1
+    return SimpleNamespace(
+        collision_maze=collision,
+        collision_grid=CollisionGrid.from_rows(collision),
+        arena_layer=np.array(arena, dtype=np.int32),
+        sector_layer=np.zeros((height, width), dtype=np.int32),
+        collision_version=0)
+
+
+for width, height in [(140, 100), (700, 500), (1400, 1000)]:
+    maze = town(width, height)
+    grid = maze.collision_grid
+    finder = HierarchicalPathFinder(maze)
+    t0 = time.perf_counter()
+    finder._ensure_built()
+    labels = grid.components()
+    build = time.perf_counter() - t0
+
+    free = [(x, y) for y in range(height) for x in range(width)
+            if maze.collision_maze[y][x] == 0]
+    rng = random.Random(1)
+    trips = []
+    while len(trips) < n_trips:
+        s, e = rng.choice(free), rng.choice(free)
+        if labels[s[1] * width + s[0]] == labels[e[1] * width + e[0]]:
+            trips.append((s, e))
+
+    t0 = time.perf_counter()
+    flat = [path_finder(grid, s, e) for s, e in trips]
+    t_flat = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    cold = [finder(grid, s, e) for s, e in trips]
+    t_cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for s, e in trips:
+        finder(grid, s, e)
+    t_warm = time.perf_counter() - t0
+
+    excess = max(len(b) / len(a) for a, b in zip(flat, cold))
+    print(f"{width}x{height}: {finder.n_regions} regions, "
+          f"{len(finder.graph)} doorways, built in {build:.2f}s")
+    print(f"  A* {t_flat * 1000:8.1f} ms   hierarchical cold "
+          f"{t_cold * 1000:8.1f} ms ({t_flat / t_cold:.1f}x)   warm "
+          f"{t_warm * 1000:8.1f} ms ({t_flat / t_warm:.1f}x)   "
+          f"longest path +{(excess - 1) * 100:.1f}%")
@@ -0,0 +1,61 @@
+"""Benchmark: Jump Point Search vs flat A* (path_finder method="jps").
+
+Runs random reachable start/end pairs on the Smallville collision layer and
+on synthetic 500x500 maps with 0%, 5% and 20% random walls. Jump tables
+are built once per grid, like the component labels, and timed separately.
+
+Usage:
+    python backend/tests/bench_jps.py [n_pairs]
+"""
+import sys
+sys.path.insert(0, ".")
+
+import random
+import time
+
+from backend.config import DATA_DIR
+from backend.maze import Maze
+from backend.path_finder import CollisionGrid, path_finder
+
+n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+
+def bench(label, grid, pairs):
+    grid.components()
+    t0 = time.perf_counter()
+    grid.jump_tables()
+    t_tables = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    want = [path_finder(grid, s, e) for s, e in pairs]
+    t_astar = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = [path_finder(grid, s, e, method="jps") for s, e in pairs]
+    t_jps = time.perf_counter() - t0
+    same = all(len(a) == len(b) for a, b in zip(want, got))
+    print(f"  {label:<22} A* {t_astar * 1000:8.1f} ms  "
+          f"JPS {t_jps * 1000:8.1f} ms  {t_astar / t_jps:5.1f}x  "
+          f"(tables {t_tables * 1000:.0f} ms, lengths match: {same})")
+
+
+maze = Maze("the_ville", DATA_DIR)
+rows = maze.collision_maze
+grid = maze.collision_grid
+free = [(x, y) for y in range(maze.maze_height)
+        for x in range(maze.maze_width) if rows[y][x] == 0]
+rng = random.Random(0)
+pairs = [(rng.choice(free), rng.choice(free)) for _ in range(n_pairs)]
+pairs = [(s, e) for s, e in pairs if path_finder(grid, s, e)]
+print(f"Smallville {maze.maze_width}x{maze.maze_height}")
+bench(f"{len(pairs)} reachable pairs", grid, pairs)
+
+size = 500
+print(f"Synthetic {size}x{size}")
+for density in (0.0, 0.05, 0.2):
+    rows = [[1 if rng.random() < density else 0 for _ in range(size)]
+            for _ in range(size)]
+    grid = CollisionGrid.from_rows(rows)
+    free = [(x, y) for y in range(size) for x in range(size)
+            if rows[y][x] == 0]
+    pairs = [(rng.choice(free), rng.choice(free))
+             for _ in range(max(5, n_pairs // 15))]
+    bench(f"{density:.0%} walls", grid, pairs)
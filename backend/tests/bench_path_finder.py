@@ -0,0 +1,59 @@
+"""Benchmark: flat-index A* (path_finder) vs the dict/tuple reference.
+
+Runs random start/end pairs on the Smallville collision layer and on a
+synthetic 1000x1000 map with 20% random walls.
+
+Usage:
+    python backend/tests/bench_path_finder.py [n_pairs]
+"""
+import sys
+sys.path.insert(0, ".")
+
+import random
+import time
+
+from backend.config import DATA_DIR
+from backend.maze import Maze
+from backend.path_finder import CollisionGrid, path_finder, path_finder_dict
+
+n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+
+
+def bench(label, rows, grid, pairs):
+    t0 = time.perf_counter()
+    want = [path_finder_dict(rows, s, e) for s, e in pairs]
+    t_dict = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    got = [path_finder(grid, s, e) for s, e in pairs]
+    t_flat = time.perf_counter() - t0
+    same = all(len(a) == len(b) for a, b in zip(want, got))
+    found = sum(1 for p in want if p)
+    print(f"  {label:<26} dict {t_dict * 1000:9.1f} ms  "
+          f"flat {t_flat * 1000:8.1f} ms  {t_dict / t_flat:5.1f}x  "
+          f"({found}/{len(pairs)} reachable, lengths match: {same})")
+
+
+maze = Maze("the_ville", DATA_DIR)
+rows = maze.collision_maze
+grid = maze.collision_grid
+grid.components()  # one-off labelling, normally paid on first search
+free = [(x, y) for y in range(maze.maze_height)
+        for x in range(maze.maze_width) if rows[y][x] == 0]
+rng = random.Random(0)
+pairs = [(rng.choice(free), rng.choice(free)) for _ in range(n_pairs)]
+reachable = [(s, e) for s, e in pairs if path_finder(grid, s, e)]
+print(f"Smallville {maze.maze_width}x{maze.maze_height}")
+bench("random pairs", rows, grid, pairs)
+bench("reachable pairs only", rows, grid, reachable)
+
+size = 1000
+rows = [[1 if rng.random() < 0.2 else 0 for _ in range(size)]
+        for _ in range(size)]
+grid = CollisionGrid.from_rows(rows)
+t0 = time.perf_counter()
+grid.components()
+print(f"Synthetic {size}x{size} (component labelling "
+      f"{(time.perf_counter() - t0) * 1000:.0f} ms)")
+free = [(x, y) for y in range(size) for x in range(size) if rows[y][x] == 0]
+pairs = [(rng.choice(free), rng.choice(free)) for _ in range(max(5, n_pairs // 30))]
+bench("random pairs", rows, grid, pairs)
@@ -0,0 +1,131 @@
+"""Task decomposition prefetch: background results and stale discard."""
+import sys
+sys.path.insert(0, ".")
+
+import datetime
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.persona.cognitive_modules import decomp_prefetch, plan
+from backend.persona.memory_structures.scratch import Scratch
+
+DAY = datetime.datetime(2023, 2, 13)
+SCHEDULE = [["sleeping", 420], ["morning routine", 60],
+            ["working at the cafe counter", 240], ["lunch", 60],
+            ["painting", 180], ["dinner", 60], ["reading", 60],
+            ["sleeping", 360]]
+
+
+@pytest.fixture
+def prefetcher(monkeypatch):
+    pref = decomp_prefetch.DecompPrefetcher(2)
+    monkeypatch.setattr(decomp_prefetch, "_prefetcher", pref)
+    return pref
+
+
+@pytest.fixture
+def decomp_calls(monkeypatch):
+    calls = []
+
+    def fake_decomp(inputs, task, duration):
+        # Workers only ever see the plain prompt inputs
+        assert all(isinstance(v, str) for v in inputs)
+        calls.append((task, duration, threading.current_thread().name))
+        half = duration // 2
+        return [[f"{task} (part 1)", half],
+                [f"{task} (part 2)", duration - half]]
+
+    monkeypatch.setattr(plan, "generate_task_decomp", fake_decomp)
+    monkeypatch.setattr(plan, "_action_details",
+                        lambda *args: ("the Ville", "🙂", ("a", "b", "c"),
+                                       None, None, (None, None, None)))
+    return calls
+
+
+def make_persona(hour, minute, sleeping=False):
+    scratch = Scratch("/nonexistent")
+    scratch.name = "Isabella Rodriguez"
+    scratch.first_name = "Isabella"
+    scratch.currently = "Isabella is planning a Valentine's Day party"
+    scratch.curr_time = DAY.replace(hour=hour, minute=minute)
+    scratch.f_daily_schedule = [list(block) for block in SCHEDULE]
+    if sleeping:
+        # The night's sleep, ending at 7:00
+        scratch.add_new_action("the Ville", 420, "sleeping", "😴",
+                               ("a", "b", "c"), start_time=DAY)
+    return SimpleNamespace(name=scratch.name, scratch=scratch)
+
+
+def wait_all(pref):
+    for pending in pref._pending.values():
+        for future in list(pending.values()):
+            future.result()
+
+
+def run_day(persona):
+    """Step one minute at a time through the waking day, as plan() does."""
+    for minute in range(6 * 60, 23 * 60):
+        persona.scratch.curr_time = DAY + datetime.timedelta(minutes=minute)
+        if persona.scratch.act_check_finished():
+            plan._determine_action(persona, None)
+        plan._prefetch_decomps(persona)
+    return persona.scratch.f_daily_schedule
+
+
+def test_prefetched_day_matches_inline(prefetcher, decomp_calls,
+                                       monkeypatch):
+    monkeypatch.setattr(plan, "DECOMP_PREFETCH", False)
+    inline_schedule = run_day(make_persona(6, 0))
+    inline_calls = sorted(c[:2] for c in decomp_calls)
+    assert all(not c[2].startswith("decomp") for c in decomp_calls)
+
+    decomp_calls.clear()
+    monkeypatch.setattr(plan, "DECOMP_PREFETCH", True)
+    assert run_day(make_persona(6, 0)) == inline_schedule
+    # Same prompts, each asked once. The day's first decision splits two
+    # blocks inline; every later one was ready ahead of time
+    assert sorted(c[:2] for c in decomp_calls) == inline_calls
+    prefetched = [c for c in decomp_calls if c[2].startswith("decomp")]
+    assert len(prefetched) == len(inline_calls) - 2
+    stats = prefetcher.stats()
+    assert stats["hits"] + stats["waits"] == len(prefetched)
+    assert (stats["misses"], stats["discarded"], stats["in_flight"]) == \
+        (2, 0, 0)
+
+
+def test_changed_schedule_discards_stale_result(prefetcher, decomp_calls):
+    persona = make_persona(6, 50, sleeping=True)
+    plan._prefetch_decomps(persona)
+    wait_all(prefetcher)
+
+    # A replan swaps the work block before it comes up
+    persona.scratch.f_daily_schedule[2] = ["volunteering at the library", 240]
+    plan._prefetch_decomps(persona)
+    wait_all(prefetcher)
+    assert prefetcher.stats()["discarded"] == 1
+    assert prefetcher.take(persona, plan.task_decomp_inputs(persona), 480,
+                           "working at the cafe counter", 240) is None
+
+    persona.scratch.curr_time = DAY.replace(hour=7, minute=0)
+    plan._determine_action(persona, None)
+    assert persona.scratch.f_daily_schedule[2][0] == \
+        "volunteering at the library (part 1)"
+    assert [c[:2] for c in decomp_calls].count(
+        ("volunteering at the library", 240)) == 1
+
+
+def test_changed_identity_discards_stale_result(prefetcher, decomp_calls):
+    persona = make_persona(6, 50, sleeping=True)
+    plan._prefetch_decomps(persona)
+    wait_all(prefetcher)
+
+    # The prompt now reads differently, so the inline call asks again
+    persona.scratch.currently = "Isabella is resting after the party"
+    persona.scratch.curr_time = DAY.replace(hour=7, minute=0)
+    plan._determine_action(persona, None)
+    assert [c[:2] for c in decomp_calls].count(
+        ("working at the cafe counter", 240)) == 2
+    plan._prefetch_decomps(persona)
+    assert prefetcher.stats()["discarded"] == 1
@@ -0,0 +1,77 @@
+"""Embedding cache: batched misses, input order, hits and LRU eviction."""
+import sys
+sys.path.insert(0, ".")
+
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from backend.llm import embedding
+
+
+class CountingModel:
+    """Embeds a text as (len, first char code); records every batch."""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts):
+        self.batches.append(list(texts))
+        return np.array([[len(t), ord(t[0])] for t in texts],
+                        dtype=np.float32)
+
+
+def vec(text):
+    return [float(len(text)), float(ord(text[0]))]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = CountingModel()
+    monkeypatch.setattr(embedding, "_get_model", lambda: model)
+    monkeypatch.setattr(embedding, "_cache", OrderedDict())
+    monkeypatch.setattr(embedding, "_cache_hits", 0)
+    monkeypatch.setattr(embedding, "_cache_misses", 0)
+    monkeypatch.setattr(embedding, "EMBEDDING_CACHE_SIZE", 4)
+    return model
+
+
+def test_misses_are_deduplicated_into_one_encode(model):
+    texts = ["cafe", "bed", "cafe", "park", "bed"]
+    assert embedding.get_embeddings(texts) == [vec(t) for t in texts]
+    assert model.batches == [["cafe", "bed", "park"]]
+
+
+def test_hits_skip_the_model_and_keep_input_order(model):
+    embedding.get_embeddings(["cafe", "bed"])
+    texts = ["park", "bed", "cafe", "zoo"]
+    assert embedding.get_embeddings(texts) == [vec(t) for t in texts]
+    # Only the misses were sent, in first-seen order
+    assert model.batches[1:] == [["park", "zoo"]]
+
+    assert embedding.get_embeddings(["cafe", "zoo"]) == \
+        [vec("cafe"), vec("zoo")]
+    assert len(model.batches) == 2
+    assert embedding.get_embedding("bed") == vec("bed")
+    assert len(model.batches) == 2
+
+    # Callers get copies, not the cached lists
+    embedding.get_embedding("bed")[0] = -1.0
+    assert embedding.get_embedding("bed") == vec("bed")
+
+
+def test_lru_evicts_least_recently_used(model):
+    embedding.get_embeddings(["a1", "b22", "c333", "d4444"])
+    # Touch "a1" so "b22" is the oldest
+    embedding.get_embedding("a1")
+    embedding.get_embedding("e55555")
+    assert list(embedding._cache) == ["c333", "d4444", "a1", "e55555"]
+
+    model.batches.clear()
+    embedding.get_embeddings(["a1", "b22"])
+    assert model.batches == [["b22"]]
+    assert len(embedding._cache) == 4
+    stats = embedding.embedding_cache_stats()
+    assert stats["entries"] == 4
+    assert stats["hits"] == 2
@@ -0,0 +1,130 @@
+"""EmbeddingStore: growth, similarity branches, missing rows and dirty rows."""
+import sys
+sys.path.insert(0, ".")
+
+import numpy as np
+import pytest
+
+from backend.persona.memory_structures.embedding_store import EmbeddingStore
+
+
+def random_rows(n, dim=8, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(
+        np.float32)
+
+
+def cosine(a, b):
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+class CountingStore(EmbeddingStore):
+    """Counts reads of the whole-matrix view used by similarities()."""
+
+    whole_matrix_reads = 0
+
+    @property
+    def matrix(self):
+        self.whole_matrix_reads += 1
+        return super().matrix
+
+
+def fill(store, raw):
+    for i, vec in enumerate(raw):
+        store[f"k{i}"] = vec
+    return store
+
+
+def test_grow_doubles_past_capacity():
+    raw = random_rows(9)
+    store = fill(EmbeddingStore(capacity=2), raw[:2])
+    assert store._capacity == 2
+    store["k2"] = raw[2]
+    assert store._capacity == 4
+    fill(store, raw)
+    assert store._capacity == 16
+    assert store._matrix.shape == (16, 8)
+    assert len(store) == 9 and store.matrix.shape == (9, 8)
+    for i, vec in enumerate(raw):
+        np.testing.assert_allclose(store[f"k{i}"], vec, rtol=1e-5)
+
+    # A batch larger than double the capacity grows straight past it
+    store._grow(70)
+    assert store._capacity == 128
+    np.testing.assert_allclose(store["k8"], raw[8], rtol=1e-5)
+
+
+@pytest.mark.parametrize("n_rows,whole", [(20, True), (5, True), (4, False),
+                                          (1, False)])
+def test_similarities_whole_matrix_and_gather_agree(n_rows, whole):
+    raw = random_rows(20)
+    store = fill(CountingStore(), raw)
+    query = random_rows(1, seed=1)[0]
+    rows = np.arange(n_rows)[::-1].copy()
+    rows[-1] = -1
+
+    got = store.similarities(query, rows)
+    assert store.whole_matrix_reads == (1 if whole else 0)
+    want = [0.0 if r < 0 else cosine(raw[r], query) for r in rows]
+    np.testing.assert_allclose(got, want, rtol=1e-5, atol=1e-6)
+
+
+def test_similarities_degenerate_queries():
+    store = fill(EmbeddingStore(), random_rows(4))
+    assert not store.similarities(np.zeros(8)).any()
+    assert not store.similarities(np.ones(3)).any()
+    assert not store.similarities(np.ones(8), [-1, -1]).any()
+    assert len(EmbeddingStore().similarities(np.ones(8))) == 0
+
+
+def test_similarity_matrix_missing_rows_and_zero_queries():
+    raw = random_rows(6)
+    store = fill(EmbeddingStore(), raw)
+    queries = random_rows(3, seed=2)
+    queries[1] = 0.0
+    rows = np.array([3, -1, 0, 5])
+
+    got = store.similarity_matrix(queries, rows)
+    assert got.shape == (4, 3)
+    assert not got[1].any()
+    assert not got[:, 1].any()
+    for i, r in enumerate(rows):
+        for j in (0, 2):
+            if r >= 0:
+                assert got[i, j] == pytest.approx(cosine(raw[r], queries[j]),
+                                                  abs=1e-5)
+    # Each column matches the single-query path
+    for j in range(3):
+        np.testing.assert_allclose(got[:, j],
+                                   store.similarities(queries[j], rows),
+                                   atol=1e-6)
+
+    assert not store.similarity_matrix(np.ones((2, 5)), rows).any()
+    assert store.similarity_matrix([], rows).shape == (4, 0)
+
+
+def test_setitem_on_existing_row_marks_it_dirty():
+    raw = random_rows(4)
+    store = fill(EmbeddingStore(), raw)
+    store.mark_clean()
+    assert store.pending()[0] == []
+
+    # Writing the same vector back is a no-op
+    store["k1"] = raw[1]
+    assert store.pending()[0] == []
+
+    store["k2"] = raw[2] * 3
+    store["k4"] = raw[0]
+    keys, vectors = store.pending()
+    assert keys == ["k2", "k4"]
+    np.testing.assert_allclose(vectors, [raw[2] * 3, raw[0]], rtol=1e-5)
+    np.testing.assert_allclose(store["k2"], raw[2] * 3, rtol=1e-5)
+    assert store.similarities(raw[2], [store.row("k2")])[0] == \
+        pytest.approx(1.0)
+
+    store.mark_clean()
+    assert store.pending()[0] == []
+    # Rows appended after the last mark_clean() are pending, not dirty
+    store["k5"] = raw[1]
+    store["k0"] = raw[3]
+    assert store._dirty == {0}
+    assert store.pending()[0] == ["k0", "k5"]
@@ -0,0 +1,153 @@
+"""LLM client: async API and the global request limiter (no server)."""
+import sys
+sys.path.insert(0, ".")
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend.llm import llm_client
+from backend.llm.response_cache import ResponseCache
+
+
+class FakeCompletions:
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    async def create(self, model, messages, temperature, max_tokens):
+        self.in_flight += 1
+        self.calls += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        content = f"<think>hmm</think> echo {messages[-1]['content']}"
+        return SimpleNamespace(choices=[
+            SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@pytest.fixture
+def fake(monkeypatch, tmp_path):
+    completions = FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm_client, "_get_client", lambda: client)
+    monkeypatch.setattr(llm_client, "_semaphore", asyncio.Semaphore(2))
+    monkeypatch.setattr(llm_client, "_cache",
+                        ResponseCache(tmp_path / "c.sqlite3", "always"))
+    return completions
+
+
+def test_async_requests_share_the_limit(fake):
+    async def many():
+        return await llm_client.agather(*[
+            llm_client.asafe_generate_response(
+                f"p{i}", {"temperature": 0}, 2, "fail",
+                lambda r, p: r.startswith("echo"), lambda r, p: r)
+            for i in range(8)])
+
+    assert llm_client.run_async(many()) == [f"echo p{i}" for i in range(8)]
+    assert fake.peak == 2
+
+    # Cached at temperature 0: no second round-trip
+    assert llm_client.chat_completion(
+        [{"role": "user", "content": "p3"}], temperature=0) == "echo p3"
+    assert fake.calls == 8
+
+
+def test_threads_and_coroutines_use_one_limiter(fake):
+    results = []
+
+    def worker(i):
+        results.append(llm_client.chat_completion(
+            [{"role": "user", "content": f"t{i}"}], temperature=1.0))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    # A caller with its own event loop awaits alongside the threads
+    asyncio.run(llm_client.achat_completion(
+        [{"role": "user", "content": "own loop"}], temperature=1.0))
+    for t in threads:
+        t.join()
+    assert sorted(results) == sorted(f"echo t{i}" for i in range(6))
+    assert fake.peak == 2
+
+
+def test_only_validated_responses_are_cached(fake):
+    # The first answer fails validation and must not stick
+    seen = []
+
+    def validate(r, p):
+        seen.append(r)
+        return len(seen) > 1
+
+    got = llm_client.safe_generate_response(
+        "q", {"temperature": 0}, 3, "fail", validate, lambda r, p: r)
+    assert got == "echo q" and fake.calls == 2
+    # Validated answer is reused from the cache
+    assert llm_client.safe_generate_response(
+        "q", {"temperature": 0}, 3, "fail", lambda r, p: True,
+        lambda r, p: r) == "echo q"
+    assert fake.calls == 2
+
+
+def test_bad_cached_response_is_not_retried_from_cache(fake):
+    messages = [{"role": "user", "content": "q"}]
+    key = llm_client._cache_key(messages, llm_client.LLM_MODEL, 0, 1024)
+    llm_client.get_response_cache().put(key, "garbage")
+
+    def validate(r, p):
+        return r.startswith("echo")
+
+    got = llm_client.safe_generate_response(
+        "q", {"temperature": 0}, 3, "fail", validate, lambda r, p: r)
+    assert got == "echo q" and fake.calls == 1
+    assert llm_client.get_response_cache().get(key) == "echo q"
+
+    got = llm_client.run_async(llm_client.asafe_generate_response(
+        "q", {"temperature": 0}, 3, "fail", validate, lambda r, p: r))
+    assert got == "echo q" and fake.calls == 1
+
+
+def test_cache_hits_buffer_recency_until_next_write(tmp_path):
+    cache = ResponseCache(tmp_path / "c.sqlite3", "always", max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    assert cache._touched  # not written yet
+    # The buffered hit still counts when "c" forces an eviction
+    cache.put("c", "3")
+    assert not cache._touched
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == ("1", None, "3")
+
+
+def test_reflect_awaits_each_stage_together(fake, monkeypatch):
+    import datetime
+
+    from backend.persona.cognitive_modules import reflect
+
+    nodes = [SimpleNamespace(node_id=f"node_{i}", embedding_key=f"fact {i}")
+             for i in range(3)]
+    added = []
+    persona = SimpleNamespace(
+        name="Isabella Rodriguez",
+        scratch=SimpleNamespace(name="Isabella Rodriguez",
+                                curr_time=datetime.datetime(2023, 2, 13)),
+        a_mem=SimpleNamespace(add_thought=lambda *args: added.append(args)))
+    monkeypatch.setattr(reflect, "generate_focal_points",
+                        lambda persona, n: ["q1", "q2", "q3"])
+    monkeypatch.setattr(reflect, "new_retrieve",
+                        lambda persona, points: {p: nodes for p in points})
+    monkeypatch.setattr(reflect, "score_poignancy",
+                        lambda persona, kind, descs, single: [5] * len(descs))
+    monkeypatch.setattr(reflect, "get_embeddings",
+                        lambda texts: [[0.0]] * len(texts))
+
+    reflect.run_reflect(persona)
+    # Three insight prompts, then a triple per insight line, two at a time
+    assert fake.peak == 2
+    assert fake.calls == 3 + len(added)
+    assert added and all(args[2] for args in added)
@@ -0,0 +1,128 @@
+"""Maze loading: binary layer cache vs parsing the CSVs."""
+import sys
+sys.path.insert(0, ".")
+
+import shutil
+
+from backend.config import DATA_DIR
+from backend.maze import Maze
+
+
+def snapshot(maze):
+    tiles = [maze.access_tile((x, y)) for y in range(maze.maze_height)
+             for x in range(maze.maze_width)]
+    return (maze.collision_maze, maze.sector_maze, maze.arena_maze,
+            maze.game_object_maze, maze.spawning_maze,
+            list(maze.address_tiles.items()), tiles,
+            bytes(maze.collision_grid.blocked))
+
+
+def test_cache_round_trip_and_invalidation(tmp_path):
+    shutil.copytree(DATA_DIR / "the_ville" / "matrix",
+                    tmp_path / "the_ville" / "matrix")
+    want = snapshot(Maze("the_ville", tmp_path, use_cache=False))
+    assert not (tmp_path / "cache").exists()
+
+    assert snapshot(Maze("the_ville", tmp_path)) == want
+    cached = list((tmp_path / "cache").glob("*.npz"))
+    assert len(cached) == 1
+    assert snapshot(Maze("the_ville", tmp_path)) == want
+
+    # Editing a layer changes the key, so the stale cache is not used
+    csv_path = tmp_path / "the_ville/matrix/maze/collision_maze.csv"
+    csv_path.write_text("32001, " + csv_path.read_text().split(",", 1)[1])
+    maze = Maze("the_ville", tmp_path)
+    assert maze.collision_maze[0][0] == 32001
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 2
+
+    # A corrupt cache file is ignored and reparsed
+    cached[0].write_bytes(b"not a zip")
+    csv_path.write_text("0, " + csv_path.read_text().split(",", 1)[1])
+    assert snapshot(Maze("the_ville", tmp_path)) == want
+
+
+def test_interned_ids_and_sparse_events():
+    maze = Maze("the_ville", DATA_DIR)
+    tiles = [(x, y) for y in range(maze.maze_height)
+             for x in range(maze.maze_width)]
+    by_path = {}
+    for tile in tiles:
+        info = maze.access_tile(tile)
+        path = f"{info['world']}:{info['sector']}:{info['arena']}"
+        assert maze.get_tile_path(tile, "arena") == path
+        assert maze.get_tile_path(tile, "sector") == \
+            f"{info['world']}:{info['sector']}"
+        # One arena id per arena path
+        assert by_path.setdefault(path, maze.arena_id(tile)) == \
+            maze.arena_id(tile)
+    assert maze.arena_id((-1, 0)) == -1
+
+    tile = tiles[5000]
+    event = ("the Ville:cafe:counter:stove", "is", "on", "cooking")
+    assert maze.events == {}
+    maze.add_event_from_tile(event, tile)
+    maze.add_event_from_tile(("Klaus", None, None, None), tile)
+    assert maze.access_tile(tile)["events"] == {
+        event, ("Klaus", None, None, None)}
+    maze.turn_event_from_tile_idle(event, tile)
+    assert (event[0], None, None, None) in maze.tile_events(tile)
+    maze.remove_subject_events_from_tile("Klaus", tile)
+    maze.remove_event_from_tile((event[0], None, None, None), tile)
+    # Emptied tiles are dropped again
+    assert maze.events == {}
+    assert maze.tile_events(tile) == ()
+
+
+def test_events_in_view_matches_vision_square_scan():
+    import random
+
+    maze = Maze("the_ville", DATA_DIR)
+    rng = random.Random(0)
+    tiles = [(x, y) for y in range(maze.maze_height)
+             for x in range(maze.maze_width)]
+    placed = rng.sample(tiles, 400)
+    for k, tile in enumerate(placed):
+        maze.add_event_from_tile((f"s{k}", "is", "o", "d"), tile)
+    for tile in placed[:100]:
+        maze.remove_subject_events_from_tile(
+            next(iter(maze.tile_events(tile)))[0], tile)
+
+    for _ in range(200):
+        center, radius = rng.choice(tiles), rng.randrange(0, 12)
+        want = [(t, maze.tile_events(t))
+                for t in maze.get_nearby_tiles(center, radius)
+                if maze.tile_events(t)
+                and maze.arena_id(t) == maze.arena_id(center)]
+        assert maze.events_in_view(center, radius) == want
+    assert sum(len(t) for t in maze.arena_event_tiles.values()) == 300
+
+
+def test_layers_are_arrays_and_lists_are_lazy():
+    import numpy as np
+
+    maze = Maze("the_ville", DATA_DIR)
+    names = ("collision", "sector", "arena", "game_object", "spawning")
+    for name in names:
+        layer = getattr(maze, f"{name}_layer")
+        assert layer.dtype == np.int32
+        assert layer.shape == (maze.maze_height, maze.maze_width)
+        # No nested lists until something reads them
+        assert f"{name}_maze" not in maze.__dict__
+
+    tile = next((x, y) for y in range(maze.maze_height)
+                for x in range(maze.maze_width)
+                if maze.collision_layer[y, x] == 0)
+    x, y = tile
+    maze.set_collision(tile, True)
+    assert maze.collision_layer[y, x] == 32001
+    assert "collision_maze" not in maze.__dict__
+
+    rows = maze.collision_maze
+    assert rows is maze.collision_maze
+    assert rows == maze.collision_layer.tolist()
+    maze.set_collision(tile, False)
+    assert rows[y][x] == 0 and maze.collision_layer[y, x] == 0
+    assert maze.collision_grid.blocked[y * maze.maze_width + x] == 0
+    for name in names[1:]:
+        assert getattr(maze, f"{name}_maze") == \
+            getattr(maze, f"{name}_layer").tolist()
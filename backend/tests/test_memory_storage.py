@@ -0,0 +1,148 @@
+"""Associative memory on disk: base, segments, compaction, interrupted saves."""
+import sys
+sys.path.insert(0, ".")
+
+import datetime
+import json
+
+import numpy as np
+import pytest
+
+from backend.persona.memory_structures import associative_memory, storage
+from backend.persona.memory_structures.associative_memory import AssociativeMemory
+
+START = datetime.datetime(2023, 2, 13, 8, 0, 0)
+
+
+def add_nodes(a_mem, first, count):
+    rng = np.random.default_rng(first)
+    for i in range(first, first + count):
+        desc = f"cafe is busy {i % 7}"
+        add = a_mem.add_thought if i % 3 == 0 else a_mem.add_event
+        add(START + datetime.timedelta(minutes=i), None, "Isabella Rodriguez",
+            "is", desc, desc, {"cafe", f"kw{i % 5}"}, i % 10 + 1,
+            (desc, rng.standard_normal(8).tolist()), None)
+
+
+def state(a_mem):
+    """Everything a reload must reproduce."""
+    nodes = [storage.node_to_record(a_mem.id_to_node[f"node_{i}"])
+             for i in range(1, len(a_mem.id_to_node) + 1)]
+    for record in nodes:
+        record["keywords"] = sorted(record["keywords"])  # a set on load
+    embeddings = {k: np.round(a_mem.embeddings[k], 5).tolist()
+                  for k in a_mem.embeddings}
+    return (nodes, embeddings, a_mem.kw_strength_event,
+            a_mem.kw_strength_thought,
+            [n.node_id for n in a_mem.seq_event],
+            {kw: [n.node_id for n in v] for kw, v in a_mem.kw_to_thought.items()})
+
+
+def manifest(folder):
+    return json.load(open(folder / storage.FORMAT_FILE))
+
+
+def test_round_trip_segments_and_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(associative_memory, "COMPACT_AFTER_SEGMENTS", 3)
+    folder = tmp_path / "mem"
+    a_mem = AssociativeMemory(str(folder))
+    add_nodes(a_mem, 1, 20)
+    a_mem.save(str(folder))
+    assert manifest(folder) == {
+        "version": 4, "nodes": 20, "base": 1, "segments": [],
+        "kw_strength": "base_000001/kw_strength.json"}
+    assert state(AssociativeMemory(str(folder))) == state(a_mem)
+
+    # A save with nothing new writes nothing
+    a_mem.save(str(folder))
+    assert manifest(folder)["segments"] == []
+
+    # Each further save appends one segment, then compacts
+    for round_ in range(3):
+        add_nodes(a_mem, 21 + 5 * round_, 5)
+        a_mem.save(str(folder))
+        assert manifest(folder)["segments"] == [
+            storage.segment_name(i + 1) for i in range(round_ + 1)]
+        assert state(AssociativeMemory(str(folder))) == state(a_mem)
+
+    add_nodes(a_mem, 36, 2)
+    a_mem.save(str(folder))
+    assert manifest(folder)["base"] == 2
+    assert manifest(folder)["segments"] == []
+    assert sorted(p.name for p in folder.iterdir()) == [
+        "base_000002", "format.json"]
+    reloaded = AssociativeMemory(str(folder))
+    assert state(reloaded) == state(a_mem)
+
+    # A reloaded memory keeps appending where the folder left off
+    add_nodes(reloaded, 38, 3)
+    reloaded.save(str(folder))
+    assert manifest(folder)["segments"] == ["seg_000001"]
+    assert state(AssociativeMemory(str(folder))) == state(reloaded)
+
+
+@pytest.mark.parametrize("segments_before", [0, 1, 3])
+def test_save_interrupted_before_manifest_keeps_checkpoint(
+        tmp_path, monkeypatch, segments_before):
+    # segments_before=3 makes the interrupted save a compaction
+    monkeypatch.setattr(associative_memory, "COMPACT_AFTER_SEGMENTS", 3)
+    folder = tmp_path / "mem"
+    a_mem = AssociativeMemory(str(folder))
+    add_nodes(a_mem, 1, 10)
+    a_mem.save(str(folder))
+    for i in range(segments_before):
+        add_nodes(a_mem, 11 + i, 1)
+        a_mem.save(str(folder))
+    checkpoint = state(AssociativeMemory(str(folder)))
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    add_nodes(a_mem, 20, 4)
+    monkeypatch.setattr(associative_memory, "write_manifest", crash)
+    with pytest.raises(OSError):
+        a_mem.save(str(folder))
+    assert state(AssociativeMemory(str(folder))) == checkpoint
+
+    # The next save after a restart recovers and cleans up
+    monkeypatch.undo()
+    restarted = AssociativeMemory(str(folder))
+    add_nodes(restarted, 20, 4)
+    restarted.compact(str(folder))
+    assert state(AssociativeMemory(str(folder))) == state(restarted)
+    assert not list(folder.glob("seg_*"))
+    assert [p.name for p in folder.glob("base_*")] == [
+        storage.base_name(manifest(folder)["base"])]
+
+
+def test_version_1_and_2_folders_load_and_upgrade(tmp_path):
+    source = AssociativeMemory(str(tmp_path / "new"))
+    add_nodes(source, 1, 12)
+    legacy = tmp_path / "v1"
+    legacy.mkdir()
+    (legacy / storage.LEGACY_NODES_FILE).write_text(json.dumps({
+        node.node_id: storage.node_to_record(node)
+        for node in source._nodes_from(1)}))
+    (legacy / storage.LEGACY_EMBEDDINGS_FILE).write_text(
+        json.dumps(source.embeddings.to_dict()))
+    storage.write_kw_strength(legacy / storage.KW_STRENGTH_FILE,
+                              source._kw_strength())
+    a_mem = AssociativeMemory(str(legacy))
+    assert state(a_mem) == state(source)
+
+    # A version 2 folder: base files at the top level, no segments
+    v2 = tmp_path / "v2"
+    v2.mkdir()
+    storage.write_nodes(str(v2), a_mem._nodes_from(1))
+    a_mem.embeddings.save(str(v2))
+    storage.write_kw_strength(v2 / storage.KW_STRENGTH_FILE,
+                              a_mem._kw_strength())
+    (v2 / storage.FORMAT_FILE).write_text(json.dumps({"version": 2}))
+    from_v2 = AssociativeMemory(str(v2))
+    assert state(from_v2) == state(a_mem)
+
+    add_nodes(from_v2, 1, 2)
+    from_v2.save(str(v2))
+    assert manifest(v2)["base"] == 1
+    assert not (v2 / storage.NODES_FILE).exists()
+    assert state(AssociativeMemory(str(v2))) == state(from_v2)
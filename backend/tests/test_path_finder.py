@@ -0,0 +1,196 @@
+"""Path finding: multi-target search and distance fields vs plain A*."""
+import sys
+sys.path.insert(0, ".")
+
+import random
+
+import pytest
+
+from backend.path_finder import (
+    CollisionGrid, path_finder, path_finder_dict, path_finder_multi)
+
+
+def random_maze(seed, width, height, wall_density):
+    rng = random.Random(seed)
+    return [[1 if rng.random() < wall_density else 0 for _ in range(width)]
+            for _ in range(height)]
+
+
+def free_tiles(maze):
+    return [(x, y) for y, row in enumerate(maze)
+            for x, v in enumerate(row) if v == 0]
+
+
+def assert_valid_path(maze, path, start):
+    assert path[0] == start
+    for a, b in zip(path, path[1:]):
+        assert abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1
+        assert maze[b[1]][b[0]] == 0
+
+
+@pytest.mark.parametrize("seed,density", [(0, 0.0), (1, 0.2), (2, 0.4)])
+def test_flat_astar_matches_reference(seed, density):
+    maze = random_maze(seed, 30, 20, density)
+    grid = CollisionGrid.from_rows(maze)
+    rng = random.Random(seed)
+    # Any tile, so blocked starts/ends and unreachable goals are covered
+    tiles = [(x, y) for y in range(20) for x in range(30)]
+    for _ in range(100):
+        start, end = rng.choice(tiles), rng.choice(tiles)
+        want = path_finder_dict(maze, start, end)
+        got = path_finder(grid, start, end)
+        assert len(got) == len(want)
+        if len(got) > 1:
+            assert_valid_path(maze, got, start)
+            assert got[-1] == want[-1]
+        # Plain nested lists are still accepted
+        assert len(path_finder(maze, start, end)) == len(want)
+
+
+@pytest.mark.parametrize("seed,n_targets", [
+    (0, 1), (1, 3), (2, 8), (3, 9), (4, 40)])
+def test_multi_matches_best_single_target(seed, n_targets):
+    maze = random_maze(seed, 40, 30, 0.25)
+    rng = random.Random(seed)
+    tiles = free_tiles(maze)
+    for _ in range(20):
+        start = rng.choice(tiles)
+        targets = rng.sample(tiles, n_targets)
+        paths = [path_finder(maze, start, t) for t in targets]
+        lengths = [len(p) for p in paths if p]
+
+        got = path_finder_multi(maze, start, targets)
+
+        if not lengths:
+            assert got == []
+            continue
+        assert len(got) == min(lengths)
+        assert_valid_path(maze, got, start)
+        assert got[-1] in targets
+
+
+def test_multi_edge_cases():
+    maze = random_maze(7, 10, 10, 0.0)
+    assert path_finder_multi(maze, (2, 2), []) == []
+    assert path_finder_multi(maze, (2, 2), [(5, 5), (2, 2)]) == [(2, 2)]
+    # A blocked target falls back to a nearby walkable tile
+    maze[5][5] = 1
+    path = path_finder_multi(maze, (0, 0), [(5, 5)])
+    assert len(path) == len(path_finder(maze, (0, 0), (5, 5)))
+
+
+def test_multi_heuristic_targets_closest_goal(monkeypatch):
+    # Two goals at opposite corners: their bounding box is the whole map,
+    # so only the per-goal minimum keeps the search near the start
+    import backend.path_finder as pf
+
+    maze = random_maze(0, 60, 60, 0.0)
+    grid = CollisionGrid.from_rows(maze)
+
+    def touched():
+        path_finder_multi(grid, (5, 10), [(2, 2), (57, 57)])
+        _, _, stamp, token = grid.buffers()
+        return sum(1 for s in stamp if s == token - 1)
+
+    closest = touched()
+    monkeypatch.setattr(pf, "SMALL_GOAL_SET", 1)
+    bounding_box = touched()
+    assert len(path_finder_multi(grid, (5, 10), [(2, 2), (57, 57)])) == 12
+    assert closest * 4 < bounding_box
+
+
+def test_distance_field_paths_match_multi_search():
+    from backend.config import DATA_DIR
+    from backend.maze import Maze
+
+    maze = Maze("the_ville", DATA_DIR, field_cache_size=8)
+    cm = maze.collision_maze
+    rng = random.Random(0)
+    tiles = [(x, y) for y in range(maze.maze_height)
+             for x in range(maze.maze_width)]
+    addresses = sorted(maze.address_tiles)
+    for _ in range(60):
+        # Includes blocked start tiles, which path_finder also allows
+        start = rng.choice(tiles)
+        address = rng.choice(addresses)
+        want = path_finder_multi(cm, start, list(maze.address_tiles[address]))
+        got = maze.path_to_address(address, start)
+        assert len(got) == len(want)
+        if got:
+            assert_valid_path(cm, got, start)
+    assert len(maze._fields) == 8
+
+
+def test_maze_path_cache_reuses_and_invalidates():
+    from backend.config import DATA_DIR
+    from backend.maze import Maze
+
+    maze = Maze("the_ville", DATA_DIR, path_cache_size=16)
+    rows = maze.collision_maze
+    free = free_tiles(rows)
+    rng = random.Random(1)
+    start, end = rng.sample(free, 2)
+    while len(path_finder(maze.collision_grid, start, end)) < 10:
+        start, end = rng.sample(free, 2)
+
+    path = maze.find_path(start, end)
+    assert maze.find_path(start, end) == path
+    # A tile already on the cached path reuses its suffix
+    assert maze.find_path(path[5], end) == path[5:]
+    stats = maze.path_cache_stats()
+    assert (stats["hits"], stats["suffix_hits"], stats["misses"]) == (1, 1, 1)
+
+    # Blocking a tile on the path bumps the version and drops the cache
+    maze.set_collision(path[len(path) // 2], True)
+    assert maze.collision_version == 1
+    new_path = maze.find_path(start, end)
+    assert path[len(path) // 2] not in new_path
+    assert maze.path_cache_stats()["misses"] == 2
+
+
+def test_hierarchical_paths_are_valid_and_near_optimal():
+    from backend.config import DATA_DIR
+    from backend.hierarchical_path_finder import HierarchicalPathFinder
+    from backend.maze import Maze
+
+    maze = Maze("the_ville", DATA_DIR)
+    finder = HierarchicalPathFinder(maze)
+    rows, grid = maze.collision_maze, maze.collision_grid
+    free = free_tiles(rows)
+    rng = random.Random(2)
+    for _ in range(80):
+        start, end = rng.choice(free), rng.choice(free)
+        want = path_finder(grid, start, end)
+        got = finder(grid, start, end)
+        assert bool(got) == bool(want)
+        if want:
+            assert_valid_path(rows, got, start)
+            assert got[-1] == want[-1]
+            assert len(want) <= len(got) <= 1.5 * len(want)
+
+
+@pytest.mark.parametrize("seed,density", [(0, 0.0), (1, 0.1), (2, 0.3), (3, 0.5)])
+def test_jps_matches_astar(seed, density):
+    maze = random_maze(seed, 30, 20, density)
+    grid = CollisionGrid.from_rows(maze)
+    rng = random.Random(seed)
+    tiles = [(x, y) for y in range(20) for x in range(30)]
+    for _ in range(200):
+        start, end = rng.choice(tiles), rng.choice(tiles)
+        want = path_finder(grid, start, end)
+        got = path_finder(grid, start, end, method="jps")
+        assert len(got) == len(want)
+        if len(got) > 1:
+            assert_valid_path(maze, got, start)
+            assert got[-1] == want[-1]
+    # The jump tables follow collision changes
+    free = free_tiles(maze)
+    for x, y in rng.sample(free, 10):
+        grid.set_blocked(x, y, True)
+        maze[y][x] = 1
+    for _ in range(50):
+        start, end = rng.choice(tiles), rng.choice(tiles)
+        got = path_finder(grid, start, end, method="jps")
+        assert len(got) == len(path_finder(grid, start, end))
+        if len(got) > 1:
+            assert_valid_path(maze, got, start)
@@ -0,0 +1,110 @@
+"""Fused action prompt: validation and per-field fallback (no LLM)."""
+import sys
+sys.path.insert(0, ".")
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from backend.persona.cognitive_modules import plan
+from backend.persona.memory_structures.spatial_memory import MemoryTree
+
+TREE = {"the Ville": {
+    "Hobbs Cafe": {"cafe": ["counter", "kitchen sink"]},
+    "Isabella's apartment": {"main room": ["bed", "desk"],
+                             "bathroom": ["shower"]},
+}}
+
+
+def make_persona():
+    s_mem = MemoryTree("/nonexistent")
+    s_mem.tree = json.loads(json.dumps(TREE))
+    scratch = SimpleNamespace(
+        name="Isabella Rodriguez", first_name="Isabella", curr_tile=(1, 1),
+        act_address="the Ville:Hobbs Cafe:cafe",
+        get_str_iss=lambda: "Name: Isabella Rodriguez")
+    return SimpleNamespace(name="Isabella Rodriguez", scratch=scratch,
+                           s_mem=s_mem)
+
+
+MAZE = SimpleNamespace(access_tile=lambda tile: {"world": "the Ville"})
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """Answers the fused prompt with ``llm.fused``; every other prompt gets
+    a canned answer. Records which generators ran."""
+    state = SimpleNamespace(fused={}, prompts=[])
+
+    def fake_generate(prompt, gpt_param, retries, fail_safe, validate,
+                      cleanup):
+        if "Answer with ONLY a JSON object" in prompt:
+            state.prompts.append("fused")
+            response = json.dumps(state.fused)
+        elif "Available areas" in prompt:
+            state.prompts.append("sector")
+            response = "Isabella's apartment"
+        elif "Available locations" in prompt:
+            state.prompts.append("arena")
+            response = "main room"
+        elif "Available objects" in prompt:
+            state.prompts.append("object")
+            response = "desk"
+        elif "triple" in prompt:
+            state.prompts.append("event")
+            response = "Isabella Rodriguez | is | working"
+        else:
+            state.prompts.append("emoji")
+            response = "📝"
+        if not validate(response, prompt):
+            return fail_safe
+        return cleanup(response, prompt)
+
+    def fake_single(prompt):
+        state.prompts.append("object_state")
+        return "being used"
+
+    monkeypatch.setattr(plan, "safe_generate_response", fake_generate)
+    monkeypatch.setattr(plan, "ChatGPT_single_request", fake_single)
+    return state
+
+
+def test_fused_answer_replaces_the_chain(llm):
+    llm.fused = {"sector": "hobbs cafe", "arena": "Cafe", "object": "counter",
+                 "emoji": "☕", "event": ["Isabella Rodriguez", "is",
+                                         "serving coffee"],
+                 "object_state": "being wiped", "object_emoji": "🧽"}
+    details = plan._action_details("serving coffee", make_persona(), MAZE,
+                                   fused_mode=True)
+    assert llm.prompts == ["fused"]
+    assert details == (
+        "the Ville:Hobbs Cafe:cafe:counter", "☕",
+        ("Isabella Rodriguez", "is", "serving coffee"), "being wiped", "🧽",
+        ("counter", "is", "being wiped"))
+
+
+def test_invalid_fields_fall_back_individually(llm):
+    # Unknown arena: arena, object and object state are regenerated; the
+    # sector, emoji and event triple from the fused answer are kept
+    llm.fused = {"sector": "Isabella's apartment", "arena": "garage",
+                 "object": "car", "emoji": "🛏", "event": ["Isabella"],
+                 "object_state": "parked", "object_emoji": "🚗"}
+    details = plan._action_details("writing", make_persona(), MAZE,
+                                   fused_mode=True)
+    assert llm.prompts == ["fused", "arena", "object", "event",
+                           "object_state", "emoji"]
+    assert details[0] == "the Ville:Isabella's apartment:main room:desk"
+    assert details[1] == "🛏"
+    assert details[3] == "being used"
+
+
+def test_unparseable_answer_runs_the_full_chain(llm):
+    llm.fused = "not json"
+    fused_details = plan._action_details("writing", make_persona(), MAZE,
+                                         fused_mode=True)
+    chain = llm.prompts[1:]
+    llm.prompts = []
+    assert plan._action_details("writing", make_persona(), MAZE) == \
+        fused_details
+    assert llm.prompts == chain
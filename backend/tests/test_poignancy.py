@@ -0,0 +1,114 @@
+"""Batched poignancy scoring and its persistent memo (no LLM)."""
+import sys
+sys.path.insert(0, ".")
+
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from backend.llm.response_cache import ResponseCache
+from backend.persona.cognitive_modules import poignancy
+
+PERSONA = SimpleNamespace(name="Isabella Rodriguez")
+
+
+@pytest.fixture
+def llm(monkeypatch, tmp_path):
+    """The batch prompt is answered from ``llm.answer(items)``; single
+    prompts are recorded and rated 4, or fail for descriptions in
+    ``llm.unratable``."""
+    state = SimpleNamespace(batches=[], singles=[], unratable=set(),
+                            answer=lambda items: [
+                                f"{i + 1}. {len(d) % 10 + 1}"
+                                for i, d in enumerate(items)])
+
+    def fake_generate(prompt, gpt_param, retries, fail_safe, validate,
+                      cleanup):
+        if prompt.startswith("single: "):
+            desc = prompt[len("single: "):]
+            state.singles.append(desc)
+            response = "" if desc in state.unratable else "4"
+        else:
+            items = re.findall(r"^\d+\. (.*)$", prompt, re.MULTILINE)
+            state.batches.append(items)
+            response = "\n".join(state.answer(items))
+        return cleanup(response, prompt) if validate(response, prompt) \
+            else fail_safe
+
+    async def afake_generate(*args):
+        return fake_generate(*args)
+
+    def single(desc, fail_safe=5):
+        return (f"single: {desc}", {}, 3, fail_safe,
+                lambda resp, _: resp.isdigit(), lambda resp, _: int(resp))
+
+    monkeypatch.setattr(poignancy, "safe_generate_response", fake_generate)
+    monkeypatch.setattr(poignancy, "asafe_generate_response", afake_generate)
+    monkeypatch.setattr(poignancy, "_memo",
+                        ResponseCache(tmp_path / "p.sqlite3", "always"))
+    state.single = single
+    return state
+
+
+def test_batch_scores_with_fallback_and_memo(llm):
+    descs = ["bed is being used", "Klaus is idle", "a break up",
+             "bed is being used", "college acceptance"]
+    # The answer skips item 2 and rates item 3 out of range
+    llm.answer = lambda items: ["1. 2", "3. 42"]
+    scores = poignancy.score_poignancy(PERSONA, "event", descs, llm.single)
+    assert llm.batches == [["bed is being used", "a break up",
+                            "college acceptance"]]
+    assert llm.singles == ["a break up", "college acceptance"]
+    assert scores == [2, 1, 4, 2, 4]
+
+    # Everything is memoized now, idle events never reach the model
+    llm.batches, llm.singles = [], []
+    assert poignancy.score_poignancy(
+        PERSONA, "event", descs, llm.single) == scores
+    assert llm.batches == [] and llm.singles == []
+
+    # Thoughts are rated with another prompt, so they have their own memo
+    assert poignancy.score_poignancy(
+        PERSONA, "thought", ["a break up"], llm.single) == [4]
+    assert llm.singles == ["a break up"]
+
+
+def test_memo_is_per_model_and_prompt_version(llm, monkeypatch):
+    descs = ["a break up", "college acceptance"]
+    first = poignancy.score_poignancy(PERSONA, "event", descs, llm.single)
+    assert len(llm.batches) == 1
+    poignancy.score_poignancy(PERSONA, "event", descs, llm.single)
+    assert len(llm.batches) == 1
+
+    monkeypatch.setattr(poignancy, "LLM_MODEL", "another-model")
+    assert poignancy.score_poignancy(
+        PERSONA, "event", descs, llm.single) == first
+    assert len(llm.batches) == 2
+
+    monkeypatch.setattr(poignancy, "MEMO_VERSION", 2)
+    poignancy.score_poignancy(PERSONA, "event", descs, llm.single)
+    assert len(llm.batches) == 3
+
+
+def test_fail_safe_scores_are_not_memoized(llm):
+    descs = ["a break up", "college acceptance", "cafe is busy"]
+    llm.unratable = {"a break up"}
+    # The batch answer is unusable and the single scorer fails once
+    llm.answer = lambda items: ["no idea"]
+    assert poignancy.score_poignancy(
+        PERSONA, "event", descs, llm.single) == [5, 4, 4]
+    assert llm.singles == descs
+
+    # Only the fail-safe one is asked again
+    llm.singles, llm.unratable = [], set()
+    assert poignancy.score_poignancy(
+        PERSONA, "event", descs, llm.single) == [4, 4, 4]
+    assert llm.singles == ["a break up"]
+
+
+def test_single_description_uses_the_single_scorer(llm):
+    assert poignancy.score_poignancy(
+        PERSONA, "event", ["cafe is busy"], llm.single) == [4]
+    assert llm.batches == []
+    assert poignancy.score_poignancy(PERSONA, "event", [], llm.single) == []
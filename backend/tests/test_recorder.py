@@ -0,0 +1,270 @@
+"""Recorder: streamed log, crash repair, delta keyframes and replay reads."""
+import sys
+sys.path.insert(0, ".")
+
+import json
+import random
+
+import pytest
+
+from backend import recorder
+from backend.recorder import (
+    INDEX_FILE, LEGACY_FILE, LOG_FILE, SimulationRecorder, read_index)
+
+NAMES = ["Isabella Rodriguez", "Klaus Mueller", "Maria Lopez"]
+
+
+def make_steps(n, seed=0):
+    """Movements for n steps: personas walk, change actions and chat, and
+    a chat continues over several steps."""
+    rng = random.Random(seed)
+    chats = [[["Isabella Rodriguez", "Hi Klaus!"],
+              ["Klaus Mueller", "Hello, Isabella."]],
+             [["Maria Lopez", "Are you coming to the party?"]]]
+    tiles = {name: [10 * i, 5] for i, name in enumerate(NAMES)}
+    steps = []
+    for _ in range(n):
+        movements = {}
+        for name in NAMES:
+            if rng.random() < 0.6:
+                tiles[name] = [tiles[name][0] + rng.choice([-1, 1]),
+                               tiles[name][1]]
+            chat = chats[rng.randrange(2)] if rng.random() < 0.3 else None
+            movements[name] = {
+                "movement": list(tiles[name]),
+                "pronunciatio": rng.choice(["☕", "🎨", "💤"]),
+                "description": rng.choice(["working", "painting",
+                                           "sleeping"]),
+                "chat": chat,
+            }
+        steps.append(movements)
+    return steps
+
+
+def record(folder, steps, **kwargs):
+    rec = SimulationRecorder(folder, **kwargs)
+    for i, movements in enumerate(steps):
+        rec.record_step(i, movements)
+    rec.close()
+    return rec
+
+
+def full(steps):
+    return {str(i): movements for i, movements in enumerate(steps)}
+
+
+@pytest.mark.parametrize("delta", [False, True])
+def test_log_round_trip_and_compact(tmp_path, delta):
+    steps = make_steps(25)
+    record(tmp_path, steps, delta=delta, keyframe_every=10)
+    assert recorder.load_movements(tmp_path) == full(steps)
+    assert [step for step, _, _ in read_index(tmp_path)] == list(range(25))
+
+    path = recorder.compact(tmp_path)
+    assert path == tmp_path / LEGACY_FILE
+    assert json.load(open(path, encoding="utf-8")) == full(steps)
+
+
+def test_torn_tail_is_truncated_on_resume(tmp_path):
+    steps = make_steps(12)
+    record(tmp_path, steps[:10])
+    log_path = tmp_path / LOG_FILE
+    size = log_path.stat().st_size
+
+    # A crash halfway through writing step 10: the record is torn and its
+    # index entry never made it
+    with open(log_path, "ab") as f:
+        f.write(json.dumps({"step": 10, "movements": steps[10]})
+                .encode()[:40])
+    assert recorder.load_movements(tmp_path) == full(steps[:10])
+
+    rec = SimulationRecorder(tmp_path, resume=True)
+    assert rec.n_steps == 10
+    assert log_path.stat().st_size == size
+    rec.record_step(10, steps[10])
+    rec.record_step(11, steps[11])
+    rec.close()
+    assert recorder.load_movements(tmp_path) == full(steps)
+    assert [step for step, _, _ in read_index(tmp_path)] == list(range(12))
+
+
+def test_index_and_log_agree_after_crash(tmp_path):
+    steps = make_steps(8)
+    record(tmp_path, steps[:6], delta=True, keyframe_every=4)
+    log_path, index_path = tmp_path / LOG_FILE, tmp_path / INDEX_FILE
+
+    # Step 6 reached the log but not the index, and a torn index entry
+    # for it follows
+    rec = SimulationRecorder(tmp_path, resume=True, delta=True)
+    rec._index.write(b"\x06\x00\x00")
+    rec._log.write(json.dumps({"step": 6, "movements": steps[6]}).encode()
+                   + b"\n")
+    rec._log.close()
+    rec._index.close()
+
+    rec = SimulationRecorder(tmp_path, resume=True, delta=True,
+                             keyframe_every=4)
+    assert rec.n_steps == 6
+    entries = read_index(tmp_path)
+    assert index_path.stat().st_size == 6 * 24
+    with open(log_path, "rb") as f:
+        for step, offset, _ in entries:
+            f.seek(offset)
+            assert json.loads(f.readline())["step"] == step
+        assert f.read() == b""
+
+    # The resumed delta run starts with a keyframe and replays cleanly
+    rec.record_step(6, steps[6])
+    rec.record_step(7, steps[7])
+    rec.close()
+    assert read_index(tmp_path)[6][2] == recorder.KEYFRAME
+    assert recorder.load_movements(tmp_path) == full(steps)
+
+
+def test_log_truncated_mid_record_reopens(tmp_path):
+    steps = make_steps(10)
+    record(tmp_path, steps, delta=True, keyframe_every=3)
+    log_path = tmp_path / LOG_FILE
+    step_6 = read_index(tmp_path)[6][1]
+
+    # Cut the log inside step 6's record; the index still lists 7 .. 9
+    with open(log_path, "r+b") as f:
+        f.truncate(step_6 + 5)
+
+    rec = SimulationRecorder(tmp_path, resume=True, delta=True,
+                             keyframe_every=3)
+    assert rec.n_steps == 6
+    assert log_path.stat().st_size == step_6
+    assert len(read_index(tmp_path)) == 6
+    for i in range(6, 10):
+        rec.record_step(i, steps[i])
+    rec.close()
+    assert recorder.load_movements(tmp_path) == full(steps)
+
+
+def rebuild_from_keyframe(folder, step):
+    """Movements at ``step`` from a fresh ReplayState, folding only the
+    records from the last keyframe at or before it."""
+    records = list(recorder.iter_records(folder))
+    flags = [f for _, _, f in read_index(folder)]
+    start = max(i for i in range(step + 1) if flags[i] & recorder.KEYFRAME)
+    replay = recorder.ReplayState()
+    for rec in records[start:step + 1]:
+        movements = replay.apply(rec)
+    return movements
+
+
+@pytest.mark.parametrize("keyframe_every", [1, 4, 10])
+def test_delta_steps_rebuild_from_any_keyframe(tmp_path, keyframe_every):
+    steps = make_steps(40, seed=keyframe_every)
+    record(tmp_path / "full", steps)
+    record(tmp_path / "delta", steps, delta=True,
+           keyframe_every=keyframe_every)
+
+    snapshots = recorder.load_movements(tmp_path / "full")
+    assert recorder.load_movements(tmp_path / "delta") == snapshots
+    for step in range(len(steps)):
+        assert rebuild_from_keyframe(tmp_path / "delta", step) == \
+            snapshots[str(step)]
+    if keyframe_every > 1:
+        assert (tmp_path / "delta" / LOG_FILE).stat().st_size < \
+            (tmp_path / "full" / LOG_FILE).stat().st_size
+
+
+def test_chat_reused_after_keyframe_is_written_again(tmp_path):
+    steps = make_steps(8)
+    chat = [["Isabella Rodriguez", "Hi Klaus!"]]
+    for i in (1, 6):
+        steps[i]["Isabella Rodriguez"]["chat"] = chat
+    for i in (0, 2, 3, 4, 5, 7):
+        steps[i]["Isabella Rodriguez"]["chat"] = None
+    record(tmp_path, steps, delta=True, keyframe_every=4)
+
+    records = list(recorder.iter_records(tmp_path))
+    cid = recorder.chat_id(chat)
+    assert cid in records[1]["chats"] and cid in records[6]["chats"]
+    assert rebuild_from_keyframe(tmp_path, 6)["Isabella Rodriguez"][
+        "chat"] == chat
+
+
+def test_replay_reader_state_and_range(tmp_path):
+    steps = make_steps(30)
+    record(tmp_path, steps, delta=True, keyframe_every=8)
+    reader = recorder.ReplayReader(tmp_path)
+    assert len(reader) == 30
+    assert reader.keyframes == [0, 8, 16, 24]
+    for step in (0, 7, 8, 9, 23, 29):
+        assert reader.state(step) == steps[step]
+    # Past the end gives the last step; before the start, nothing
+    assert reader.state(500) == steps[29]
+    assert reader.state(-1) is None
+    assert reader.range(6, 18) == {str(i): steps[i] for i in range(6, 19)}
+    assert reader.range(25, 100) == {str(i): steps[i] for i in range(25, 30)}
+    assert reader.range(40, 50) == {}
+
+
+def test_replay_reader_without_index_and_legacy(tmp_path):
+    steps = make_steps(12)
+    record(tmp_path / "scan", steps, delta=True, keyframe_every=5)
+    (tmp_path / "scan" / INDEX_FILE).unlink()
+    reader = recorder.ReplayReader(tmp_path / "scan")
+    assert reader.keyframes == [0, 5, 10]
+    assert reader.state(7) == steps[7]
+
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    (legacy / LEGACY_FILE).write_text(json.dumps(full(steps)))
+    reader = recorder.ReplayReader(legacy)
+    assert len(reader) == 12
+    assert reader.state(4) == steps[4]
+    assert reader.range(10, 20) == {"10": steps[10], "11": steps[11]}
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from backend import main
+
+    monkeypatch.setattr(main, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(main, "_readers", {})
+    return TestClient(main.app)
+
+
+def test_replay_state_and_range_endpoints(client, tmp_path, monkeypatch):
+    from backend import main
+
+    steps = make_steps(40)
+    record(tmp_path / "saves" / "run", steps, delta=True, keyframe_every=10)
+
+    got = client.get("/api/replay/run/state", params={"step": 23}).json()
+    assert got == {"step": 23, "movements": steps[23], "total_steps": 40}
+    got = client.get("/api/replay/run/range",
+                     params={"from": 5, "to": 14}).json()
+    assert got == {str(i): steps[i] for i in range(5, 15)}
+
+    # A range is capped at MAX_RANGE_STEPS steps from its start
+    monkeypatch.setattr(main, "MAX_RANGE_STEPS", 8)
+    got = client.get("/api/replay/run/range",
+                     params={"from": 20, "to": 39}).json()
+    assert sorted(got, key=int) == [str(i) for i in range(20, 28)]
+
+    assert "error" in client.get("/api/replay/missing/state",
+                                 params={"step": 0}).json()
+
+
+def test_range_endpoint_caps_at_1000_steps(client, tmp_path):
+    steps = make_steps(1100)
+    record(tmp_path / "saves" / "long", steps, delta=True, keyframe_every=100)
+    got = client.get("/api/replay/long/range",
+                     params={"from": 50, "to": 1099}).json()
+    assert sorted(map(int, got)) == list(range(50, 1050))
+    assert got["1049"] == steps[1049]
+
+    # The reader is reopened once the recording grows
+    rec = SimulationRecorder(tmp_path / "saves" / "long", resume=True,
+                             delta=True)
+    rec.record_step(1100, steps[0])
+    rec.close()
+    got = client.get("/api/replay/long/state", params={"step": 1100}).json()
+    assert (got["movements"], got["total_steps"]) == (steps[0], 1101)
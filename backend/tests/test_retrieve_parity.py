@@ -0,0 +1,70 @@
+"""Parity test: vectorized new_retrieve vs the dict-based implementation."""
+import sys
+sys.path.insert(0, ".")
+
+import datetime
+import hashlib
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from backend.persona.memory_structures.associative_memory import AssociativeMemory
+from backend.persona.cognitive_modules import retrieve
+
+
+def fake_embedding(text):
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(16).tolist()
+
+
+@pytest.fixture(autouse=True)
+def no_model(monkeypatch):
+    monkeypatch.setattr(retrieve, "get_embedding", fake_embedding)
+    monkeypatch.setattr(retrieve, "get_embeddings",
+                        lambda texts: [fake_embedding(t) for t in texts])
+
+
+def build_persona(seed, n_nodes):
+    rng = random.Random(seed)
+    a_mem = AssociativeMemory("/nonexistent")
+    start = datetime.datetime(2023, 2, 13, 8, 0, 0)
+    for i in range(n_nodes):
+        created = start + datetime.timedelta(seconds=10 * rng.randint(0, 50))
+        # Repeated descriptions share an embedding, giving exact ties
+        desc = f"event {rng.randint(0, n_nodes // 3)}"
+        if rng.random() < 0.1:
+            desc = "bed is idle"
+        add = a_mem.add_thought if rng.random() < 0.3 else a_mem.add_event
+        add(created, None, "Isabella Rodriguez", "is", desc, desc,
+            {"isabella"}, rng.randint(1, 10),
+            (desc, fake_embedding(desc)), [])
+    scratch = SimpleNamespace(
+        recency_w=1, relevance_w=1, importance_w=1, recency_decay=0.99,
+        curr_time=start + datetime.timedelta(hours=1))
+    return SimpleNamespace(a_mem=a_mem, scratch=scratch)
+
+
+@pytest.mark.parametrize("seed,n_nodes,n_count", [
+    (0, 5, 30), (1, 60, 30), (2, 400, 30), (3, 400, 15), (4, 1000, 50)])
+def test_new_retrieve_matches_dict_implementation(seed, n_nodes, n_count):
+    focal_points = ["Klaus Mueller", "the cafe party", "event 3"]
+    p_vec = build_persona(seed, n_nodes)
+    p_dict = build_persona(seed, n_nodes)
+
+    got = retrieve.new_retrieve(p_vec, focal_points, n_count)
+    want = retrieve.new_retrieve_dict(p_dict, focal_points, n_count)
+
+    assert list(got) == list(want)
+    for focal_pt in focal_points:
+        assert ([n.node_id for n in got[focal_pt]]
+                == [n.node_id for n in want[focal_pt]])
+    assert ([n.last_accessed for n in p_vec.a_mem.id_to_node.values()]
+            == [n.last_accessed for n in p_dict.a_mem.id_to_node.values()])
+
+
+def test_new_retrieve_empty_memory():
+    persona = build_persona(0, 0)
+    assert retrieve.new_retrieve(persona, ["anything"]) == {"anything": []}
+    assert retrieve.new_retrieve(persona, []) == {}
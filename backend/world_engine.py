@@ -8,24 +8,34 @@ the main simulation loop. Faithful reimplementation of reverie.py.
 from __future__ import annotations
 
 import json
+import time
 import logging
 import datetime
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
-from backend.config import DATA_DIR
+from backend.config import (
+    DATA_DIR, DISTANCE_FIELD_CACHE_SIZE, LLM_MAX_PARALLEL, PATH_CACHE_SIZE,
+    PATH_MODE, SIM_SEED, WARM_DISTANCE_FIELDS)
 from backend.maze import Maze
 from backend.persona.persona import Persona
+from backend.persona.cognitive_modules.plan import (
+    resolve_deferred_chat, update_chat_state)
 
 log = logging.getLogger(__name__)
 
 
 class WorldEngine:
-    def __init__(self):
+    def __init__(self, workers: int = 1, seed: Optional[int] = SIM_SEED):
         self.maze: Optional[Maze] = None
         self.personas: dict[str, Persona] = {}
         self.personas_tile: dict[str, tuple[int, int]] = {}
+        # What the placement phase last put on the maze for each persona:
+        # name -> (tile, event), and object events to turn idle next step
+        self._placed: dict[str, tuple[tuple[int, int], tuple]] = {}
+        self._obj_cleanup: dict[tuple, tuple[int, int]] = {}
 
         self.start_time: Optional[datetime.datetime] = None
         self.curr_time: Optional[datetime.datetime] = None
@@ -33,6 +43,12 @@ class WorldEngine:
         self.step: int = 0
         self.sim_code: str = ""
 
+        # Number of personas that think concurrently within a step.
+        # 1 keeps the original fully serial loop.
+        self.workers: int = max(1, workers)
+        # Seeds each persona's random generator; None for a fresh one
+        self.seed = seed
+
         self.running = False
 
     def load_simulation(self, sim_name: str = "the_ville"):
@@ -54,7 +70,11 @@ class WorldEngine:
         self.step = meta.get('step', 0)
 
         # Load maze
-        self.maze = Maze(meta['maze_name'], DATA_DIR)
+        self.maze = Maze(meta['maze_name'], DATA_DIR,
+                         field_cache_size=DISTANCE_FIELD_CACHE_SIZE,
+                         warm_fields=WARM_DISTANCE_FIELDS,
+                         path_cache_size=PATH_CACHE_SIZE,
+                         path_mode=PATH_MODE)
 
         # Load initial environment (persona positions)
         env_path = sim_dir / "environment" / "0.json"
@@ -67,7 +87,7 @@ class WorldEngine:
         self.personas_tile = {}
         for persona_name in meta['persona_names']:
             persona_folder = str(sim_dir / "personas" / persona_name)
-            persona = Persona(persona_name, persona_folder)
+            persona = Persona(persona_name, persona_folder, seed=self.seed)
             self.personas[persona_name] = persona
 
             if persona_name in init_env:
@@ -75,6 +95,10 @@ class WorldEngine:
                 y = init_env[persona_name]["y"]
                 self.personas_tile[persona_name] = (x, y)
 
+        self._placed = {}
+        self._obj_cleanup = {}
+        self._place_events()
+
         log.info("Loaded simulation '%s': %d personas, step=%d, time=%s",
                  sim_name, len(self.personas), self.step,
                  self.curr_time.strftime("%B %d, %Y, %H:%M:%S"))
@@ -94,7 +118,148 @@ class WorldEngine:
         log.info("========== STEP %d | %s ==========",
                  self.step, self.curr_time.strftime("%H:%M:%S"))
 
+        step_start = time.perf_counter()
+        plan_secs = self._run_planning_phase()
+        t_personas = time.perf_counter()
+        if self.workers > 1:
+            movements, persona_secs = self._run_personas_concurrent()
+        else:
+            movements, persona_secs = self._run_personas_serial()
+        t_place = time.perf_counter()
+        self._place_events()
+        step_end = time.perf_counter()
+        wall = step_end - step_start
+
+        # Speedup = time the personas would have taken back to back
+        # divided by the wall time the step actually took.
+        serial_equiv = sum(persona_secs.values()) + sum(plan_secs.values())
+        timings = {
+            "workers": self.workers,
+            "wall_sec": round(wall, 3),
+            "serial_sec": round(serial_equiv, 3),
+            "speedup": round(serial_equiv / wall, 2) if wall > 0 else 1.0,
+            "phases": {
+                "planning": round(t_personas - step_start, 3),
+                "personas": round(t_place - t_personas, 3),
+                "placement": round(step_end - t_place, 3),
+            },
+        }
+
+        # Advance time
+        self.step += 1
+        self.curr_time += datetime.timedelta(seconds=self.sec_per_step)
+
+        phases = timings["phases"]
+        log.info("Step %d complete. Time now: %s | %.1fs wall, "
+                 "%.1fs serial, %.2fx speedup (%d workers) | planning "
+                 "%.1fs, personas %.1fs, placement %.3fs",
+                 self.step, self.curr_time.strftime("%H:%M:%S"),
+                 timings["wall_sec"], timings["serial_sec"],
+                 timings["speedup"], self.workers, phases["planning"],
+                 phases["personas"], phases["placement"])
+
+        return {
+            "step": self.step,
+            "time": self.curr_time.strftime("%B %d, %Y, %H:%M:%S"),
+            "movements": movements,
+            "timings": timings,
+        }
+
+    def _run_planning_phase(self) -> dict:
+        """Day-boundary phase: long-term planning for every persona at once.
+
+        On the first step and after midnight each persona's think() would
+        otherwise run its wake-up hour, daily plan / identity revision and
+        hourly schedule prompts back to back inside its own step. Each
+        persona's planning only touches its own memory, so they all run on
+        a pool sized to the LLM server's parallel slots (independent of
+        ``workers``) before the normal step. Returns {name: seconds} for
+        the personas that planned.
+        """
+        due = [name for name, persona in self.personas.items()
+               if persona.new_day(self.curr_time)]
+        if not due:
+            return {}
+
+        plan_secs = {}
+
+        def _plan(persona_name: str):
+            t0 = time.perf_counter()
+            try:
+                self.personas[persona_name].plan_new_day(self.curr_time)
+            except Exception as e:
+                # think() retries the planning in the normal step
+                log.error("  ERROR in %s.plan_new_day(): %s\n%s",
+                          persona_name, e, traceback.format_exc())
+            finally:
+                plan_secs[persona_name] = time.perf_counter() - t0
+
+        n_threads = min(len(due), max(self.workers, LLM_MAX_PARALLEL))
+        log.info("Planning phase: %d personas on %d threads",
+                 len(due), n_threads)
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_threads,
+                                thread_name_prefix="planner") as pool:
+            list(pool.map(_plan, due))
+        log.info("Planning phase done in %.1fs (%.1fs serial)",
+                 time.perf_counter() - t0, sum(plan_secs.values()))
+        return plan_secs
+
+    def _place_events(self):
+        """Event placement phase: put each persona's current event on its
+        tile, as the original reverie loop does between steps.
+
+        Incremental: only personas whose tile or event changed are touched,
+        and the maze occupancy grid moves with them. A persona that has
+        arrived (no path left) also places its object event; those are
+        turned idle again at the next placement, unless re-placed.
+        """
+        maze = self.maze
+        for event, tile in self._obj_cleanup.items():
+            maze.turn_event_from_tile_idle(event, tile)
+        self._obj_cleanup = {}
+
+        for name, persona in self.personas.items():
+            tile = self.personas_tile.get(name)
+            event = persona.scratch.get_curr_event_and_desc()
+            placed = self._placed.get(name)
+            if placed != (tile, event):
+                old_tile = placed[0] if placed else None
+                if old_tile is not None:
+                    maze.remove_subject_events_from_tile(name, old_tile)
+                if old_tile != tile:
+                    maze.move_occupant(old_tile, tile)
+                if tile is not None:
+                    maze.add_event_from_tile(event, tile)
+                    self._placed[name] = (tile, event)
+                else:
+                    self._placed.pop(name, None)
+
+            if tile is not None and not persona.scratch.planned_path:
+                obj_event = persona.scratch.get_curr_obj_event_and_desc()
+                if obj_event[0]:
+                    maze.add_event_from_tile(obj_event, tile)
+                    maze.remove_event_from_tile(
+                        (obj_event[0], None, None, None), tile)
+                    self._obj_cleanup[obj_event] = tile
+
+    def _record_move(self, movements: dict, persona_name: str, result):
+        next_tile, pronunciatio, description = result
+        self.personas_tile[persona_name] = next_tile
+        movements[persona_name] = {
+            "movement": list(next_tile),
+            "pronunciatio": pronunciatio,
+            "description": description,
+            "chat": self.personas[persona_name].scratch.chat,
+        }
+
+    def _confused(self, persona_name: str, curr_tile: tuple):
+        return curr_tile, "⚠️", f"{persona_name} is confused"
+
+    def _run_personas_serial(self) -> tuple[dict, dict]:
+        """Original loop: each persona runs its full move() in turn."""
         movements = {}
+        persona_secs = {}
         persona_names = list(self.personas.keys())
         total = len(persona_names)
 
@@ -105,39 +270,100 @@ class WorldEngine:
             log.info("[%d/%d] %s at tile %s", idx + 1, total,
                      persona_name, curr_tile)
 
+            t0 = time.perf_counter()
             try:
-                next_tile, pronunciatio, description = persona.move(
+                result = persona.move(
                     self.maze, self.personas, curr_tile, self.curr_time)
                 log.info("  -> moved to %s | %s | %s",
-                         next_tile, pronunciatio, description[:60])
+                         result[0], result[1], result[2][:60])
             except Exception as e:
                 log.error("  ERROR in %s.move(): %s\n%s",
                           persona_name, e, traceback.format_exc())
-                next_tile = curr_tile
-                pronunciatio = "⚠️"
-                description = f"{persona_name} is confused"
+                result = self._confused(persona_name, curr_tile)
+            persona_secs[persona_name] = time.perf_counter() - t0
 
-            self.personas_tile[persona_name] = next_tile
+            self._record_move(movements, persona_name, result)
 
-            movements[persona_name] = {
-                "movement": list(next_tile),
-                "pronunciatio": pronunciatio,
-                "description": description,
-                "chat": persona.scratch.chat,
-            }
+        return movements, persona_secs
 
-        # Advance time
-        self.step += 1
-        self.curr_time += datetime.timedelta(seconds=self.sec_per_step)
+    def _run_personas_concurrent(self) -> tuple[dict, dict]:
+        """Think phase on a thread pool, then a deterministic commit phase.
 
-        log.info("Step %d complete. Time now: %s",
-                 self.step, self.curr_time.strftime("%H:%M:%S"))
-
-        return {
-            "step": self.step,
-            "time": self.curr_time.strftime("%B %d, %Y, %H:%M:%S"),
-            "movements": movements,
-        }
+        perceive/retrieve/plan/reflect are dominated by LLM round-trips, so
+        they run in parallel. Chat pairings and tile moves are applied
+        afterwards in the fixed persona order so runs stay reproducible.
+        """
+        persona_names = list(self.personas.keys())
+        total = len(persona_names)
+        start_tiles = {name: self.personas_tile.get(name, (0, 0))
+                       for name in persona_names}
+        deferred = {name: [] for name in persona_names}
+        persona_secs = {}
+        # Reactions judge the others as they were at the start of the
+        # step, whichever thread happens to get there first
+        snapshot = {name: p.snapshot() for name, p in self.personas.items()}
+
+        def _think(persona_name: str) -> bool:
+            persona = self.personas[persona_name]
+            t0 = time.perf_counter()
+            try:
+                persona.think(self.maze, snapshot,
+                              start_tiles[persona_name], self.curr_time,
+                              deferred_chats=deferred[persona_name])
+                return True
+            except Exception as e:
+                log.error("  ERROR in %s.think(): %s\n%s",
+                          persona_name, e, traceback.format_exc())
+                return False
+            finally:
+                persona_secs[persona_name] = time.perf_counter() - t0
+
+        log.info("Think phase: %d personas on %d workers",
+                 total, self.workers)
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix="persona") as pool:
+            futures = {name: pool.submit(_think, name)
+                       for name in persona_names}
+        ok = {name: futures[name].result() for name in persona_names}
+
+        # Commit phase 1: chat pairings, then each persona's chat
+        # bookkeeping, in persona order as a serial plan() would
+        for persona_name in persona_names:
+            persona = self.personas[persona_name]
+            t0 = time.perf_counter()
+            for focused_event, reaction_mode in deferred[persona_name]:
+                try:
+                    resolve_deferred_chat(
+                        self.maze, persona, focused_event, reaction_mode,
+                        self.personas)
+                except Exception as e:
+                    log.error("  ERROR in %s chat: %s\n%s",
+                              persona_name, e, traceback.format_exc())
+            if ok[persona_name]:
+                update_chat_state(persona)
+            persona_secs[persona_name] += time.perf_counter() - t0
+
+        # Commit phase 2: tile moves, in persona order
+        movements = {}
+        for idx, persona_name in enumerate(persona_names):
+            curr_tile = start_tiles[persona_name]
+            log.info("[%d/%d] %s at tile %s", idx + 1, total,
+                     persona_name, curr_tile)
+            if not ok[persona_name]:
+                result = self._confused(persona_name, curr_tile)
+            else:
+                try:
+                    result = self.personas[persona_name].act(
+                        self.maze, self.personas)
+                    log.info("  -> moved to %s | %s | %s",
+                             result[0], result[1], result[2][:60])
+                except Exception as e:
+                    log.error("  ERROR in %s.act(): %s\n%s",
+                              persona_name, e, traceback.format_exc())
+                    result = self._confused(persona_name, curr_tile)
+            self._record_move(movements, persona_name, result)
+
+        return movements, persona_secs
 
     def get_state(self) -> dict:
         return {
@@ -2,11 +2,14 @@ import { useState, useEffect, useRef, useCallback } from 'react';
 import Phaser from 'phaser';
 import { GameScene } from './GameScene';
 import {
-  listReplays, getReplayMovements, startSimulation, getState,
+  listReplays, getReplayRange, getReplayState, startSimulation, getState,
 } from './api';
 import type { ReplayMeta, StepMovements } from './api';
 import './app.css';
 
+/** Steps fetched per /range request; the next chunk loads at the halfway mark */
+const CHUNK_STEPS = 200;
+
 export default function App() {
   const gameRef = useRef<Phaser.Game | null>(null);
   const sceneRef = useRef<GameScene | null>(null);
@@ -25,6 +28,12 @@ export default function App() {
   const [playSpeed, setPlaySpeed] = useState(2);
   const playRef = useRef(false);
 
+  // Chunked loading: replayData only holds the steps fetched so far
+  const loadedUntil = useRef(-1);
+  const endReached = useRef(false);
+  const fetching = useRef(false);
+  const loadGeneration = useRef(0);
+
   // UI state
   const [events, setEvents] = useState<string[]>([]);
   const [, setLoading] = useState(false);
@@ -54,6 +63,35 @@ export default function App() {
     listReplays().then(setReplays).catch(() => {});
   }, []);
 
+  // Fetch CHUNK_STEPS steps starting at `from` into replayData
+  const fetchChunk = useCallback(async (name: string, from: number) => {
+    if (fetching.current) return;
+    fetching.current = true;
+    const generation = loadGeneration.current;
+    const to = from + CHUNK_STEPS - 1;
+    try {
+      const chunk = await getReplayRange(name, from, to);
+      // A seek since this request started makes it stale
+      if (generation !== loadGeneration.current) return;
+      if ((chunk as any).error) throw new Error((chunk as any).error);
+      if (Object.keys(chunk).length === 0) endReached.current = true;
+      loadedUntil.current = Math.max(loadedUntil.current, to);
+      setReplayData(prev => ({ ...(prev || {}), ...chunk }));
+    } finally {
+      if (generation === loadGeneration.current) fetching.current = false;
+    }
+  }, []);
+
+  // Drop fetched steps and start loading again from `from`
+  const resetChunks = useCallback((name: string, from: number) => {
+    loadGeneration.current += 1;
+    fetching.current = false;
+    endReached.current = false;
+    loadedUntil.current = from - 1;
+    setReplayData({});
+    return fetchChunk(name, from);
+  }, [fetchChunk]);
+
   // Load a replay
   const loadReplay = useCallback(async (name: string) => {
     setLoading(true);
@@ -75,25 +113,31 @@ export default function App() {
         setPersonaNames(Object.keys(state.personas));
       }
 
-      // Load movement data
-      const movements = await getReplayMovements(name);
-      if ((movements as any).error) {
-        alert((movements as any).error);
-        setLoading(false);
-        return;
-      }
+      // Load the first chunk; playback can start before the rest arrives
+      await resetChunks(name, 0);
 
+      // meta.json is written at checkpoints, so fall back to the index
+      // length when it is missing or behind the log
       const meta = replays.find(r => r.name === name);
-      setReplayData(movements);
+      const initial = await getReplayState(name, 0);
+      const total = Math.max(meta?.total_steps ?? 0, initial.total_steps ?? 0);
       setReplayMeta(meta || null);
       setSelectedReplay(name);
-      setTotalSteps(Object.keys(movements).length);
-      setEvents([`Loaded replay: ${name} (${Object.keys(movements).length} steps)`]);
+      setTotalSteps(total);
+      setEvents([`Loaded replay: ${name} (${total} steps)`]);
     } catch (e: any) {
       alert('Failed to load replay: ' + e.message);
     }
     setLoading(false);
-  }, [replays]);
+  }, [replays, resetChunks]);
+
+  // Prefetch the next chunk once playback is halfway through the loaded one
+  useEffect(() => {
+    if (!selectedReplay || endReached.current) return;
+    if (currentStep + CHUNK_STEPS / 2 > loadedUntil.current) {
+      fetchChunk(selectedReplay, loadedUntil.current + 1).catch(() => {});
+    }
+  }, [currentStep, selectedReplay, replayData, fetchChunk]);
 
   // Playback timer
   useEffect(() => {
@@ -108,6 +152,8 @@ export default function App() {
         const stepData = replayData[String(next)];
 
         if (!stepData) {
+          // Not fetched yet: wait for the chunk unless it came back empty
+          if (next > loadedUntil.current || fetching.current) return prev;
           // Reached end
           playRef.current = false;
           setIsPlaying(false);
@@ -143,25 +189,21 @@ export default function App() {
   }, [isPlaying, playSpeed, replayData]);
 
   // Seek to specific step
-  const seekTo = useCallback((step: number) => {
-    if (!replayData || !sceneRef.current) return;
+  const seekTo = useCallback(async (step: number) => {
+    if (!selectedReplay || !sceneRef.current) return;
     setCurrentStep(step);
 
-    // Apply all movements up to this step to get correct positions
-    // (find the latest position for each persona)
-    const positions: Record<string, StepMovements[string]> = {};
-    for (let s = 0; s <= step; s++) {
-      const data = replayData[String(s)];
-      if (data) {
-        for (const [name, mv] of Object.entries(data)) {
-          positions[name] = mv;
-        }
+    // The backend rebuilds positions from the nearest keyframe
+    const state = await getReplayState(selectedReplay, step);
+    if (sceneRef.current && state.movements) {
+      for (const [name, mv] of Object.entries(state.movements)) {
+        sceneRef.current.movePersona(name, mv.movement[0], mv.movement[1], mv.pronunciatio);
       }
     }
-    for (const [name, mv] of Object.entries(positions)) {
-      sceneRef.current.movePersona(name, mv.movement[0], mv.movement[1], mv.pronunciatio);
+    if (!replayData?.[String(step + 1)]) {
+      await resetChunks(selectedReplay, step + 1);
     }
-  }, [replayData]);
+  }, [selectedReplay, replayData, resetChunks]);
 
   // No replay selected — show replay picker
   if (!selectedReplay) {
@@ -36,6 +36,27 @@ export async function getReplayMovements(name: string): Promise<Record<string, S
   return r.json();
 }
 
+export interface ReplayState {
+  step: number;
+  movements: StepMovements;
+  /** Steps in the recording's index, current even between checkpoints */
+  total_steps: number;
+}
+
+/** Full persona state at one step (rebuilt server-side from a keyframe) */
+export async function getReplayState(name: string, step: number): Promise<ReplayState> {
+  const r = await fetch(`${BASE}/api/replay/${encodeURIComponent(name)}/state?step=${step}`);
+  return r.json();
+}
+
+/** Movements for steps from..to inclusive, keyed by step */
+export async function getReplayRange(
+  name: string, from: number, to: number,
+): Promise<Record<string, StepMovements>> {
+  const r = await fetch(`${BASE}/api/replay/${encodeURIComponent(name)}/range?from=${from}&to=${to}`);
+  return r.json();
+}
+
 /** Start simulation (used to initialize map/persona positions) */
 export async function startSimulation(simName = 'the_ville') {
   const r = await fetch(`${BASE}/api/start`, {